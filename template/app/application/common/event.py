@@ -9,3 +9,9 @@ class Event:
 
 class EventHandler[Req: Event, Resp](Protocol):
     async def __call__(self, event: Req) -> Resp: ...
+
+
+class BatchEventHandler[Req: Event, Resp](Protocol):
+    """Handler of a batch of events read from a stream at once."""
+
+    async def __call__(self, events: list[Req]) -> Resp: ...
@@ -1,5 +1,7 @@
 from abc import abstractmethod
 from contextlib import AbstractAsyncContextManager
+from datetime import datetime, timedelta
+from enum import StrEnum
 from typing import Protocol, runtime_checkable
 
 from app.application.common.event import Event
@@ -14,6 +16,22 @@ class DBSession(Protocol):
 
 
 class SessionFactory(Protocol):
+    @abstractmethod
+    def __call__(
+        self,
+        *,
+        read_only: bool = False,
+    ) -> AbstractAsyncContextManager[DBSession]:
+        """Open a session, on a read replica if it is `read_only` and one is available.
+
+        Replicas may lag behind the primary, read your own writes with a
+        session that is not read-only.
+        """
+
+
+class ReadSessionFactory(Protocol):
+    """Read-only sessions, the ones of `QueryHandler`s."""
+
     @abstractmethod
     def __call__(self) -> AbstractAsyncContextManager[DBSession]: ...
 
@@ -28,11 +46,43 @@ class RepositoryFactory[Repo: Repository](Protocol):
     def __call__(self, session: DBSession) -> Repo: ...
 
 
+class Priority(StrEnum):
+    HIGH = "high"
+    NORMAL = "normal"
+    LOW = "low"
+
+
 class Publisher(Protocol):
     @abstractmethod
-    async def publish(self, event: Event, namespace: str) -> None: ...
+    async def publish(  # noqa: PLR0913, WPS211 options of the delivery
+        self,
+        event: Event,
+        namespace: str,
+        key: str | None = None,
+        *,
+        deliver_at: datetime | timedelta | None = None,
+        priority: Priority = Priority.NORMAL,
+    ) -> None:
+        """Publish an event to a namespace.
+
+        Events with the same `key` are handled in the order they are published
+        when the namespace is partitioned. An event with a `deliver_at` time,
+        or a delay from now, is delivered to consumers from that time on. Events
+        of each `priority` go to their own stream of the namespace, partitioned
+        namespaces have a single priority.
+        """
 
 
 class PublisherFactory(Protocol):
     @abstractmethod
     def __call__(self) -> AbstractAsyncContextManager[Publisher]: ...
+
+
+class OutboxFactory(Protocol):
+    """Publisher writing events in the transaction of the session.
+
+    Events are sent once the session commits, and are discarded on rollback.
+    """
+
+    @abstractmethod
+    def __call__(self, session: DBSession) -> Publisher: ...
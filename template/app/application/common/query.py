@@ -8,4 +8,9 @@ class Query:
 
 
 class QueryHandler[Req: Query, Resp](Protocol):
+    """Handler of a query, opening its sessions with a `ReadSessionFactory`.
+
+    Its sessions are then served by a read replica when one is configured.
+    """
+
     async def __call__(self, query: Req) -> Resp: ...
@@ -3,7 +3,7 @@ import logging
 from app.application.common.command import CommandHandler
 from app.application.common.event import EventHandler
 from app.application.common.interfaces import (
-    PublisherFactory,
+    OutboxFactory,
     RepositoryFactory,
     SessionFactory,
 )
@@ -19,26 +19,24 @@ class SampleCommandHandler(CommandHandler[SampleCommand, int]):
         self,
         session_factory: SessionFactory,
         repository_factory: RepositoryFactory[SampleRepositoryProtocol],
-        publisher_factory: PublisherFactory,
+        outbox_factory: OutboxFactory,
     ) -> None:
         self._session_factory = session_factory
         self._repository_factory = repository_factory
-        self._publisher_factory = publisher_factory
+        self._outbox_factory = outbox_factory
 
     async def __call__(self, command: SampleCommand) -> int:
         async with self._session_factory() as session:
             repository = self._repository_factory(session)
             result = await repository.get_sample_number(command.number)  # noqa: WPS110
-            await session.commit()
-
-        async with self._publisher_factory() as publisher:
-            await publisher.publish(
+            await self._outbox_factory(session).publish(
                 SampleNumberRequestedEvent(
                     input_number=command.number,
                     result=result,
                 ),
                 namespace="sample",
             )
+            await session.commit()
 
         return result
 
@@ -4,3 +4,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent.parent
 """Base directory of the project."""
 APP_DIR = BASE_DIR / "app"
 """App directory."""
+DATA_DIR = BASE_DIR / "data"
+"""Directory of the files written by the application."""
+KEY_SEPARATOR = ":"
+"""Separator of the parts of Redis keys and stream names."""
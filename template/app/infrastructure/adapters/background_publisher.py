@@ -0,0 +1,313 @@
+"""Publishing of events from a per-process task, off the request path."""
+
+import asyncio
+import base64
+import logging
+import os
+from collections.abc import AsyncIterator, Iterable
+from contextlib import AbstractAsyncContextManager, asynccontextmanager, suppress
+from datetime import datetime, timedelta
+from enum import StrEnum
+from pathlib import Path
+from uuid import uuid4
+
+from app.application.common.event import Event
+from app.application.common.interfaces import Priority, Publisher, PublisherFactory
+from app.infrastructure.adapters.claim_check import ClaimCheck
+from app.infrastructure.adapters.partitions import StreamPartitions
+from app.infrastructure.adapters.publisher import PublishBatcher, caller_path
+from app.infrastructure.adapters.scheduler import DelayedDelivery, delivery_time
+from app.infrastructure.observability.metrics import (
+    publisher_dropped_events,
+    publisher_spilled_events,
+)
+
+logger = logging.getLogger(__name__)
+
+QueuedMessage = tuple[bytes, str]
+"""Encoded message and its stream."""
+
+
+class OverflowPolicy(StrEnum):
+    BLOCK = "block"
+    """Wait for room in the queue, slowing down the publishing requests."""
+    DROP = "drop"
+    """Discard the event."""
+    SPILL = "spill"
+    """Append the event to a local file, sent once Redis keeps up again."""
+
+
+class SpillFile:
+    """Append-only file of messages that could not be queued or sent.
+
+    Every process writes to its own file in `directory`. Files of processes
+    that are no longer running are picked up by the next process replaying.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.path = directory / f"{os.getpid()}.spill"
+
+    def write(self, messages: Iterable[QueuedMessage]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as spill:
+            spill.writelines(
+                self._encode(payload, stream) for payload, stream in messages
+            )
+
+    def claim(self) -> list[QueuedMessage]:
+        """Read and remove the files of this process and of stopped ones.
+
+        A file is renamed to a name of this process before it is read, so it
+        is read by one process only, and a process reusing the PID of a
+        stopped one appends to a new file. Renamed files of a process that
+        stopped while claiming are claimed again.
+        """
+        if not self.directory.is_dir():
+            return []
+        messages: list[QueuedMessage] = []
+        for path in self.directory.iterdir():
+            if not self._claimable(path):
+                continue
+            claimed = self._claimed(path)
+            try:
+                path.rename(claimed)
+            except FileNotFoundError:
+                continue  # Claimed by another process.
+            messages.extend(self._read(claimed))
+            claimed.unlink()
+        return messages
+
+    def _claimed(self, path: Path) -> Path:
+        owner = path.name.partition(".")[0]
+        return path.with_name(f"{owner}.{os.getpid()}.{uuid4().hex}.claimed")
+
+    def _claimable(self, path: Path) -> bool:
+        if path.suffix == ".spill":
+            return path == self.path or not _is_running(path.stem)
+        if path.suffix == ".claimed":
+            claimer = path.name.split(".")[1]
+            return claimer == str(os.getpid()) or not _is_running(claimer)
+        return False
+
+    def _encode(self, payload: bytes, stream: str) -> str:
+        encoded = base64.b64encode(payload).decode()
+        return f"{stream}\t{encoded}\n"
+
+    def _read(self, path: Path) -> list[QueuedMessage]:
+        messages: list[QueuedMessage] = []
+        with path.open(encoding="utf-8") as spill:
+            for line in spill:
+                stream, _, payload = line.rstrip("\n").partition("\t")
+                messages.append((base64.b64decode(payload), stream))
+        return messages
+
+
+class BackgroundPublisher:  # noqa: WPS214 queue, send and spill steps
+    """Bounded queue of encoded messages drained by a per-process task.
+
+    Publishing returns once the message is queued, so requests do not wait on
+    Redis. The task sends the queued messages through a `PublishBatcher`.
+    When the queue is full, `overflow` decides what happens to new messages.
+    Messages that fail to send are spilled to disk with the `SPILL` policy and
+    logged and counted as dropped otherwise. Spill files are written and read
+    in a thread, off the event loop.
+    """
+
+    def __init__(
+        self,
+        batcher: PublishBatcher,
+        max_size: int = 10000,
+        overflow: OverflowPolicy = OverflowPolicy.BLOCK,
+        spill: SpillFile | None = None,
+    ) -> None:
+        """Initialize BackgroundPublisher.
+
+        Args:
+            batcher: Batcher sending the messages to Redis.
+            max_size: Number of messages the queue holds.
+            overflow: What to do with messages when the queue is full.
+            spill: File for the `SPILL` policy.
+        """
+        if overflow == OverflowPolicy.SPILL and spill is None:
+            msg = "The spill overflow policy requires a spill file"
+            raise ValueError(msg)
+        self.batcher = batcher
+        self.overflow = overflow
+        self.spill = spill
+        self._queue: asyncio.Queue[QueuedMessage] = asyncio.Queue(max_size)
+        self._task: asyncio.Task[None] | None = None
+        # Spill files of stopped processes are replayed after the first batch.
+        self._replay = spill is not None
+        self._overflowing = False
+
+    async def put(self, payload: bytes, stream: str) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._drain())
+        if self.overflow == OverflowPolicy.BLOCK:
+            await self._queue.put((payload, stream))
+            return
+        try:
+            self._queue.put_nowait((payload, stream))
+        except asyncio.QueueFull:
+            await self._overflow([(payload, stream)])
+
+    async def close(self) -> None:
+        """Send the queued messages and stop the task."""
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def _drain(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batcher.max_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            self._overflowing = False
+            try:
+                await self._publish(batch)
+            except Exception:
+                # The task keeps draining, `close` and blocked `put` calls
+                # would wait forever otherwise.
+                logger.exception("Failed to publish %d events", len(batch))
+            for _ in batch:
+                self._queue.task_done()
+
+    async def _publish(self, batch: list[QueuedMessage]) -> None:
+        """Send a batch, then the spilled messages once the queue is empty."""
+        sent = await self._send(batch)
+        if not sent or not self._replay or not self._queue.empty():
+            return
+        try:
+            spilled = await asyncio.to_thread(self.spill.claim)  # type: ignore[union-attr]
+        except OSError:
+            logger.exception("Failed to read the spilled events, retried later")
+            return
+        self._replay = False
+        await self._send(spilled)
+
+    async def _send(self, batch: list[QueuedMessage]) -> bool:
+        if not batch:
+            return True
+        replies = await asyncio.gather(
+            *(self.batcher.add(*message) for message in batch),
+            return_exceptions=True,
+        )
+        failed = [
+            message
+            for message, reply in zip(batch, replies, strict=True)
+            if isinstance(reply, Exception)
+        ]
+        if not failed:
+            return True
+        logger.error(
+            "Failed to publish %d of %d events",
+            len(failed),
+            len(batch),
+            exc_info=next(reply for reply in replies if isinstance(reply, Exception)),
+        )
+        if self.spill is None:
+            publisher_dropped_events.inc(len(failed))
+        else:
+            await self._write_spill(failed)
+        return False
+
+    async def _overflow(self, messages: list[QueuedMessage]) -> None:
+        if not self._overflowing:
+            self._overflowing = True
+            logger.warning(
+                "Publisher queue is full, overflow policy: %s", self.overflow
+            )
+        if self.overflow == OverflowPolicy.SPILL:
+            await self._write_spill(messages)
+        else:
+            publisher_dropped_events.inc(len(messages))
+
+    async def _write_spill(self, messages: list[QueuedMessage]) -> None:
+        try:
+            await asyncio.to_thread(self.spill.write, messages)  # type: ignore[union-attr]
+        except OSError:
+            publisher_dropped_events.inc(len(messages))
+            logger.exception("Failed to spill %d events, dropped", len(messages))
+            return
+        publisher_spilled_events.inc(len(messages))
+        self._replay = True
+
+
+class BackgroundEventPublisher(Publisher):
+    """Publisher that queues events in a `BackgroundPublisher`.
+
+    Delayed events are scheduled directly.
+    """
+
+    def __init__(
+        self,
+        background: BackgroundPublisher,
+        partitions: StreamPartitions,
+        scheduler: DelayedDelivery,
+        claim_check: ClaimCheck,
+    ) -> None:
+        self._background = background
+        self._partitions = partitions
+        self._scheduler = scheduler
+        self._claim_check = claim_check
+
+    async def publish(  # noqa: PLR0913, WPS211 options of the delivery
+        self,
+        event: Event,
+        namespace: str,
+        key: str | None = None,
+        *,
+        deliver_at: datetime | timedelta | None = None,
+        priority: Priority = Priority.NORMAL,
+    ) -> None:
+        stream = self._partitions.stream(namespace, key, priority)
+        codec = self._background.batcher.codec
+        payload = await self._claim_check.offload(codec.encode(event, caller_path()))
+        at = delivery_time(deliver_at)
+        if at is not None:
+            await self._scheduler.schedule(payload, stream, codec.headers, at)
+            return
+        await self._background.put(payload, stream)
+
+
+class BackgroundEventPublisherFactory(PublisherFactory):
+    """Factory of BackgroundEventPublisher instances."""
+
+    def __init__(
+        self,
+        background: BackgroundPublisher,
+        partitions: StreamPartitions,
+        scheduler: DelayedDelivery,
+        claim_check: ClaimCheck,
+    ) -> None:
+        self._background = background
+        self._partitions = partitions
+        self._scheduler = scheduler
+        self._claim_check = claim_check
+
+    def __call__(self) -> AbstractAsyncContextManager[Publisher]:
+        @asynccontextmanager
+        async def factory() -> AsyncIterator[Publisher]:
+            yield BackgroundEventPublisher(
+                self._background,
+                self._partitions,
+                self._scheduler,
+                self._claim_check,
+            )
+
+        return factory()
+
+
+def _is_running(pid: str) -> bool:
+    try:
+        os.kill(int(pid), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,140 @@
+"""Claim check: large event payloads stored aside, streams carry a reference."""
+
+import asyncio
+import json
+import logging
+import time
+from collections.abc import Mapping
+from contextlib import suppress
+from pathlib import Path
+from typing import Any, Protocol, TypeGuard, cast
+from uuid import uuid4
+
+import msgpack
+
+from app.infrastructure.adapters.codec import EnvelopeCodec, MessageFormat
+from app.infrastructure.observability.metrics import claim_check_offloaded_events
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_KEY = "claim_check"
+"""Only field of the message replacing an offloaded payload."""
+
+
+class BlobStore(Protocol):
+    """Storage of offloaded payloads, shared by the publishers and the workers."""
+
+    async def put(self, key: str, blob: bytes) -> None: ...
+
+    async def get(self, key: str) -> bytes: ...
+
+    async def purge(self, before: float) -> int:
+        """Delete the blobs stored before the `before` timestamp, return how many."""
+        ...
+
+
+class FileBlobStore(BlobStore):
+    """Blobs as files of a directory, shared by the processes of a host or a volume."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+
+    async def put(self, key: str, blob: bytes) -> None:
+        await asyncio.to_thread(self._write, key, blob)
+
+    async def get(self, key: str) -> bytes:
+        return await asyncio.to_thread(self._path(key).read_bytes)
+
+    async def purge(self, before: float) -> int:
+        return await asyncio.to_thread(self._purge, before)
+
+    def _write(self, key: str, blob: bytes) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Readers never see a partial file.
+        partial = path.with_suffix(".partial")
+        partial.write_bytes(blob)
+        partial.replace(path)
+
+    def _purge(self, before: float) -> int:
+        purged = 0
+        for path in self.directory.glob("*/*"):
+            with suppress(FileNotFoundError):
+                if path.stat().st_mtime < before:
+                    path.unlink()
+                    purged += 1
+        return purged
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+
+class ClaimCheck:
+    """Store payloads larger than `threshold` bytes in a `BlobStore`.
+
+    The stream entry of an offloaded event is a message with a single
+    `claim_check` field, the key of its payload, in the format of the codec.
+    Workers load the payload back before the handler runs, see
+    `ClaimCheckMiddleware`. Blobs are deleted `ttl` seconds after they are
+    stored, so `ttl` outlives the retention of the streams.
+
+    The store must be reachable by every publisher and worker: with
+    `FileBlobStore`, keep the threshold at `0` unless its directory is a
+    volume shared by all of them.
+    """
+
+    def __init__(
+        self,
+        store: BlobStore,
+        codec: EnvelopeCodec,
+        threshold: int = 0,
+        ttl: float = 604800,
+    ) -> None:
+        """Initialize ClaimCheck.
+
+        Args:
+            store: Storage of the offloaded payloads.
+            codec: Codec of the references, the one of the payloads.
+            threshold: Size of the payloads offloaded, `0` never offloads.
+            ttl: Seconds blobs are kept.
+        """
+        self.store = store
+        self.codec = codec
+        self.threshold = threshold
+        self.ttl = ttl
+
+    async def offload(self, payload: bytes) -> bytes:
+        """Return the payload, or a reference to it once stored if it is large."""
+        if not self.threshold or len(payload) <= self.threshold:
+            return payload
+        key = uuid4().hex
+        await self.store.put(key, payload)
+        claim_check_offloaded_events.inc()
+        reference = {REFERENCE_KEY: key}
+        if self.codec.message_format == MessageFormat.MSGPACK:
+            return cast("bytes", msgpack.packb(reference))
+        return json.dumps(reference).encode()
+
+    async def load(self, body: Any, content_type: str | None) -> Any:
+        """Return the decoded payload of a reference, other bodies as they are."""
+        if not is_reference(body):
+            return body
+        blob = await self.store.get(body[REFERENCE_KEY])
+        if content_type == MessageFormat.MSGPACK:
+            return msgpack.unpackb(blob)
+        return json.loads(blob)
+
+    async def run(self, interval: float = 3600) -> None:
+        """Delete expired blobs every `interval` seconds until cancelled."""
+        while True:
+            try:
+                purged = await self.store.purge(time.time() - self.ttl)
+            except Exception:
+                logger.exception("Failed to purge claim check blobs")
+            else:
+                logger.debug("Purged %s claim check blobs", purged)
+            await asyncio.sleep(interval)
+
+
+def is_reference(body: Any) -> TypeGuard[Mapping[str, str]]:
+    return isinstance(body, Mapping) and body.keys() == {REFERENCE_KEY}
@@ -0,0 +1,108 @@
+"""Event envelope and its wire formats."""
+
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime
+from enum import StrEnum
+from typing import Any, TypedDict, cast
+from uuid import UUID, uuid4
+
+import msgpack
+from faststream.message import StreamMessage
+from faststream.types import DecodedMessage
+from pydantic import BaseModel, Field, TypeAdapter
+
+from app.application.common.event import Event
+
+SCHEMA_VERSION = 1
+"""Version of the envelope fields, bumped on incompatible changes."""
+
+type Serializer = tuple[str, TypeAdapter[Any]]
+"""Type name of an event class and the adapter of its envelope."""
+
+CONTENT_TYPE = "content-type"
+
+
+class MessageFormat(StrEnum):
+    JSON = "application/json"
+    MSGPACK = "application/msgpack"
+    """Compact binary format, smaller and faster to decode than JSON."""
+
+
+class Message[Payload: Event](BaseModel):
+    id: UUID = Field(default_factory=uuid4)
+    time: datetime = Field(default_factory=lambda: datetime.now(UTC))
+    type: str
+    source: str
+    data: Payload  # noqa: WPS110 generic name for generic use
+    version: int = SCHEMA_VERSION
+
+
+class _Envelope[Payload: Event](TypedDict):
+    """Fields of `Message`, serialized without building a model instance."""
+
+    id: UUID
+    time: datetime
+    type: str
+    source: str
+    data: Payload  # noqa: WPS110 generic name for generic use
+    version: int
+
+
+class EnvelopeCodec:
+    """Wrap events in a `Message` envelope and serialize it.
+
+    The type name and a serializer of every event class are resolved once, and
+    the envelope is a plain dict, so encoding an event skips model validation
+    and only runs the compiled pydantic serializer.
+    """
+
+    def __init__(self, message_format: MessageFormat = MessageFormat.JSON) -> None:
+        self.message_format = message_format
+        self.headers = {CONTENT_TYPE: message_format.value}
+        self._serializers: dict[type[Event], Serializer] = {}
+
+    def encode(self, event: Event, source: str) -> bytes:
+        event_type = type(event)
+        serializer = self._serializers.get(event_type)
+        if serializer is None:
+            serializer = (
+                type_name(event_type),
+                TypeAdapter(_Envelope[event_type]),  # type: ignore[valid-type]
+            )
+            self._serializers[event_type] = serializer
+        event_name, adapter = serializer
+        envelope: _Envelope[Event] = {
+            "id": uuid4(),
+            "time": datetime.now(UTC),
+            "type": event_name,
+            "source": source,
+            "data": event,
+            "version": SCHEMA_VERSION,
+        }
+        if self.message_format == MessageFormat.MSGPACK:
+            return cast(
+                "bytes", msgpack.packb(adapter.dump_python(envelope, mode="json"))
+            )
+        return adapter.dump_json(envelope)
+
+
+async def decode_message(
+    message: StreamMessage[Any],
+    original_decoder: Callable[[StreamMessage[Any]], Awaitable[DecodedMessage]],
+) -> DecodedMessage:
+    """Decode msgpack messages, leaving other formats to FastStream."""
+    if message.content_type == MessageFormat.MSGPACK:
+        return cast("DecodedMessage", msgpack.unpackb(message.body))
+    return await original_decoder(message)
+
+
+def type_name(class_or_instance: Any) -> str:
+    """Dotted path of a class, the `Message.type` of its events."""
+    class_type = (
+        class_or_instance
+        if isinstance(class_or_instance, type)
+        else type(class_or_instance)
+    )
+    module = class_type.__module__
+    qualname = class_type.__qualname__
+    return qualname if module in (None, "__builtin__") else f"{module}.{qualname}"
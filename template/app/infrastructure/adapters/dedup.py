@@ -0,0 +1,196 @@
+"""De-duplication of delivered messages by their id."""
+
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator, Iterable
+from contextlib import asynccontextmanager
+from enum import StrEnum
+
+from redis.asyncio import Redis
+
+from app.config.constants import KEY_SEPARATOR
+from app.infrastructure.observability.metrics import (
+    dedup_checks,
+    dedup_entries,
+    dedup_memory_bytes,
+)
+
+logger = logging.getLogger(__name__)
+
+DONE = "done"
+
+# Claims an id unless it is done, or in flight until a later time, in one of
+# the two buckets. KEYS: current and previous bucket. ARGV: id, now and lease
+# deadline in milliseconds, bucket TTL in seconds.
+CLAIM_SCRIPT = """
+for _, key in ipairs(KEYS) do
+    local state = redis.call("HGET", key, ARGV[1])
+    if state == "done" then
+        return 1
+    end
+    if state and tonumber(state) > tonumber(ARGV[2]) then
+        return 2
+    end
+end
+redis.call("HSET", KEYS[1], ARGV[1], ARGV[3])
+redis.call("EXPIRE", KEYS[1], ARGV[4])
+return 0
+"""
+
+
+class Claim(StrEnum):
+    NEW = "new"
+    """Not handled yet, the caller handles the message."""
+    DUPLICATE = "duplicate"
+    """Already handled."""
+    IN_FLIGHT = "in_flight"
+    """Being handled by another consumer, or by one that stopped."""
+
+
+CLAIMS = (Claim.NEW, Claim.DUPLICATE, Claim.IN_FLIGHT)
+
+
+class MessageDeduplicator:  # noqa: WPS214 claim, handling and metrics steps
+    """Remember handled message ids per consumer group for at least `window` seconds.
+
+    Ids are fields of two hashes per group, the bucket of the current window
+    and the previous one, so memory is bounded by the ids of two windows and
+    an id is forgotten when its bucket expires. An id is claimed for `lease`
+    seconds before handling and marked done after it, so a message handled
+    concurrently or by a stopped consumer is neither skipped nor handled twice
+    at once.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        window: float = 86400,
+        lease: float = 60,
+        prefix: str = "dedup",
+    ) -> None:
+        """Initialize MessageDeduplicator.
+
+        Args:
+            redis: Redis client storing the ids.
+            window: Seconds ids are remembered at least, twice that at most.
+            lease: Seconds a claimed message has to be handled before it can be
+                claimed again.
+            prefix: Prefix of the Redis keys.
+        """
+        self.redis = redis
+        self.window = window
+        self.lease = lease
+        self.prefix = prefix
+        self._claim = redis.register_script(CLAIM_SCRIPT)
+        self._groups: set[str] = set()
+
+    async def claim(self, group: str, message_id: str) -> Claim:
+        now = time.time()
+        reply = await self._claim(
+            keys=list(_buckets(self.prefix, group, self.window, now)),
+            args=[
+                message_id,
+                int(now * 1000),
+                int((now + self.lease) * 1000),
+                int(self.window * 2),
+            ],
+        )
+        claim = CLAIMS[int(reply)]
+        dedup_checks.labels(result=claim).inc()
+        self._groups.add(group)
+        return claim
+
+    @asynccontextmanager
+    async def handling(self, group: str, message_id: str) -> AsyncIterator[Claim]:
+        """Claim a message while the block handles it, unless the claim is not new.
+
+        The message is done once the block exits, or released when it raises,
+        so it is handled again when redelivered.
+        """
+        claim = await self.claim(group, message_id)
+        if claim != Claim.NEW:
+            yield claim
+            return
+        try:
+            yield claim
+        except BaseException:
+            await self._release(group, message_id)
+            raise
+        await self._complete(group, message_id)
+
+    @asynccontextmanager
+    async def handling_batch(
+        self, group: str, message_ids: Iterable[str]
+    ) -> AsyncIterator[dict[str, Claim]]:
+        """Claim the messages of a batch while the block handles it, see `handling`.
+
+        The new messages are done once the block exits, or released when it
+        raises.
+        """
+        unique = list(dict.fromkeys(message_ids))
+        claims = dict(
+            zip(
+                unique,
+                await asyncio.gather(
+                    *(self.claim(group, message_id) for message_id in unique)
+                ),
+                strict=True,
+            )
+        )
+        new = [message_id for message_id in unique if claims[message_id] == Claim.NEW]
+        try:
+            yield claims
+        except BaseException:
+            await asyncio.gather(
+                *(self._release(group, message_id) for message_id in new)
+            )
+            raise
+        await asyncio.gather(*(self._complete(group, message_id) for message_id in new))
+
+    async def run(self, interval: float = 60) -> None:
+        """Update the size metrics every `interval` seconds until cancelled."""
+        while True:
+            try:
+                await self.report()
+            except Exception:
+                logger.exception("Failed to measure de-duplication ids")
+            await asyncio.sleep(interval)
+
+    async def report(self) -> None:
+        now = time.time()
+        keys = [
+            key
+            for group in self._groups
+            for key in _buckets(self.prefix, group, self.window, now)
+        ]
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.hlen(key)
+                pipe.memory_usage(key)
+            replies = await pipe.execute()
+        dedup_entries.set(sum(replies[::2]))
+        dedup_memory_bytes.set(sum(filter(None, replies[1::2])))
+
+    async def _complete(self, group: str, message_id: str) -> None:
+        current, _ = _buckets(self.prefix, group, self.window, time.time())
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hset(current, message_id, DONE)
+            pipe.expire(current, int(self.window * 2))
+            await pipe.execute()
+
+    async def _release(self, group: str, message_id: str) -> None:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key in _buckets(self.prefix, group, self.window, time.time()):
+                pipe.hdel(key, message_id)
+            await pipe.execute()
+
+
+def _buckets(prefix: str, group: str, window: float, now: float) -> tuple[str, str]:
+    """Keys of the current and previous buckets of a group."""
+    current = int(now // window)
+    previous = current - 1
+    return (
+        KEY_SEPARATOR.join((prefix, group, str(current))),
+        KEY_SEPARATOR.join((prefix, group, str(previous))),
+    )
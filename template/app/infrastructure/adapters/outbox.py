@@ -0,0 +1,183 @@
+"""Transactional outbox: events stored with the command data, relayed to streams."""
+
+import asyncio
+import logging
+from collections.abc import Sequence
+from datetime import UTC, datetime, timedelta
+from typing import Any, cast
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.application.common.event import Event
+from app.application.common.interfaces import (
+    DBSession,
+    OutboxFactory,
+    Priority,
+    Publisher,
+)
+from app.infrastructure.adapters.claim_check import ClaimCheck
+from app.infrastructure.adapters.codec import EnvelopeCodec
+from app.infrastructure.adapters.partitions import StreamPartitions
+from app.infrastructure.adapters.publisher import caller_path
+from app.infrastructure.adapters.scheduler import DelayedDelivery, delivery_time
+from app.infrastructure.adapters.streams import StreamWriter
+from app.infrastructure.database.tables import OutboxMessage
+from app.infrastructure.observability.metrics import outbox_relayed_events
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxPublisher(Publisher):
+    """Publisher adding events to the outbox table within the session transaction."""
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        codec: EnvelopeCodec,
+        partitions: StreamPartitions,
+        claim_check: ClaimCheck,
+    ) -> None:
+        self._session = session
+        self._codec = codec
+        self._partitions = partitions
+        self._claim_check = claim_check
+
+    async def publish(  # noqa: PLR0913, WPS211 options of the delivery
+        self,
+        event: Event,
+        namespace: str,
+        key: str | None = None,
+        *,
+        deliver_at: datetime | timedelta | None = None,
+        priority: Priority = Priority.NORMAL,
+    ) -> None:
+        at = delivery_time(deliver_at)
+        payload = await self._claim_check.offload(
+            self._codec.encode(event, caller_path()),
+        )
+        self._session.add(
+            OutboxMessage(
+                stream=self._partitions.stream(namespace, key, priority),
+                payload=payload,
+                content_type=self._codec.message_format.value,
+                deliver_at=None if at is None else datetime.fromtimestamp(at, UTC),
+            ),
+        )
+
+
+class OutboxPublisherFactory(OutboxFactory):
+    def __init__(
+        self,
+        codec: EnvelopeCodec,
+        partitions: StreamPartitions,
+        claim_check: ClaimCheck,
+    ) -> None:
+        self._codec = codec
+        self._partitions = partitions
+        self._claim_check = claim_check
+
+    def __call__(self, session: DBSession) -> Publisher:
+        return OutboxPublisher(
+            cast("AsyncSession", session),
+            self._codec,
+            self._partitions,
+            self._claim_check,
+        )
+
+
+class OutboxRelay:
+    """Move outbox events to Redis Streams in batches.
+
+    Each batch is locked with ``FOR UPDATE SKIP LOCKED``, so several relays
+    share the table without sending an event twice, sent as one pipeline and
+    deleted in the same transaction. An event is sent again if the relay stops
+    between the pipeline and the commit, so delivery is at least once. Delayed
+    events are scheduled in the same pipeline.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        writer: StreamWriter,
+        scheduler: DelayedDelivery,
+        batch_size: int = 1000,
+        poll_interval: float = 1,
+    ) -> None:
+        """Initialize OutboxRelay.
+
+        Args:
+            session_factory: Factory of database sessions.
+            writer: Writer of the streams, connected.
+            scheduler: Delayed delivery of the events with a delivery time.
+            batch_size: Number of events sent at once.
+            poll_interval: Seconds to wait when the outbox is drained.
+        """
+        self.session_factory = session_factory
+        self.writer = writer
+        self.scheduler = scheduler
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+
+    async def run(self) -> None:
+        """Relay events until cancelled."""
+        while True:
+            try:
+                relayed = await self.relay_batch()
+            except Exception:
+                logger.exception("Failed to relay outbox events")
+                relayed = 0
+            if relayed < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    async def relay_batch(self) -> int:
+        """Send a batch of the oldest events, return the number of sent events."""
+        async with self.session_factory() as session, session.begin():
+            rows = (
+                await session.execute(
+                    sa.select(
+                        OutboxMessage.id,
+                        OutboxMessage.stream,
+                        OutboxMessage.payload,
+                        OutboxMessage.content_type,
+                        OutboxMessage.deliver_at,
+                    )
+                    .order_by(OutboxMessage.created_at)
+                    .limit(self.batch_size)
+                    .with_for_update(skip_locked=True),
+                )
+            ).all()
+            if not rows:
+                return 0
+            await self._send(rows)
+            await session.execute(
+                sa.delete(OutboxMessage).where(
+                    OutboxMessage.id.in_([sent.id for sent in rows]),
+                ),
+            )
+        outbox_relayed_events.inc(len(rows))
+        return len(rows)
+
+    async def _send(self, rows: Sequence[Any]) -> None:
+        """Send the selected outbox rows as one pipeline."""
+        redis = await self.writer.broker.connect()
+        async with redis.pipeline(transaction=False) as pipe:
+            for row in rows:
+                headers = {"content-type": row.content_type}
+                # Only queued in the pipeline, sent by `execute`.
+                if row.deliver_at is None:
+                    await self.writer.add(  # noqa: WPS476
+                        row.payload,
+                        row.stream,
+                        headers,
+                        pipeline=pipe,
+                    )
+                else:
+                    await self.scheduler.schedule(  # noqa: WPS476
+                        row.payload,
+                        row.stream,
+                        headers,
+                        row.deliver_at.timestamp(),
+                        pipeline=pipe,
+                    )
+            await pipe.execute()
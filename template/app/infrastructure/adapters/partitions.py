@@ -0,0 +1,72 @@
+"""Streams of a namespace: partitions keeping the order of every key, or priorities."""
+
+import random
+import zlib
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+
+from app.application.common.interfaces import Priority
+from app.config.constants import KEY_SEPARATOR
+
+
+@dataclass(frozen=True, slots=True)
+class StreamPartitions:
+    partitions: Mapping[str, int] = field(default_factory=dict)
+    """Number of partitions by namespace, other namespaces are one stream."""
+
+    def count(self, namespace: str) -> int:
+        return self.partitions.get(namespace, 1)
+
+    def stream(
+        self,
+        namespace: str,
+        key: str | None = None,
+        priority: Priority = Priority.NORMAL,
+    ) -> str:
+        """Stream of an event, the same for every event with the same key.
+
+        Events without a key go to a random partition. The priority selects
+        the stream of namespaces that are not partitioned.
+        """
+        count = self.count(namespace)
+        if count <= 1:
+            return priority_stream(namespace, priority)
+        if key is None:
+            return partition_stream(namespace, random.randrange(count))  # noqa: S311 not security related
+        return partition_stream(namespace, zlib.crc32(key.encode()) % count)
+
+    def streams(self, namespace: str) -> list[str]:
+        count = self.count(namespace)
+        if count <= 1:
+            return [namespace]
+        return [partition_stream(namespace, partition) for partition in range(count)]
+
+    def stored_streams(self, namespace: str) -> list[str]:
+        """Every stream events of the namespace are stored in, priorities included."""
+        if self.count(namespace) > 1:
+            return self.streams(namespace)
+        return [priority_stream(namespace, priority) for priority in Priority]
+
+
+def partition_stream(namespace: str, partition: int) -> str:
+    return f"{namespace}{KEY_SEPARATOR}{partition}"
+
+
+def priority_stream(namespace: str, priority: Priority) -> str:
+    """Stream of a priority, normal priority events go to the namespace stream."""
+    if priority == Priority.NORMAL:
+        return namespace
+    return f"{namespace}{KEY_SEPARATOR}{priority}"
+
+
+def namespace_of(stream: str) -> str:
+    """Namespace of a partition or priority stream, or the stream itself."""
+    namespace, separator, suffix = stream.rpartition(KEY_SEPARATOR)
+    if separator and (suffix.isdigit() or suffix in Priority):
+        return namespace
+    return stream
+
+
+def priority_of(stream: str) -> Priority:
+    _, separator, suffix = stream.rpartition(KEY_SEPARATOR)
+    return Priority(suffix) if separator and suffix in Priority else Priority.NORMAL
@@ -1,64 +1,289 @@
 """Redis Streams implementation of the Publisher protocol using FastStream."""
 
+import asyncio
 import inspect
 from collections.abc import AsyncIterator
 from contextlib import AbstractAsyncContextManager, asynccontextmanager
-from datetime import UTC, datetime
-from typing import Any
-from uuid import UUID, uuid4
-
-from faststream.redis import RedisBroker
-from pydantic import BaseModel, Field
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from types import CodeType
 
 from app.application.common.event import Event
-from app.application.common.interfaces import Publisher, PublisherFactory
+from app.application.common.interfaces import Priority, Publisher, PublisherFactory
+from app.infrastructure.adapters.claim_check import ClaimCheck
+from app.infrastructure.adapters.codec import EnvelopeCodec
+from app.infrastructure.adapters.partitions import StreamPartitions
+from app.infrastructure.adapters.scheduler import DelayedDelivery, delivery_time
+from app.infrastructure.adapters.streams import StreamWriter
+
 
+@dataclass(slots=True)
+class PendingMessage:
+    payload: bytes
+    stream: str
+    future: asyncio.Future[None]
 
-class Message[Payload: Event](BaseModel):
-    id: UUID = Field(default_factory=uuid4)
-    time: datetime = Field(default_factory=lambda: datetime.now(UTC))
-    type: str
-    source: str
-    data: Payload  # noqa: WPS110 generic name for generic use
+    def resolve(self, reply: object) -> None:
+        """Hand the reply over to the publisher, an exception is raised to it."""
+        if self.future.done():  # the publisher was cancelled
+            return
+        if isinstance(reply, Exception):
+            self.future.set_exception(reply)
+        else:
+            self.future.set_result(None)
 
 
 class EventPublisher(Publisher):
     """Publisher implementation that uses Redis Streams via FastStream."""
 
-    def __init__(self, broker: RedisBroker) -> None:
-        self._broker = broker
+    def __init__(
+        self,
+        writer: StreamWriter,
+        codec: EnvelopeCodec,
+        partitions: StreamPartitions,
+        scheduler: DelayedDelivery,
+        claim_check: ClaimCheck,
+    ) -> None:
+        self._writer = writer
+        self._codec = codec
+        self._partitions = partitions
+        self._scheduler = scheduler
+        self._claim_check = claim_check
 
-    async def publish(self, event: Event, namespace: str) -> None:
-        message: Message[Event] = Message(
-            type=_get_full_path(type(event)),
-            source=_caller_path(),
-            data=event,
+    async def publish(  # noqa: PLR0913, WPS211 options of the delivery
+        self,
+        event: Event,
+        namespace: str,
+        key: str | None = None,
+        *,
+        deliver_at: datetime | timedelta | None = None,
+        priority: Priority = Priority.NORMAL,
+    ) -> None:
+        stream = self._partitions.stream(namespace, key, priority)
+        payload = await self._claim_check.offload(
+            self._codec.encode(event, caller_path()),
         )
-        await self._broker.publish(message=message, stream=namespace)
+        at = delivery_time(deliver_at)
+        if at is not None:
+            await self._scheduler.schedule(payload, stream, self._codec.headers, at)
+            return
+        await self._writer.add(payload, stream, self._codec.headers)
 
 
 class EventPublisherFactory(PublisherFactory):
     """Factory that creates EventPublisher instances within an async context."""
 
-    def __init__(self, broker: RedisBroker) -> None:
-        self._broker = broker
+    def __init__(
+        self,
+        writer: StreamWriter,
+        codec: EnvelopeCodec,
+        partitions: StreamPartitions,
+        scheduler: DelayedDelivery,
+        claim_check: ClaimCheck,
+    ) -> None:
+        self._writer = writer
+        self._codec = codec
+        self._partitions = partitions
+        self._scheduler = scheduler
+        self._claim_check = claim_check
+
+    def __call__(self) -> AbstractAsyncContextManager[Publisher]:
+        @asynccontextmanager
+        async def factory() -> AsyncIterator[Publisher]:
+            yield EventPublisher(
+                self._writer,
+                self._codec,
+                self._partitions,
+                self._scheduler,
+                self._claim_check,
+            )
+
+        return factory()
+
+
+class PublishBatcher:
+    """Send stream messages published close together as one Redis pipeline.
+
+    Messages are queued until `max_size` of them or `max_bytes` of payload are
+    collected, or `max_delay` seconds pass since the first one, and are then
+    sent with a single round trip. The batcher is shared by the process, so
+    messages of concurrent requests end up in the same pipeline.
+    """
+
+    def __init__(
+        self,
+        writer: StreamWriter,
+        codec: EnvelopeCodec,
+        max_size: int = 100,
+        max_bytes: int = 1048576,
+        max_delay: float = 0.005,
+    ) -> None:
+        """Initialize PublishBatcher.
+
+        Args:
+            writer: Writer of the streams, connected.
+            codec: Codec the queued payloads were encoded with.
+            max_size: Number of queued messages flushed immediately.
+            max_bytes: Size of queued payloads flushed immediately.
+            max_delay: Seconds to wait for more messages after the first queued
+                one. `0` flushes on the next event loop iteration.
+        """
+        self.writer = writer
+        self.codec = codec
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+        self._pending: list[PendingMessage] = []
+        self._pending_bytes = 0
+        self._flush_handle: asyncio.Handle | None = None
+        self._executing: set[asyncio.Task[None]] = set()
+
+    def add(self, payload: bytes, stream: str) -> asyncio.Future[None]:
+        """Queue an encoded message, the returned future is done once it is sent."""
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[None] = loop.create_future()
+        self._pending.append(PendingMessage(payload, stream, future))
+        self._pending_bytes += len(payload)
+        if len(self._pending) >= self.max_size or self._pending_bytes >= self.max_bytes:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = (
+                loop.call_later(self.max_delay, self._flush)
+                if self.max_delay
+                else loop.call_soon(self._flush)
+            )
+        return future
+
+    async def close(self) -> None:
+        """Send the queued messages and wait for the batches in flight."""
+        self._flush()
+        if self._executing:
+            await asyncio.wait(self._executing)
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch = self._pending
+        self._pending = []
+        self._pending_bytes = 0
+        if not batch:
+            return
+        task = asyncio.create_task(self._execute(batch))
+        self._executing.add(task)
+        task.add_done_callback(self._executing.discard)
+
+    async def _execute(self, batch: list[PendingMessage]) -> None:
+        try:
+            replies = await self._send(batch)
+        except Exception as exc:  # noqa: BLE001 handed over to the publishers
+            for message in batch:
+                message.resolve(exc)
+            return
+        for message, reply in zip(batch, replies, strict=True):
+            message.resolve(reply)
+
+    async def _send(self, batch: list[PendingMessage]) -> list[object]:
+        redis = await self.writer.broker.connect()
+        async with redis.pipeline(transaction=False) as pipe:
+            for message in batch:
+                # Only queued in the pipeline, sent by `execute`.
+                await self.writer.add(  # noqa: WPS476
+                    message.payload,
+                    message.stream,
+                    self.codec.headers,
+                    pipeline=pipe,
+                )
+            replies: list[object] = await pipe.execute(raise_on_error=False)
+        return replies
+
+
+class BatchedEventPublisher(Publisher):
+    """Publisher that queues events in a `PublishBatcher`.
+
+    `publish` returns as soon as the event is queued, `flush` waits until all
+    events of this publisher are sent. Delayed events are scheduled directly.
+    """
+
+    def __init__(
+        self,
+        batcher: PublishBatcher,
+        partitions: StreamPartitions,
+        scheduler: DelayedDelivery,
+        claim_check: ClaimCheck,
+    ) -> None:
+        self._batcher = batcher
+        self._partitions = partitions
+        self._scheduler = scheduler
+        self._claim_check = claim_check
+        self._sent: list[asyncio.Future[None]] = []
+
+    async def publish(  # noqa: PLR0913, WPS211 options of the delivery
+        self,
+        event: Event,
+        namespace: str,
+        key: str | None = None,
+        *,
+        deliver_at: datetime | timedelta | None = None,
+        priority: Priority = Priority.NORMAL,
+    ) -> None:
+        stream = self._partitions.stream(namespace, key, priority)
+        payload = await self._claim_check.offload(
+            self._batcher.codec.encode(event, caller_path()),
+        )
+        at = delivery_time(deliver_at)
+        if at is not None:
+            headers = self._batcher.codec.headers
+            await self._scheduler.schedule(payload, stream, headers, at)
+            return
+        self._sent.append(self._batcher.add(payload, stream))
+
+    async def flush(self) -> None:
+        sent = self._sent
+        self._sent = []
+        if sent:
+            await asyncio.gather(*sent)
+
+
+class BatchedEventPublisherFactory(PublisherFactory):
+    """Factory of BatchedEventPublisher instances.
+
+    Events published inside one `async with` block are sent together with the
+    events of concurrent blocks, and the block exits once they are all sent.
+    """
+
+    def __init__(
+        self,
+        batcher: PublishBatcher,
+        partitions: StreamPartitions,
+        scheduler: DelayedDelivery,
+        claim_check: ClaimCheck,
+    ) -> None:
+        self._batcher = batcher
+        self._partitions = partitions
+        self._scheduler = scheduler
+        self._claim_check = claim_check
 
     def __call__(self) -> AbstractAsyncContextManager[Publisher]:
         @asynccontextmanager
         async def factory() -> AsyncIterator[Publisher]:
-            yield EventPublisher(self._broker)
+            publisher = BatchedEventPublisher(
+                self._batcher,
+                self._partitions,
+                self._scheduler,
+                self._claim_check,
+            )
+            yield publisher
+            await publisher.flush()
 
         return factory()
 
 
-def _get_full_path(class_or_instance: Any) -> str:
-    class_type = class_or_instance if isinstance(class_or_instance, type) else type(class_or_instance)
-    module = class_type.__module__
-    qualname = class_type.__qualname__
-    return qualname if module in (None, "__builtin__") else f"{module}.{qualname}"
+_sources: dict[CodeType, str] = {}
 
 
-def _caller_path(skip: int = 1) -> str:
+def caller_path(skip: int = 1) -> str:
+    """Dotted path of the calling function, resolved once per code object."""
     frame = inspect.currentframe()
     for _ in range(skip + 1):
         if not frame:
@@ -68,20 +293,11 @@ def _caller_path(skip: int = 1) -> str:
     if not frame:
         return ""
 
-    parts = []
-    # Module/package
-    module = frame.f_globals.get("__name__", "")
-    if module:
-        parts.extend(module.split("."))
-
-    # Class detection
-    self_obj = frame.f_locals.get("self")
-    if self_obj is not None:
-        parts.append(self_obj.__class__.__name__)
-
-    # Function/method
-    func_name = frame.f_code.co_name
-    if func_name != "<module>":
-        parts.append(func_name)
-
-    return ".".join(parts)
+    code = frame.f_code
+    source = _sources.get(code)
+    if source is None:
+        module = frame.f_globals.get("__name__", "")
+        qualname = "" if code.co_name == "<module>" else code.co_qualname
+        source = ".".join(part for part in (module, qualname) if part)
+        _sources[code] = source
+    return source
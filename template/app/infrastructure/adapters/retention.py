@@ -0,0 +1,169 @@
+"""Retention of the event streams, keeping Redis memory bounded."""
+
+import asyncio
+import logging
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from itertools import batched
+from typing import Any
+
+from redis.asyncio import Redis
+
+from app.infrastructure.adapters.partitions import namespace_of
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STREAM = "*"
+"""Key of the policy applied to streams without their own one."""
+
+
+@dataclass(frozen=True, slots=True)
+class RetentionPolicy:
+    max_len: int | None = None
+    """Approximate number of entries kept, enforced on every publish.
+
+    A hard bound of the stream memory: entries not read by slow consumer
+    groups are trimmed too.
+    """
+    max_age: float | None = None
+    """Seconds entries are kept, enforced by `StreamTrimmer`.
+
+    Entries not yet read or acknowledged by a consumer group are kept.
+    """
+
+    def fallback(self, other: "RetentionPolicy") -> "RetentionPolicy":
+        """Limits of this policy, the ones it does not set from `other`."""
+        return RetentionPolicy(
+            max_len=other.max_len if self.max_len is None else self.max_len,
+            max_age=other.max_age if self.max_age is None else self.max_age,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class StreamRetention:
+    policies: Mapping[str, RetentionPolicy] = field(default_factory=dict)
+    """Policies by stream name, `*` applies to the other streams.
+
+    The policy of a namespace applies to its partitions.
+    """
+
+    def policy(self, stream: str) -> RetentionPolicy:
+        """Policy of `stream`, each limit falls back to its namespace, then `*`."""
+        policy = RetentionPolicy()
+        for name in (stream, namespace_of(stream), DEFAULT_STREAM):
+            policy = policy.fallback(self.policies.get(name, policy))
+        return policy
+
+    def max_len(self, stream: str) -> int | None:
+        return self.policy(stream).max_len
+
+
+@dataclass(frozen=True, slots=True)
+class StreamStats:
+    name: str
+    length: int
+    memory: int
+    """Approximate memory used by the stream in bytes."""
+    groups: int
+
+    @classmethod
+    def from_replies(cls, name: str, replies: tuple[Any, ...]) -> "StreamStats":
+        """Stats from the ``XLEN``, ``MEMORY USAGE`` and ``XINFO GROUPS`` replies."""
+        length, memory, groups = replies
+        return cls(
+            name=name,
+            length=length,
+            memory=memory or 0,
+            groups=len(groups),
+        )
+
+
+class StreamTrimmer:
+    """Periodically drop entries older than the stream `max_age`.
+
+    Streams are trimmed with ``XTRIM MINID ~``, never past the oldest entry
+    pending or not yet delivered in any consumer group of the stream.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        retention: StreamRetention,
+        interval: float = 60,
+    ) -> None:
+        self.redis = redis
+        self.retention = retention
+        self.interval = interval
+
+    async def run(self) -> None:
+        """Trim the streams every `interval` seconds until cancelled."""
+        while True:
+            try:
+                await self.trim_all()
+            except Exception:
+                logger.exception("Failed to trim streams")
+            await asyncio.sleep(self.interval)
+
+    async def trim_all(self) -> dict[str, int]:
+        """Trim every stream, return the number of removed entries by stream."""
+        streams = await self.streams()
+        removed = await asyncio.gather(*map(self.trim, streams))
+        return dict(zip(streams, removed, strict=True))
+
+    async def trim(self, stream: str) -> int:
+        max_age = self.retention.policy(stream).max_age
+        if max_age is None:
+            return 0
+        groups = await self.redis.xinfo_groups(stream)
+        unacked = await asyncio.gather(
+            *(self._first_unacked(stream, group) for group in groups),
+        )
+        cutoff_ms = int((time.time() - max_age) * 1000)
+        min_id = min([(cutoff_ms, 0), *unacked])
+        return int(
+            await self.redis.xtrim(
+                stream, minid="-".join(map(str, min_id)), approximate=True
+            ),
+        )
+
+    async def streams(self) -> list[str]:
+        return await scan_streams(self.redis)
+
+    async def report(self) -> list[StreamStats]:
+        streams = await self.streams()
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for name in streams:
+                pipe.xlen(name)
+                pipe.memory_usage(name)
+                pipe.xinfo_groups(name)
+            replies = await pipe.execute()
+        return list(
+            map(StreamStats.from_replies, streams, batched(replies, 3, strict=True)),
+        )
+
+    async def _first_unacked(
+        self,
+        stream: str,
+        group: Mapping[str, object],
+    ) -> tuple[int, int]:
+        if group["pending"]:
+            pending = await self.redis.xpending(stream, _decode(group["name"]))
+            return parse_stream_id(pending["min"])
+        last_ms, last_seq = parse_stream_id(group["last-delivered-id"])
+        return last_ms, last_seq + 1
+
+
+async def scan_streams(redis: Redis) -> list[str]:
+    """Names of the streams of the database, sorted."""
+    return sorted([_decode(key) async for key in redis.scan_iter(_type="stream")])
+
+
+def parse_stream_id(stream_id: object) -> tuple[int, int]:
+    """Milliseconds and sequence number of an entry id."""
+    ms, _, seq = _decode(stream_id).partition("-")
+    return int(ms), int(seq or 0)
+
+
+def _decode(raw: object) -> str:
+    return raw.decode() if isinstance(raw, bytes) else str(raw)
@@ -0,0 +1,178 @@
+"""Delayed delivery of events through a Redis sorted set."""
+
+import asyncio
+import logging
+import time
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+
+from faststream.message import gen_cor_id
+from faststream.redis import RedisBroker
+from faststream.redis.parser import BinaryMessageFormatV1
+from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+from redis.commands.core import AsyncScript
+
+from app.infrastructure.adapters.retention import StreamRetention
+
+logger = logging.getLogger(__name__)
+
+# Moves the due entries to their streams. Members are the stream name, its
+# max length and the encoded message, separated by new lines. KEYS: sorted
+# set, then the stream of each member. ARGV: members. A member already removed
+# by another worker is skipped, so every entry is moved once.
+PROMOTE_SCRIPT = r"""
+local moved = 0
+for index, member in ipairs(ARGV) do
+    if redis.call("ZREM", KEYS[1], member) == 1 then
+        local stream_end = string.find(member, "\n", 1, true)
+        local max_len_end = stream_end and string.find(member, "\n", stream_end + 1, true)
+        if max_len_end then
+            local max_len = tonumber(string.sub(member, stream_end + 1, max_len_end - 1)) or 0
+            local data = string.sub(member, max_len_end + 1)
+            if max_len > 0 then
+                redis.call("XADD", KEYS[index + 1], "MAXLEN", "~", max_len, "*", "__data__", data)
+            else
+                redis.call("XADD", KEYS[index + 1], "*", "__data__", data)
+            end
+            moved = moved + 1
+        end
+    end
+end
+return moved
+"""
+
+
+def delivery_time(deliver_at: datetime | timedelta | None = None) -> float | None:
+    """Timestamp an event is delivered at, `None` to deliver it now.
+
+    A `timedelta` delays the event from now.
+    """
+    if isinstance(deliver_at, timedelta):
+        return time.time() + deliver_at.total_seconds()
+    if deliver_at is not None:
+        return deliver_at.timestamp()
+    return None
+
+
+def _stream_of(member: bytes) -> str | None:
+    """Stream of a scheduled member, `None` when the member is malformed."""
+    stream, separator, rest = member.partition(b"\n")
+    if not separator or b"\n" not in rest:
+        return None
+    return stream.decode(errors="replace")
+
+
+class DelayedDelivery:
+    """Hold events in a sorted set scored by their delivery time.
+
+    Events are stored in the wire format of the broker, so `promote` moves
+    the due ones to their streams with a single script call, atomically:
+    concurrent workers promote every event once. Handlers retry with backoff
+    by publishing an event again with a delay, without holding the consumer.
+    """
+
+    def __init__(
+        self,
+        broker: RedisBroker,
+        retention: StreamRetention,
+        key: str = "scheduled",
+        batch_size: int = 1000,
+        poll_interval: float = 1,
+    ) -> None:
+        """Initialize DelayedDelivery.
+
+        Args:
+            broker: Redis broker of the streams.
+            retention: Retention applied to the streams on delivery.
+            key: Key of the sorted set, in the database of the broker.
+            batch_size: Number of events moved by a script call.
+            poll_interval: Maximum seconds between checks for due events.
+        """
+        self.broker = broker
+        self.retention = retention
+        self.key = key
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._promote: AsyncScript | None = None
+
+    async def schedule(
+        self,
+        payload: bytes,
+        stream: str,
+        headers: Mapping[str, str],
+        deliver_at: float,
+        pipeline: Pipeline | None = None,
+    ) -> None:
+        """Add an encoded event, sent to `stream` at the `deliver_at` timestamp."""
+        member = b"\n".join(
+            (
+                stream.encode(),
+                str(self.retention.max_len(stream) or 0).encode(),
+                BinaryMessageFormatV1.encode(
+                    message=payload,
+                    reply_to=None,
+                    headers=dict(headers),
+                    correlation_id=gen_cor_id(),
+                ),
+            ),
+        )
+        client = await self.broker.connect() if pipeline is None else pipeline
+        await client.zadd(self.key, {member: deliver_at})
+
+    async def promote(self) -> int:
+        """Move a batch of due events to their streams, return their number.
+
+        Malformed members are removed and logged, so they do not hold back
+        the events due after them.
+        """
+        redis = await self.broker.connect()
+        if self._promote is None:
+            self._promote = redis.register_script(PROMOTE_SCRIPT)
+        streams = await self._due_streams(redis)
+        if not streams:
+            return 0
+        moved = await self._promote(
+            keys=[self.key, *streams.values()],
+            args=list(streams),
+        )
+        return int(moved)
+
+    async def run(self) -> None:
+        """Promote due events until cancelled, sleeping until the next one is due."""
+        redis = await self.broker.connect()
+        while True:
+            try:
+                wait = await self._next_wait(redis)
+            except Exception:
+                logger.exception("Failed to deliver scheduled events")
+                wait = self.poll_interval
+            await asyncio.sleep(wait)
+
+    async def _next_wait(self, redis: Redis) -> float:
+        """Promote a batch, return the seconds until the next check."""
+        if await self.promote() >= self.batch_size:
+            return 0
+        upcoming = await redis.zrange(self.key, 0, 0, withscores=True)
+        if not upcoming:
+            return self.poll_interval
+        due_in: float = upcoming[0][1] - time.time()
+        return min(max(due_in, 0), self.poll_interval)
+
+    async def _due_streams(self, redis: Redis) -> dict[bytes, str]:
+        """Streams of a batch of due members, removing the malformed ones."""
+        due = await redis.zrangebyscore(
+            self.key,
+            "-inf",
+            time.time(),
+            start=0,
+            num=self.batch_size,
+        )
+        streams = {member: _stream_of(member) for member in due}
+        malformed = [member for member, stream in streams.items() if stream is None]
+        if malformed:
+            logger.error("Dropping %d malformed scheduled events", len(malformed))
+            await redis.zrem(self.key, *malformed)
+        return {
+            member: stream for member, stream in streams.items() if stream is not None
+        }
@@ -0,0 +1,122 @@
+"""Lag of the consumer groups of the event streams."""
+
+import asyncio
+import logging
+import time
+from contextlib import suppress
+from dataclasses import dataclass
+from typing import Any
+
+from redis.asyncio import Redis
+
+from app.infrastructure.adapters.retention import parse_stream_id, scan_streams
+from app.infrastructure.observability.metrics import (
+    stream_group_consumers,
+    stream_group_lag,
+    stream_group_oldest_pending_seconds,
+    stream_group_pending,
+)
+
+logger = logging.getLogger(__name__)
+
+GAUGES = (
+    stream_group_lag,
+    stream_group_pending,
+    stream_group_oldest_pending_seconds,
+    stream_group_consumers,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class GroupStats:
+    stream: str
+    group: str
+    consumers: int
+    lag: int | None
+    """Entries not delivered to the group yet, `None` when Redis cannot tell.
+
+    Redis reports it from version 7, and not after entries were deleted from
+    the middle of the stream.
+    """
+    pending: int
+    oldest_pending: float
+    """Seconds since the oldest pending entry was added, `0` without any."""
+    entries_read: int | None
+    """Entries delivered to the group since it was created, its throughput."""
+
+
+class StreamMonitor:
+    """Report the consumer groups of the streams as metrics.
+
+    Counts come from ``XINFO GROUPS``, and ``XPENDING`` in its summary form for
+    groups with pending entries, so a collection is a few commands per stream
+    whatever its length. Every worker process collects them every `interval`
+    seconds, the metrics keep the highest value of the live processes.
+    """
+
+    def __init__(self, redis: Redis, interval: float = 15) -> None:
+        self.redis = redis
+        self.interval = interval
+        self._reported: set[tuple[str, str]] = set()
+
+    async def run(self) -> None:
+        """Update the metrics every `interval` seconds until cancelled."""
+        while True:
+            try:
+                self.report(await self.collect())
+            except Exception:
+                logger.exception("Failed to collect the consumer group lag")
+            await asyncio.sleep(self.interval)
+
+    async def collect(self) -> list[GroupStats]:
+        streams = await scan_streams(self.redis)
+        groups = await asyncio.gather(*map(self.groups, streams))
+        return [stats for stream_groups in groups for stats in stream_groups]
+
+    async def groups(self, stream: str) -> list[GroupStats]:
+        groups = await self.redis.xinfo_groups(stream)
+        oldest_pending = await asyncio.gather(
+            *(self._oldest_pending(stream, group) for group in groups),
+        )
+        return [
+            GroupStats(
+                stream=stream,
+                group=_decode(group["name"]),
+                consumers=group["consumers"],
+                lag=group.get("lag"),
+                pending=group["pending"],
+                oldest_pending=age,
+                entries_read=group.get("entries-read"),
+            )
+            for group, age in zip(groups, oldest_pending, strict=True)
+        ]
+
+    def report(self, groups: list[GroupStats]) -> None:
+        reported = set()
+        for stats in groups:
+            labels = (stats.stream, stats.group)
+            reported.add(labels)
+            if stats.lag is not None:
+                stream_group_lag.labels(*labels).set(stats.lag)
+            stream_group_pending.labels(*labels).set(stats.pending)
+            stream_group_oldest_pending_seconds.labels(*labels).set(
+                stats.oldest_pending,
+            )
+            stream_group_consumers.labels(*labels).set(stats.consumers)
+        for labels in self._reported - reported:
+            for gauge in GAUGES:
+                with suppress(KeyError):
+                    gauge.remove(*labels)
+        self._reported = reported
+
+    async def _oldest_pending(self, stream: str, group: dict[str, Any]) -> float:
+        """Seconds since the oldest pending entry of a group was added."""
+        if not group["pending"]:
+            return 0
+        pending = await self.redis.xpending(stream, _decode(group["name"]))
+        oldest_ms, _ = parse_stream_id(pending["min"])
+        return max(time.time() - oldest_ms / 1000, 0)
+
+
+def _decode(raw: object) -> str:
+    return raw.decode() if isinstance(raw, bytes) else str(raw)
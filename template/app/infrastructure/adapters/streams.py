@@ -0,0 +1,32 @@
+"""Writing of encoded messages to the event streams."""
+
+from collections.abc import Mapping
+
+from faststream.redis import RedisBroker
+from redis.asyncio.client import Pipeline
+
+from app.infrastructure.adapters.retention import StreamRetention
+
+
+class StreamWriter:
+    """Add encoded messages to the streams, trimmed to their `max_len`."""
+
+    def __init__(self, broker: RedisBroker, retention: StreamRetention) -> None:
+        self.broker = broker
+        self.retention = retention
+
+    async def add(
+        self,
+        payload: bytes,
+        stream: str,
+        headers: Mapping[str, str],
+        pipeline: Pipeline | None = None,
+    ) -> None:
+        """Add a message to `stream`, or queue it in `pipeline` to send it later."""
+        await self.broker.publish(
+            payload,
+            stream=stream,
+            headers=dict(headers),
+            maxlen=self.retention.max_len(stream),
+            pipeline=pipeline,
+        )
@@ -6,6 +6,14 @@ class ApplicationConfigurator(CLIPluginProtocol):
     """Application configuration plugin."""
 
     def on_cli_init(self, cli: Group) -> None:
+        from app.presentation.cli.outbox import outbox_group
+        from app.presentation.cli.rate_limit import rate_limit_group
         from app.presentation.cli.shell import shell_cmd
+        from app.presentation.cli.streams import streams_group
+        from app.presentation.cli.worker import worker_group
 
         cli.add_command(shell_cmd)
+        cli.add_command(rate_limit_group)
+        cli.add_command(outbox_group)
+        cli.add_command(streams_group)
+        cli.add_command(worker_group)
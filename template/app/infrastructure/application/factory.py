@@ -12,7 +12,7 @@ from app.infrastructure.application.app_configs import (
     get_cors_config,
     get_csrf_config,
 )
-from app.infrastructure.application.middleware.rate_limit import RateLimitMiddleware
+from app.infrastructure.application.middleware.rate_limit import rate_limit_lifespan
 from app.infrastructure.application.openapi import get_openapi_config
 from app.infrastructure.application.plugins import get_plugins
 from app.infrastructure.di.registry import get_providers
@@ -43,7 +43,6 @@ def create_app() -> Litestar:  # noqa: WPS210 allowed for app setup
     )
     middleware: list[Middleware] = [
         ContainerMiddleware,
-        RateLimitMiddleware,
         middleware_config.middleware,
     ]
 
@@ -67,7 +66,7 @@ def create_app() -> Litestar:  # noqa: WPS210 allowed for app setup
         cors_config=get_cors_config(settings),
         plugins=plugins,
         middleware=middleware,
-        lifespan=[dishka_lifespan],
+        lifespan=[dishka_lifespan, rate_limit_lifespan],
         exception_handlers=get_exception_handlers(),
         state=State(
             state={
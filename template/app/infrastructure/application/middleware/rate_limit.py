@@ -1,45 +1,142 @@
+import asyncio
+from collections.abc import AsyncGenerator, Iterator, Sequence
+from contextlib import asynccontextmanager
 from typing import Any
 
-from dishka import Scope as DIScope
-from litestar import Request
+from litestar import Litestar, Request, WebSocket
 from litestar.enums import ScopeType
-from litestar.middleware import AbstractMiddleware
-from litestar.types import Receive, Scope, Send
+from litestar.exceptions import WebSocketException
+from litestar.handlers import BaseRouteHandler
+from litestar.middleware import DefineMiddleware
+from litestar.routes import HTTPRoute
+from litestar.status_codes import WS_1008_POLICY_VIOLATION
+from litestar.types import ASGIApp, Receive, ReceiveMessage, Scope, Send
 
-from app.infrastructure.web.rate_limiter import RateLimit, RateLimiter
+from app.infrastructure.web.local_quota import TokenBucket
+from app.infrastructure.web.rate_limiter import (
+    Connection,
+    MessageRateLimit,
+    RateLimit,
+    RateLimiter,
+)
 
 
-class RateLimitMiddleware(AbstractMiddleware):
-    opt_key = "rate_limit"
+@asynccontextmanager
+async def rate_limit_lifespan(app: Litestar) -> AsyncGenerator[None, Any]:
+    """Resolve the APP scoped `RateLimiter` once for all rate limited routes.
 
-    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
-        app = scope["app"]
+    The limits of the routes are checked against the limiter, so the app does
+    not start with an algorithm it cannot enforce. Without rate limited routes
+    the limiter is not resolved, and the app starts without Redis.
+    """
+    configs = list(_rate_limits(app))
+    if configs:
+        limiter = await app.state.dishka_container.get(RateLimiter)
+        for config in configs:
+            limiter.check_algorithm(config.algorithm)
+        app.state.rate_limiter = limiter
+    yield
+
+
+class RateLimitMiddleware:
+    """Apply a `RateLimit` to the route handler the middleware is attached to.
 
-        if scope["type"] != ScopeType.HTTP:
-            await app(scope, receive, send)
-            return
+    The middleware is added per route handler with `rate_limit`, so routes
+    without a limit do not go through it at all. It relies on
+    `ContainerMiddleware` for the request container and on
+    `rate_limit_lifespan` for the limiter.
 
-        rate_limit_cfg: RateLimit | None = scope["route_handler"].opt.get(self.opt_key)
-        if not isinstance(rate_limit_cfg, RateLimit):
-            await self.app(scope, receive, send)
-            return
+    On WebSocket routes the rules limit connection attempts, and
+    `RateLimit.messages` limits the messages of each session with a local
+    token bucket. Messages over the rate are delayed, which slows down the
+    socket reads of a noisy client instead of busying the event loop, and the
+    socket is closed once a client staying over the rate was delayed for more
+    than `max_delay` seconds in total.
+    """
 
-        request: Request[Any, Any, Any] = app.request_class(
-            scope,
-            receive=receive,
-            send=send,
+    def __init__(self, app: ASGIApp, config: RateLimit) -> None:
+        self.app = app
+        self.config = config
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limiter: RateLimiter = scope["app"].state.rate_limiter
+        container = scope["state"]["dishka_container"]
+        request: Connection
+        if scope["type"] == ScopeType.WEBSOCKET:
+            request = await container.get(WebSocket)
+            if self.config.messages is not None:
+                receive = _MessageLimiter(receive, self.config.messages)
+        else:
+            request = await container.get(Request)
+        await limiter(request, self.config)
+        await self.app(scope, receive, send)
+
+
+def _rate_limits(app: Litestar) -> Iterator[RateLimit]:
+    """`RateLimit` of every route handler limited with `rate_limit`."""
+    for route in app.routes:
+        route_handlers: Sequence[BaseRouteHandler] = (
+            route.route_handlers
+            if isinstance(route, HTTPRoute)
+            else (route.route_handler,)
         )
-        async with app.state.dishka_container(
-            {Request: request},
-            scope=DIScope.REQUEST,
-        ) as container:
-            limiter = await container.get(RateLimiter)
-            await limiter(
-                request,
-                rate_limit_cfg.times,
-                rate_limit_cfg.total_ms,
-                rate_limit_cfg.identifier,
-                rate_limit_cfg.callback,
+        for route_handler in route_handlers:
+            yield from (
+                middleware.kwargs["config"]
+                for middleware in route_handler.resolve_middleware()
+                if isinstance(middleware, DefineMiddleware)
+                and middleware.middleware is RateLimitMiddleware
             )
 
-        await self.app(scope, receive, send)
+
+class _MessageLimiter:
+    """`receive` of a WebSocket session, delaying the messages over the rate."""
+
+    def __init__(self, receive: Receive, config: MessageRateLimit) -> None:
+        self.receive = receive
+        self.config = config
+        self.bucket = TokenBucket(config.rate, config.burst)
+        self.delayed: float = 0
+
+    async def __call__(self) -> ReceiveMessage:
+        message = await self.receive()
+        if message["type"] != "websocket.receive":
+            return message
+        wait = self.bucket.reserve()
+        self.delayed = self.delayed + wait if wait else 0
+        if self.delayed > self.config.max_delay:
+            raise WebSocketException(
+                detail="Message rate limit exceeded.",
+                code=WS_1008_POLICY_VIOLATION,
+            )
+        if wait:
+            await asyncio.sleep(wait)
+        return message
+
+
+def rate_limit(config: RateLimit) -> DefineMiddleware:
+    """Rate limit a route handler.
+
+    Example:
+        @get(
+            "/sample/{number:int}",
+            middleware=[
+                rate_limit(
+                    RateLimit(
+                        times=10,
+                        seconds=1,
+                        rules=[
+                            RateLimitRule(times=1000, hours=1),
+                            RateLimitRule(
+                                times=100000,
+                                hours=1,
+                                identifier=tenant_identifier,
+                                bucket="tenant",
+                            ),
+                        ],
+                    ),
+                ),
+            ],
+        )
+    """
+    return DefineMiddleware(RateLimitMiddleware, config=config)
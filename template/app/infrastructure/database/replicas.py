@@ -0,0 +1,177 @@
+"""Routing of read-only sessions to read replicas."""
+
+import asyncio
+import logging
+from contextlib import suppress
+from dataclasses import dataclass
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from app.application.common.interfaces import ReadSessionFactory, SessionFactory
+from app.infrastructure.database.session import get_async_session_maker
+from app.infrastructure.observability.metrics import (
+    db_read_sessions,
+    db_replica_lag_seconds,
+)
+
+logger = logging.getLogger(__name__)
+
+# Seconds the replica is behind the primary, `0` once it replayed everything
+# it received, so a replica of an idle primary has no lag. `NULL` while its
+# WAL receiver is not streaming: a disconnected replica receives nothing, so
+# it would otherwise look up to date however far behind it falls.
+LAG_QUERY = sa.text(
+    """
+    SELECT CASE
+        WHEN NOT EXISTS (
+            SELECT FROM pg_stat_wal_receiver WHERE status = 'streaming'
+        ) THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+    """,
+)
+DEFAULT_PORT = 5432
+REPLICA_NAME = "{0.host}:{1}/{0.database}"
+
+
+@dataclass(slots=True)
+class Replica:
+    name: str
+    engine: AsyncEngine
+    sessionmaker: async_sessionmaker[AsyncSession]
+    healthy: bool = False
+    """Reachable on the last check, replicas are unused until checked."""
+    lag: float = 0
+    """Seconds behind the primary on the last check."""
+
+    @classmethod
+    def from_engine(cls, engine: AsyncEngine) -> "Replica":
+        return cls(
+            name=REPLICA_NAME.format(engine.url, engine.url.port or DEFAULT_PORT),
+            engine=engine,
+            sessionmaker=get_async_session_maker(engine),
+        )
+
+
+class ReplicaPool:
+    """Read replicas checked every `interval` seconds.
+
+    A replica serves sessions while its last check succeeded and it was at
+    most `max_lag` seconds behind the primary. Eligible replicas take turns.
+    """
+
+    def __init__(
+        self,
+        replicas: list[Replica],
+        max_lag: float = 5,
+        interval: float = 5,
+        timeout: float = 2,
+    ) -> None:
+        """Initialize ReplicaPool.
+
+        Args:
+            replicas: Replicas of the primary database.
+            max_lag: Seconds a replica may be behind the primary.
+            interval: Seconds between the checks of the replicas.
+            timeout: Seconds a check waits for a replica, unhealthy after that.
+        """
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.interval = interval
+        self.timeout = timeout
+        self._turn = 0
+        self._task: asyncio.Task[None] | None = None
+
+    def choose(self) -> Replica | None:
+        """Next eligible replica, `None` when none is."""
+        eligible = [
+            replica
+            for replica in self.replicas
+            if replica.healthy and replica.lag <= self.max_lag
+        ]
+        if not eligible:
+            return None
+        replica = eligible[self._turn % len(eligible)]
+        self._turn += 1
+        return replica
+
+    async def start(self) -> None:
+        """Check the replicas, and again every `interval` seconds until closed."""
+        if not self.replicas:
+            return
+        await self.check()
+        self._task = asyncio.create_task(self.run())
+
+    async def run(self) -> None:
+        while True:  # noqa: WPS457 checks until cancelled by `close`
+            await asyncio.sleep(self.interval)
+            await self.check()
+
+    async def check(self) -> None:
+        await asyncio.gather(*(self._check(replica) for replica in self.replicas))
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+        await asyncio.gather(
+            *(replica.engine.dispose() for replica in self.replicas),
+        )
+
+    async def _check(self, replica: Replica) -> None:
+        try:
+            async with asyncio.timeout(self.timeout), replica.engine.connect() as conn:
+                lag = await conn.scalar(LAG_QUERY)
+        except Exception as exc:  # noqa: BLE001 any failure makes it unhealthy
+            _mark_unhealthy(replica, repr(exc))
+            return
+        if lag is None:
+            _mark_unhealthy(replica, "WAL receiver not streaming")
+            return
+        replica.lag = float(lag)
+        if not replica.healthy:
+            logger.info("Replica %s is healthy", replica.name)
+        replica.healthy = True
+        db_replica_lag_seconds.labels(replica.name).set(replica.lag)
+
+
+def _mark_unhealthy(replica: Replica, reason: str) -> None:
+    if replica.healthy:
+        logger.warning("Replica %s is unhealthy: %s", replica.name, reason)
+    replica.healthy = False
+
+
+class RoutingSessionFactory(SessionFactory):
+    """Open read-only sessions on a replica, other sessions on the primary.
+
+    Read-only sessions fall back to the primary while no replica is eligible,
+    so replica outages and lag only add load to the primary. Reads of a
+    replica may miss the latest writes, up to `ReplicaPool.max_lag` seconds.
+    """
+
+    def __init__(
+        self,
+        primary: async_sessionmaker[AsyncSession],
+        replicas: ReplicaPool,
+    ) -> None:
+        self.primary = primary
+        self.replicas = replicas
+
+    def __call__(self, *, read_only: bool = False) -> AsyncSession:
+        if read_only and self.replicas.replicas:
+            replica = self.replicas.choose()
+            db_read_sessions.labels("replica" if replica else "primary").inc()
+            if replica is not None:
+                return replica.sessionmaker()
+        return self.primary()
+
+
+class ReadOnlySessionFactory(ReadSessionFactory):
+    def __init__(self, sessions: RoutingSessionFactory) -> None:
+        self._sessions = sessions
+
+    def __call__(self) -> AsyncSession:
+        return self._sessions(read_only=True)
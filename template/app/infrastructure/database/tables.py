@@ -45,3 +45,15 @@ class TimestampMixin:
         onupdate=sa.text("timezone('utc', current_timestamp)"),
         sort_order=-98,  # noqa:WPS432
     )
+
+
+class OutboxMessage(UUIDMixin, TimestampMixin, Base):
+    """Event written in the transaction of a command, relayed to a stream later."""
+
+    __tablename__ = "outbox"
+    __table_args__ = (sa.Index("ix_outbox_created_at", "created_at"),)
+
+    stream: Mapped[str] = mapped_column(sa.String(255))  # noqa:WPS432
+    payload: Mapped[bytes] = mapped_column(sa.LargeBinary)
+    content_type: Mapped[str] = mapped_column(sa.String(64))  # noqa:WPS432
+    deliver_at: Mapped[datetime | None] = mapped_column(sa.DateTime(timezone=True))
@@ -4,18 +4,55 @@ from urllib.parse import urlsplit
 
 from aiocache import RedisCache
 from aiocache.serializers import PickleSerializer
-from dishka import Provider, Scope, from_context, provide  # noqa: WPS347
+from dishka import (  # noqa: WPS347
+    AsyncContainer,
+    Provider,
+    Scope,
+    from_context,
+    provide,
+)
 from faststream.redis import RedisBroker
 from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncEngine
 
 from app.application.common.interfaces import (
+    OutboxFactory,
     PublisherFactory,
+    ReadSessionFactory,
     RepositoryFactory,
     SessionFactory,
 )
 from app.config.base import Settings
-from app.infrastructure.adapters.publisher import EventPublisherFactory
+from app.infrastructure.adapters.background_publisher import (
+    BackgroundEventPublisherFactory,
+    BackgroundPublisher,
+    OverflowPolicy,
+    SpillFile,
+)
+from app.infrastructure.adapters.claim_check import ClaimCheck, FileBlobStore
+from app.infrastructure.adapters.codec import EnvelopeCodec, MessageFormat
+from app.infrastructure.adapters.dedup import MessageDeduplicator
+from app.infrastructure.adapters.outbox import OutboxPublisherFactory, OutboxRelay
+from app.infrastructure.adapters.partitions import StreamPartitions
+from app.infrastructure.adapters.publisher import (
+    BatchedEventPublisherFactory,
+    EventPublisherFactory,
+    PublishBatcher,
+)
+from app.infrastructure.adapters.retention import (
+    RetentionPolicy,
+    StreamRetention,
+    StreamTrimmer,
+)
+from app.infrastructure.adapters.scheduler import DelayedDelivery
+from app.infrastructure.adapters.stream_monitor import StreamMonitor
+from app.infrastructure.adapters.streams import StreamWriter
+from app.infrastructure.database.replicas import (
+    ReadOnlySessionFactory,
+    Replica,
+    ReplicaPool,
+    RoutingSessionFactory,
+)
 from app.infrastructure.database.repositories.factory import (
     ConcreteRepositoryFactory,
     Repo,
@@ -26,7 +63,7 @@ from app.infrastructure.worker.broker import get_broker
 logger = logging.getLogger(__name__)
 
 
-class AppProvider(Provider):
+class AppProvider(Provider):  # noqa: WPS214 one method per dependency
     settings = from_context(provides=Settings, scope=Scope.APP)
 
     @provide(scope=Scope.APP)
@@ -60,11 +97,44 @@ class AppProvider(Provider):
         await engine.dispose()
 
     @provide(scope=Scope.APP)
-    async def session_factory(
+    async def replica_pool(self, settings: Settings) -> AsyncIterable[ReplicaPool]:
+        pool = ReplicaPool(
+            [
+                Replica.from_engine(
+                    get_engine(
+                        url=url,
+                        pool_size=settings.db.pool_size,
+                        max_overflow=settings.db.max_overflow,
+                        echo=settings.db.echo,
+                    ),
+                )
+                for url in settings.db.replica_urls
+            ],
+            max_lag=settings.db.replica_max_lag,
+            interval=settings.db.replica_check_interval,
+        )
+        await pool.start()
+        yield pool
+        await pool.close()
+
+    @provide(scope=Scope.APP)
+    def routing_session_factory(
         self,
         engine: AsyncEngine,
-    ) -> SessionFactory:
-        return get_async_session_maker(engine)
+        replicas: ReplicaPool,
+    ) -> RoutingSessionFactory:
+        return RoutingSessionFactory(get_async_session_maker(engine), replicas)
+
+    @provide(scope=Scope.APP)
+    def session_factory(self, sessions: RoutingSessionFactory) -> SessionFactory:
+        return sessions
+
+    @provide(scope=Scope.APP)
+    def read_session_factory(
+        self,
+        sessions: RoutingSessionFactory,
+    ) -> ReadSessionFactory:
+        return ReadOnlySessionFactory(sessions)
 
     @provide(scope=Scope.APP)
     def make_repository_factory(
@@ -79,6 +149,174 @@ class AppProvider(Provider):
         async with broker:
             yield broker
 
+    @provide(scope=Scope.APP)
+    def stream_retention(self, settings: Settings) -> StreamRetention:
+        streams = settings.streams.max_len.keys() | settings.streams.max_age.keys()
+        return StreamRetention(
+            {
+                stream: RetentionPolicy(
+                    max_len=settings.streams.max_len.get(stream),
+                    max_age=settings.streams.max_age.get(stream),
+                )
+                for stream in streams
+            },
+        )
+
+    @provide(scope=Scope.APP)
+    def stream_writer(
+        self,
+        broker: RedisBroker,
+        retention: StreamRetention,
+    ) -> StreamWriter:
+        return StreamWriter(broker, retention)
+
+    @provide(scope=Scope.APP)
+    def stream_partitions(self, settings: Settings) -> StreamPartitions:
+        return StreamPartitions(settings.streams.partitions)
+
+    @provide(scope=Scope.APP)
+    async def stream_trimmer(
+        self,
+        settings: Settings,
+        broker: RedisBroker,
+        retention: StreamRetention,
+    ) -> StreamTrimmer:
+        return StreamTrimmer(
+            await broker.connect(),
+            retention,
+            interval=settings.streams.trim_interval,
+        )
+
+    @provide(scope=Scope.APP)
+    async def stream_monitor(
+        self,
+        settings: Settings,
+        broker: RedisBroker,
+    ) -> StreamMonitor:
+        return StreamMonitor(
+            await broker.connect(),
+            interval=settings.streams.monitor_interval,
+        )
+
+    @provide(scope=Scope.APP)
+    def delayed_delivery(
+        self,
+        settings: Settings,
+        broker: RedisBroker,
+        retention: StreamRetention,
+    ) -> DelayedDelivery:
+        return DelayedDelivery(
+            broker,
+            retention,
+            batch_size=settings.streams.scheduled_batch_size,
+            poll_interval=settings.streams.scheduled_poll_interval,
+        )
+
+    @provide(scope=Scope.APP)
+    def message_deduplicator(
+        self,
+        settings: Settings,
+        redis: Redis,
+    ) -> MessageDeduplicator:
+        return MessageDeduplicator(
+            redis,
+            window=settings.streams.dedup_window,
+            lease=settings.streams.dedup_lease,
+        )
+
+    @provide(scope=Scope.APP)
+    def envelope_codec(self, settings: Settings) -> EnvelopeCodec:
+        return EnvelopeCodec(MessageFormat[settings.publisher.format.upper()])
+
+    @provide(scope=Scope.APP)
+    def claim_check(self, settings: Settings, codec: EnvelopeCodec) -> ClaimCheck:
+        return ClaimCheck(
+            FileBlobStore(settings.publisher.claim_check_dir),
+            codec,
+            threshold=settings.publisher.claim_check_threshold,
+            ttl=settings.publisher.claim_check_ttl,
+        )
+
+    @provide(scope=Scope.APP)
+    async def publish_batcher(
+        self,
+        settings: Settings,
+        writer: StreamWriter,
+        codec: EnvelopeCodec,
+    ) -> AsyncIterable[PublishBatcher]:
+        batcher = PublishBatcher(
+            writer,
+            codec,
+            max_size=settings.publisher.batch_max_size,
+            max_bytes=settings.publisher.batch_max_bytes,
+            max_delay=settings.publisher.batch_delay_ms / 1000,
+        )
+        yield batcher
+        await batcher.close()
+
+    @provide(scope=Scope.APP)
+    async def background_publisher(
+        self,
+        settings: Settings,
+        batcher: PublishBatcher,
+    ) -> AsyncIterable[BackgroundPublisher]:
+        overflow = OverflowPolicy(settings.publisher.overflow)
+        background = BackgroundPublisher(
+            batcher,
+            max_size=settings.publisher.queue_size,
+            overflow=overflow,
+            spill=(
+                SpillFile(settings.publisher.spill_dir)
+                if overflow == OverflowPolicy.SPILL
+                else None
+            ),
+        )
+        yield background
+        await background.close()
+
+    event_publisher_factory = provide(EventPublisherFactory, scope=Scope.REQUEST)
+    batched_publisher_factory = provide(
+        BatchedEventPublisherFactory,
+        scope=Scope.REQUEST,
+    )
+    background_publisher_factory = provide(
+        BackgroundEventPublisherFactory,
+        scope=Scope.REQUEST,
+    )
+
     @provide(scope=Scope.REQUEST)
-    def publisher_factory(self, broker: RedisBroker) -> PublisherFactory:
-        return EventPublisherFactory(broker)
+    async def publisher_factory(
+        self,
+        settings: Settings,
+        container: AsyncContainer,
+    ) -> PublisherFactory:
+        if settings.publisher.background:
+            return await container.get(BackgroundEventPublisherFactory)
+        if settings.publisher.batch:
+            return await container.get(BatchedEventPublisherFactory)
+        return await container.get(EventPublisherFactory)
+
+    @provide(scope=Scope.APP)
+    def outbox_factory(
+        self,
+        codec: EnvelopeCodec,
+        partitions: StreamPartitions,
+        claim_check: ClaimCheck,
+    ) -> OutboxFactory:
+        return OutboxPublisherFactory(codec, partitions, claim_check)
+
+    @provide(scope=Scope.APP)
+    def outbox_relay(
+        self,
+        settings: Settings,
+        engine: AsyncEngine,
+        writer: StreamWriter,
+        scheduler: DelayedDelivery,
+    ) -> OutboxRelay:
+        return OutboxRelay(
+            get_async_session_maker(engine),
+            writer,
+            scheduler,
+            batch_size=settings.publisher.outbox_batch_size,
+            poll_interval=settings.publisher.outbox_poll_interval,
+        )
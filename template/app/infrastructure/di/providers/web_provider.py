@@ -1,13 +1,47 @@
-from dishka import Provider, Scope, provide
+from dishka import Provider, Scope, from_context, provide  # noqa: WPS347
+from litestar import Request, WebSocket
 from redis.asyncio import Redis
 
+from app.config.base import Settings
+from app.infrastructure.web.heavy_hitters import HeavyHitters
+from app.infrastructure.web.rate_limit_scripts import RateLimitAlgorithm
 from app.infrastructure.web.rate_limiter import RateLimiter
 
 
 class WebProvider(Provider):
+    request = from_context(provides=Request, scope=Scope.REQUEST)
+    websocket = from_context(provides=WebSocket, scope=Scope.SESSION)
+
+    @provide(scope=Scope.APP)
+    async def heavy_hitters(self, redis: Redis, settings: Settings) -> HeavyHitters:
+        return await HeavyHitters.setup(
+            redis,
+            prefix=settings.rate_limit.prefix,
+            capacity=settings.rate_limit.heavy_hitters_capacity,
+            period=settings.rate_limit.heavy_hitters_period,
+        )
+
     @provide(scope=Scope.APP)
-    async def rate_limiter(self, redis: Redis) -> RateLimiter:
+    async def rate_limiter(
+        self,
+        redis: Redis,
+        settings: Settings,
+        heavy_hitters: HeavyHitters,
+    ) -> RateLimiter:
         return await RateLimiter.setup(
             redis,
-            prefix="rate_limiter",
+            prefix=settings.rate_limit.prefix,
+            algorithm=RateLimitAlgorithm(settings.rate_limit.algorithm),
+            local_lease_ratio=settings.rate_limit.local_lease_ratio,
+            auto_pipeline_delay=(
+                settings.rate_limit.auto_pipeline_delay_ms / 1000
+                if settings.rate_limit.auto_pipeline
+                else None
+            ),
+            check_timeout=settings.rate_limit.timeout_ms / 1000 or None,
+            failure_threshold=settings.rate_limit.failure_threshold,
+            recovery_timeout=settings.rate_limit.recovery_timeout,
+            heavy_hitters=(
+                heavy_hitters if settings.rate_limit.heavy_hitters_capacity else None
+            ),
         )
@@ -0,0 +1,126 @@
+"""Prometheus metrics of the application.
+
+Metrics are exposed by `MetricsController`, and by the supervisor of
+`litestar worker run --metrics-port` for the worker. With several processes
+set ``PROMETHEUS_MULTIPROC_DIR`` so the values of all processes are collected.
+"""
+
+from types import MappingProxyType
+from typing import Final
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.infrastructure.web.circuit_breaker import CircuitState
+
+LIVE_MAX: Final = "livemax"
+"""Gauges of several processes keep the highest value of the live ones."""
+GROUP_LABELS = ("stream", "group")
+"""Labels of the metrics of a consumer group."""
+
+CIRCUIT_STATES = MappingProxyType(
+    {
+        CircuitState.CLOSED: 0,
+        CircuitState.HALF_OPEN: 1,
+        CircuitState.OPEN: 2,
+    },
+)
+
+rate_limiter_circuit_state = Gauge(
+    "rate_limiter_circuit_state",
+    "Rate limiter Redis circuit state: 0 closed, 1 half open, 2 open.",
+    multiprocess_mode=LIVE_MAX,
+)
+rate_limiter_circuit_transitions = Counter(
+    "rate_limiter_circuit_transitions",
+    "Rate limiter Redis circuit state transitions.",
+    ["state"],
+)
+rate_limiter_fallback_checks = Counter(
+    "rate_limiter_fallback_checks",
+    "Rate limit checks served by the in-process fallback limiter.",
+)
+
+publisher_dropped_events = Counter(
+    "publisher_dropped_events",
+    "Events dropped by the background publisher, queue full or failed to send.",
+)
+publisher_spilled_events = Counter(
+    "publisher_spilled_events",
+    "Events spilled to disk by the background publisher.",
+)
+outbox_relayed_events = Counter(
+    "outbox_relayed_events",
+    "Events moved from the outbox table to Redis Streams.",
+)
+claim_check_offloaded_events = Counter(
+    "claim_check_offloaded_events",
+    "Event payloads stored in the blob store, streams carrying a reference.",
+)
+
+dedup_checks = Counter(
+    "dedup_checks",
+    "Message id checks of the worker de-duplication by result.",
+    ["result"],
+)
+dedup_entries = Gauge(
+    "dedup_entries",
+    "Message ids remembered by the worker de-duplication.",
+    multiprocess_mode=LIVE_MAX,
+)
+dedup_memory_bytes = Gauge(
+    "dedup_memory_bytes",
+    "Redis memory used by the message ids of the worker de-duplication.",
+    multiprocess_mode=LIVE_MAX,
+)
+
+stream_group_lag = Gauge(
+    "stream_group_lag",
+    "Stream entries not yet delivered to the consumer group.",
+    GROUP_LABELS,
+    multiprocess_mode=LIVE_MAX,
+)
+stream_group_pending = Gauge(
+    "stream_group_pending",
+    "Stream entries delivered to the consumer group and not acknowledged.",
+    GROUP_LABELS,
+    multiprocess_mode=LIVE_MAX,
+)
+stream_group_oldest_pending_seconds = Gauge(
+    "stream_group_oldest_pending_seconds",
+    "Age of the oldest entry pending in the consumer group.",
+    GROUP_LABELS,
+    multiprocess_mode=LIVE_MAX,
+)
+stream_group_consumers = Gauge(
+    "stream_group_consumers",
+    "Consumers of the consumer group.",
+    GROUP_LABELS,
+    multiprocess_mode=LIVE_MAX,
+)
+stream_handled_messages = Counter(
+    "stream_handled_messages",
+    "Stream messages handled by the worker by result, their rate is the throughput.",
+    [*GROUP_LABELS, "result"],
+)
+stream_handler_seconds = Histogram(
+    "stream_handler_seconds",
+    "Time the worker takes to handle a stream message.",
+    GROUP_LABELS,
+)
+
+db_replica_lag_seconds = Gauge(
+    "db_replica_lag_seconds",
+    "Seconds a database read replica is behind the primary, on its last check.",
+    ["replica"],
+    multiprocess_mode=LIVE_MAX,
+)
+db_read_sessions = Counter(
+    "db_read_sessions",
+    "Read-only database sessions by target, `primary` when no replica is eligible.",
+    ["target"],
+)
+
+
+def record_rate_limiter_circuit_state(state: CircuitState) -> None:
+    rate_limiter_circuit_state.set(CIRCUIT_STATES[state])
+    rate_limiter_circuit_transitions.labels(state=state).inc()
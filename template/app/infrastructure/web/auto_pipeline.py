@@ -0,0 +1,129 @@
+"""Automatic pipelining of concurrent Redis script calls."""
+
+import asyncio
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from redis.asyncio import Redis
+from redis.commands.core import AsyncScript
+from redis.exceptions import NoScriptError
+
+
+@dataclass(slots=True)
+class PendingCall:
+    script: AsyncScript
+    keys: Sequence[str]
+    args: Sequence[str]
+    future: asyncio.Future[Any]
+
+    @property
+    def operands(self) -> tuple[str, ...]:
+        return (*self.keys, *self.args)
+
+    def resolve(self, reply: Any) -> None:
+        """Hand the reply over to the caller, an exception is raised to it."""
+        if self.future.done():  # the caller was cancelled
+            return
+        if isinstance(reply, Exception):
+            self.future.set_exception(reply)
+        else:
+            self.future.set_result(reply)
+
+
+class AutoPipeline:
+    """Send script calls issued close together to Redis as one pipeline.
+
+    Calls made in the same event loop iteration, or within `max_delay` seconds
+    of the first one, are queued and flushed together. Each caller awaits only
+    its own result, as if it called the script. Scripts Redis lost, after a
+    restart or a ``SCRIPT FLUSH``, are loaded again and their calls sent once
+    more.
+    """
+
+    def __init__(
+        self, redis: Redis, max_delay: float = 0, max_size: int = 1000
+    ) -> None:
+        """Initialize AutoPipeline.
+
+        Args:
+            redis: Redis client.
+            max_delay: Seconds to wait for more calls after the first queued one.
+                `0` flushes on the next event loop iteration.
+            max_size: Number of queued calls flushed immediately.
+        """
+        self.redis = redis
+        self.max_delay = max_delay
+        self.max_size = max_size
+        self._pending: list[PendingCall] = []
+        self._flush_handle: asyncio.Handle | None = None
+        self._executing: set[asyncio.Task[None]] = set()
+
+    async def run(
+        self,
+        script: AsyncScript,
+        keys: Sequence[str],
+        args: Sequence[str],
+    ) -> Any:
+        """Call `script` in the next pipeline and return its reply."""
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[Any] = loop.create_future()
+        self._pending.append(PendingCall(script, keys, args, future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = (
+                loop.call_later(self.max_delay, self._flush)
+                if self.max_delay
+                else loop.call_soon(self._flush)
+            )
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch = self._pending
+        self._pending = []
+        if not batch:
+            return
+        task = asyncio.create_task(self._execute(batch))
+        self._executing.add(task)
+        task.add_done_callback(self._executing.discard)
+
+    async def _execute(self, batch: list[PendingCall]) -> None:
+        try:
+            replies = await self._send_loaded(batch)
+        except Exception as exc:  # noqa: BLE001 handed over to the callers
+            for call in batch:
+                call.resolve(exc)
+            return
+        for call, reply in zip(batch, replies, strict=True):
+            call.resolve(reply)
+
+    async def _send_loaded(self, batch: list[PendingCall]) -> list[Any]:
+        replies = await self._send(batch)
+        missing = [
+            index
+            for index, reply in enumerate(replies)
+            if isinstance(reply, NoScriptError)
+        ]
+        if not missing:
+            return replies
+        await asyncio.gather(
+            *map(
+                self.redis.script_load,
+                {batch[index].script.script for index in missing},
+            ),
+        )
+        resent = await self._send([batch[index] for index in missing])
+        for index, reply in zip(missing, resent, strict=True):
+            replies[index] = reply
+        return replies
+
+    async def _send(self, batch: list[PendingCall]) -> list[Any]:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for call in batch:
+                pipe.evalsha(call.script.sha, len(call.keys), *call.operands)
+            replies: list[Any] = await pipe.execute(raise_on_error=False)
+        return replies
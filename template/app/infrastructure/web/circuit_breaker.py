@@ -0,0 +1,70 @@
+"""Circuit breaker guarding calls to a remote dependency."""
+
+import time
+from collections.abc import Callable
+from enum import StrEnum
+
+
+class CircuitState(StrEnum):
+    CLOSED = "closed"
+    """Calls go to the dependency."""
+    OPEN = "open"
+    """The dependency failed, calls are short-circuited."""
+    HALF_OPEN = "half_open"
+    """A single probe call checks whether the dependency recovered."""
+
+
+class CircuitBreaker:
+    """Stop calling a dependency after consecutive failures and retry it later.
+
+    After `failure_threshold` consecutive failures the circuit opens. Once
+    `recovery_timeout` seconds pass, a single probe call is allowed: its
+    success closes the circuit, its failure opens it again.
+    `on_state_change` is called on every transition, e.g. to export metrics.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 5,
+        on_state_change: Callable[[CircuitState], None] | None = None,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.on_state_change = on_state_change
+        self.state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at: float = 0
+
+    def allow_request(self) -> bool:
+        if self.state == CircuitState.CLOSED:
+            return True
+        now = time.monotonic()
+        if now - self._opened_at < self.recovery_timeout:
+            return False
+        # A probe that never reported back is replaced after another timeout.
+        self._opened_at = now
+        if self.state == CircuitState.OPEN:
+            self._transition(CircuitState.HALF_OPEN)
+        return True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        # Successes while open do not close the circuit. Once half open, any
+        # success closes it, the probe's or a call started before it opened.
+        if self.state == CircuitState.HALF_OPEN:
+            self._transition(CircuitState.CLOSED)
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self.state == CircuitState.HALF_OPEN or (
+            self.state == CircuitState.CLOSED
+            and self._failures >= self.failure_threshold
+        ):
+            self._opened_at = time.monotonic()
+            self._transition(CircuitState.OPEN)
+
+    def _transition(self, state: CircuitState) -> None:
+        self.state = state
+        if self.on_state_change is not None:
+            self.on_state_change(state)
@@ -0,0 +1,118 @@
+"""Approximate top throttled identifiers and routes, kept in Redis."""
+
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+from operator import itemgetter
+
+from redis.asyncio import Redis
+
+RECORD_SCRIPT = """local capacity = tonumber(ARGV[3])
+local ttl = ARGV[4]
+
+for i = 1, 2 do
+    local key = KEYS[i]
+    local member = ARGV[i]
+    if redis.call('ZSCORE', key, member) then
+        redis.call('ZINCRBY', key, 1, member)
+    elseif redis.call('ZCARD', key) < capacity then
+        redis.call('ZADD', key, 1, member)
+    else
+        local evicted = redis.call('ZPOPMIN', key)
+        redis.call('ZADD', key, tonumber(evicted[2]) + 1, member)
+    end
+    redis.call('PEXPIRE', key, ttl)
+end
+
+redis.call('PFADD', KEYS[3], ARGV[1])
+redis.call('PEXPIRE', KEYS[3], ttl)
+return 0"""
+"""Space-Saving top-k update of the identifier and route sorted sets.
+
+A new member replaces the least counted one and inherits its count, so each
+set holds at most `capacity` members and counts are overestimated by at most
+the evicted count. Distinct identifiers are counted in a HyperLogLog.
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class HeavyHittersReport:
+    identifiers: list[tuple[str, int]]
+    routes: list[tuple[str, int]]
+    distinct_identifiers: int
+
+
+class HeavyHitters:
+    """Track who hits the rate limits in bounded memory.
+
+    Counts live in fixed periods (an hour by default), a report covers the
+    current and the previous period.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        prefix: str,
+        capacity: int = 100,
+        period: int = 3600,
+    ) -> None:
+        self.redis = redis
+        self.prefix = prefix
+        self.capacity = capacity
+        self.period = period
+        self._record = redis.register_script(RECORD_SCRIPT)
+
+    @classmethod
+    async def setup(
+        cls,
+        redis: Redis,
+        prefix: str,
+        capacity: int = 100,
+        period: int = 3600,
+    ) -> "HeavyHitters":
+        """Load the script and create the tracker.
+
+        The script is loaded again if Redis loses it, after a restart or a
+        ``SCRIPT FLUSH``.
+        """
+        await redis.script_load(RECORD_SCRIPT)
+        return cls(redis, prefix, capacity, period)
+
+    async def record(self, identifier: str, route: str) -> None:
+        """Count a throttled hit."""
+        await self._record(
+            keys=self._keys(self._current_period()),
+            args=[identifier, route, self.capacity, 2 * self.period * 1000],
+        )
+
+    async def report(self, limit: int = 10) -> HeavyHittersReport:
+        current = self._current_period()
+        identifiers, routes, distinct = zip(
+            self._keys(current),
+            self._keys(current - 1),
+            strict=True,
+        )
+        return HeavyHittersReport(
+            identifiers=await self._top(identifiers, limit),
+            routes=await self._top(routes, limit),
+            distinct_identifiers=await self.redis.pfcount(*distinct),
+        )
+
+    async def _top(self, keys: Sequence[str], limit: int) -> list[tuple[str, int]]:
+        members = await self.redis.zunion(keys, withscores=True)
+        top = sorted(members, key=itemgetter(1), reverse=True)[:limit]
+        return [(_decode(member), int(score)) for member, score in top]
+
+    def _current_period(self) -> int:
+        return int(time.time()) // self.period
+
+    def _keys(self, period: int) -> tuple[str, str, str]:
+        return (
+            f"{self.prefix}:heavy_hitters:{period}:identifiers",
+            f"{self.prefix}:heavy_hitters:{period}:routes",
+            f"{self.prefix}:heavy_hitters:{period}:distinct",
+        )
+
+
+def _decode(member: bytes | str) -> str:
+    return member.decode() if isinstance(member, bytes) else member
@@ -0,0 +1,174 @@
+"""In-process rate limit state: shares of the Redis quota and local limiters."""
+
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+from math import ceil
+
+from app.infrastructure.web.rate_limit_scripts import Verdict
+
+
+@dataclass(slots=True)
+class Lease:
+    tokens: int
+    expires_at: float
+    """`time.monotonic()` timestamp when the leased window ends."""
+    window_ends: Sequence[float] = ()
+    """`time.monotonic()` timestamps when the window of each rule ends."""
+
+
+class LocalQuota:
+    """Token buckets filled with hits leased from Redis.
+
+    Each process reserves a batch of hits from the shared Redis window and
+    spends them locally, so only every `lease_size`-th request pays a Redis
+    round trip. A lease ends with the shortest window of the route rules, so
+    the limiter never admits more than the limit. Its unused hits are lost for
+    that window, and given back to the longer windows still running with the
+    next lease of the key. The price is accuracy: with `N` processes up to
+    `N * (lease_size - 1)` hits per window may be held by idle processes while
+    others are throttled.
+    """
+
+    def __init__(self, lease_ratio: float, max_keys: int = 10000) -> None:
+        """Initialize LocalQuota.
+
+        Args:
+            lease_ratio: Share of the route limit leased at once, in ``(0, 1]``.
+                Higher values mean fewer Redis round trips and lower accuracy.
+            max_keys: Number of leases kept before expired ones are evicted.
+        """
+        self.lease_ratio = lease_ratio
+        self.max_keys = max_keys
+        self._leases: dict[str, Lease] = {}
+
+    def lease_size(self, times: int) -> int:
+        return max(1, ceil(times * self.lease_ratio))
+
+    def take(self, key: str) -> bool:
+        """Spend one hit of the key lease, return `False` if a new lease is needed."""
+        lease = self._leases.get(key)
+        if lease is None or lease.tokens <= 0:
+            return False
+        if lease.expires_at <= time.monotonic():
+            return False
+        lease.tokens -= 1
+        return True
+
+    def release(self, key: str) -> list[int]:
+        """Remove the lease of the key, return its unused hits for every rule.
+
+        Hits are only returned to the rules whose window did not end since the
+        lease was granted, the other counters were reset.
+        """
+        lease = self._leases.pop(key, None)
+        if lease is None or lease.tokens <= 0:
+            return []
+        now = time.monotonic()
+        return [lease.tokens if end > now else 0 for end in lease.window_ends]
+
+    def grant(self, key: str, tokens: int, pttls: Sequence[int], since: float) -> None:
+        """Store hits leased from Redis until the shortest window ends.
+
+        Args:
+            key: Key of the lease.
+            tokens: Number of leased hits.
+            pttls: Milliseconds left in the window of each rule.
+            since: `time.monotonic()` timestamp before the lease was requested,
+                so the windows are not assumed to end later than they do.
+        """
+        if key not in self._leases and len(self._leases) >= self.max_keys:
+            _evict(self._leases, time.monotonic(), self.max_keys)
+        window_ends = [since + pttl / 1000 for pttl in pttls]
+        self._leases[key] = Lease(
+            tokens=tokens,
+            expires_at=min(window_ends),
+            window_ends=window_ends,
+        )
+
+
+class LocalLimiter:
+    """Approximate in-process fixed window limiter.
+
+    Used while Redis is unavailable: every process enforces the whole limit on
+    its own, so a cluster admits up to `processes * limit` hits per window.
+    """
+
+    def __init__(self, max_keys: int = 10000) -> None:
+        self.max_keys = max_keys
+        self._windows: dict[str, Lease] = {}
+
+    def __call__(self, keys: Sequence[str], args: Sequence[str]) -> Verdict:
+        """Count a hit for every rule, taking the same arguments as the scripts.
+
+        Returns:
+            Verdict: `0` if the hit is allowed, otherwise the time to wait in
+                ms, and the index of the rule with the longest wait.
+        """
+        now = time.monotonic()
+        windows = self._rule_windows(keys, args, now)
+        waits = [
+            ceil((window.expires_at - now) * 1000) if window.tokens <= 0 else 0
+            for window in windows
+        ]
+        longest = max(range(len(waits)), key=waits.__getitem__)
+        if waits[longest]:
+            return waits[longest], longest
+        for window in windows:
+            window.tokens -= 1
+        return 0, 0
+
+    def _rule_windows(
+        self,
+        keys: Sequence[str],
+        args: Sequence[str],
+        now: float,
+    ) -> list[Lease]:
+        limits, windows = args[::2], args[1::2]
+        return [
+            self._window(key, int(times), int(milliseconds), now)
+            for key, times, milliseconds in zip(keys, limits, windows, strict=True)
+        ]
+
+    def _window(self, key: str, times: int, milliseconds: int, now: float) -> Lease:
+        window = self._windows.get(key)
+        if window is not None and window.expires_at > now:
+            return window
+        if window is None and len(self._windows) >= self.max_keys:
+            _evict(self._windows, now, self.max_keys)
+        window = Lease(tokens=times, expires_at=now + milliseconds / 1000)
+        self._windows[key] = window
+        return window
+
+
+class TokenBucket:
+    """Token bucket of a single in-process client, e.g. a WebSocket session."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+
+    def reserve(self) -> float:
+        """Reserve a token.
+
+        Returns:
+            float: Seconds to wait before using the token.
+        """
+        now = time.monotonic()
+        self._tokens = min(
+            self.burst,
+            self._tokens + (now - self._updated_at) * self.rate,
+        )
+        self._updated_at = now
+        self._tokens -= 1
+        return max(0, -self._tokens / self.rate)
+
+
+def _evict(leases: dict[str, Lease], now: float, max_keys: int) -> None:
+    expired = [key for key, lease in leases.items() if lease.expires_at <= now]
+    for key in expired:
+        del leases[key]  # noqa: WPS420
+    if len(leases) >= max_keys:
+        leases.clear()
@@ -0,0 +1,197 @@
+"""Lua scripts implementing the rate limiting algorithms.
+
+Every algorithm script receives one key per rule in ``KEYS`` and a ``limit``,
+``window`` (ms) pair per rule in ``ARGV``. A hit is counted for all the rules
+only if none of them is exceeded. The script returns ``0`` when the hit is
+allowed, otherwise the number of milliseconds the client has to wait before
+retrying, and the index of the rule with the longest wait, counted from ``0``.
+"""
+
+from collections.abc import Mapping
+from enum import StrEnum
+from types import MappingProxyType
+
+
+class RateLimitAlgorithm(StrEnum):
+    FIXED_WINDOW = "fixed_window"
+    """Counter reset at the end of every window. Cheap, but allows bursts of
+    up to 2x the limit across a window boundary."""
+    SLIDING_WINDOW = "sliding_window"
+    """Weighted counter of the current and previous windows."""
+    GCRA = "gcra"
+    """Generic cell rate algorithm, a token bucket stored as a single timestamp."""
+
+
+type Verdict = tuple[int, int]
+"""Reply of the scripts, the milliseconds to wait and the exceeded rule."""
+
+
+FIXED_WINDOW_SCRIPT = """local wait = 0
+local exceeded = 0
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[i * 2 - 1])
+    local current = tonumber(redis.call('GET', key) or "0")
+    if current + 1 > limit then
+        local rule_wait = redis.call('PTTL', key)
+        if rule_wait > wait then
+            wait = rule_wait
+            exceeded = i - 1
+        end
+    end
+end
+if wait > 0 then
+    return {wait, exceeded}
+end
+
+for i, key in ipairs(KEYS) do
+    if redis.call('INCR', key) == 1 then
+        redis.call('PEXPIRE', key, ARGV[i * 2])
+    end
+end
+return {0, 0}"""
+
+SLIDING_WINDOW_SCRIPT = """local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+local wait = 0
+local exceeded = 0
+local states = {}
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[i * 2 - 1])
+    local window = tonumber(ARGV[i * 2])
+    local window_start = now - (now % window)
+
+    local state = redis.call('HMGET', key, 'start', 'current', 'previous')
+    local start = tonumber(state[1]) or window_start
+    local current = tonumber(state[2]) or 0
+    local previous = tonumber(state[3]) or 0
+
+    if start ~= window_start then
+        if window_start - start == window then
+            previous = current
+        else
+            previous = 0
+        end
+        current = 0
+    end
+
+    local elapsed = now - window_start
+    local estimated = previous * (window - elapsed) / window + current
+    if estimated + 1 > limit then
+        local rule_wait = window - elapsed
+        if current + 1 <= limit and previous > 0 then
+            rule_wait = window - elapsed - (limit - 1 - current) * window / previous
+            rule_wait = math.max(1, math.ceil(rule_wait))
+        end
+        if rule_wait > wait then
+            wait = rule_wait
+            exceeded = i - 1
+        end
+    end
+    states[i] = {window_start, current + 1, previous, 2 * window - elapsed}
+end
+if wait > 0 then
+    return {wait, exceeded}
+end
+
+for i, key in ipairs(KEYS) do
+    local state = states[i]
+    redis.call('HSET', key, 'start', state[1], 'current', state[2], 'previous', state[3])
+    redis.call('PEXPIRE', key, state[4])
+end
+return {0, 0}"""
+
+GCRA_SCRIPT = """local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000000 + tonumber(time[2])
+
+local wait = 0
+local exceeded = 0
+local tats = {}
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[i * 2 - 1])
+    local period = tonumber(ARGV[i * 2]) * 1000
+    local interval = math.max(1, math.floor(period / limit))
+
+    local tat = tonumber(redis.call('GET', key) or now)
+    if tat < now then
+        tat = now
+    end
+
+    local new_tat = tat + interval
+    local allow_at = new_tat - period
+    if allow_at > now then
+        local rule_wait = math.max(1, math.ceil((allow_at - now) / 1000))
+        if rule_wait > wait then
+            wait = rule_wait
+            exceeded = i - 1
+        end
+    end
+    tats[i] = new_tat
+end
+if wait > 0 then
+    return {wait, exceeded}
+end
+
+for i, key in ipairs(KEYS) do
+    local new_tat = tats[i]
+    redis.call('SET', key, string.format('%d', new_tat), 'PX', math.ceil((new_tat - now) / 1000))
+end
+return {0, 0}"""
+
+SCRIPTS: Mapping[RateLimitAlgorithm, str] = MappingProxyType(
+    {
+        RateLimitAlgorithm.FIXED_WINDOW: FIXED_WINDOW_SCRIPT,
+        RateLimitAlgorithm.SLIDING_WINDOW: SLIDING_WINDOW_SCRIPT,
+        RateLimitAlgorithm.GCRA: GCRA_SCRIPT,
+    },
+)
+
+LEASE_SCRIPT = """local rules = #KEYS
+local requested = tonumber(ARGV[rules * 2 + 1])
+
+for i, key in ipairs(KEYS) do
+    local refund = tonumber(ARGV[rules * 2 + 1 + i] or "0")
+    local current = tonumber(redis.call('GET', key) or "0")
+    if refund > 0 and current > 0 then
+        redis.call('DECRBY', key, math.min(refund, current))
+    end
+end
+
+local granted = requested
+local wait = 0
+local exceeded = 0
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[i * 2 - 1])
+    local current = tonumber(redis.call('GET', key) or "0")
+    if current >= limit then
+        local rule_wait = redis.call('PTTL', key)
+        if rule_wait > wait then
+            wait = rule_wait
+            exceeded = i - 1
+        end
+    end
+    granted = math.min(granted, limit - current)
+end
+if granted <= 0 then
+    return {0, math.max(wait, 1), exceeded}
+end
+
+local reply = {granted}
+for i, key in ipairs(KEYS) do
+    redis.call('INCRBY', key, granted)
+    local pttl = redis.call('PTTL', key)
+    if pttl < 0 then
+        pttl = tonumber(ARGV[i * 2])
+        redis.call('PEXPIRE', key, pttl)
+    end
+    reply[i + 1] = pttl
+end
+return reply"""
+"""Reserves up to ``ARGV[#KEYS * 2 + 1]`` hits of fixed windows for a local quota.
+
+Takes the same keys and arguments as the algorithm scripts, the requested
+number of hits, then optionally the unused hits of the previous lease to give
+back to each key first. Returns the number of granted hits followed by the time
+in ms until the window of each key ends, or `0`, the time to wait and the index
+of the exceeded rule if none were granted.
+"""
@@ -1,47 +1,68 @@
+import asyncio
 import logging
-from collections.abc import Callable, Coroutine
+import time
+from collections.abc import Callable, Coroutine, Mapping, Sequence
 from dataclasses import dataclass
 from math import ceil
-from typing import Any
+from typing import Any, cast
 
-from litestar import Request
-from litestar.exceptions import TooManyRequestsException
+from litestar.connection import ASGIConnection
+from litestar.enums import ScopeType
+from litestar.exceptions import TooManyRequestsException, WebSocketException
+from litestar.status_codes import WS_1008_POLICY_VIOLATION
 from redis.asyncio import Redis
+from redis.commands.core import AsyncScript
+from redis.exceptions import RedisError
 
-UserIdentifier = Callable[[Request[Any, Any, Any]], Coroutine[Any, Any, str]]  # noqa: WPS221
+from app.config.constants import KEY_SEPARATOR
+from app.infrastructure.observability.metrics import (
+    rate_limiter_fallback_checks,
+    record_rate_limiter_circuit_state,
+)
+from app.infrastructure.web.auto_pipeline import AutoPipeline
+from app.infrastructure.web.circuit_breaker import CircuitBreaker, CircuitState
+from app.infrastructure.web.heavy_hitters import HeavyHitters
+from app.infrastructure.web.local_quota import LocalLimiter, LocalQuota
+from app.infrastructure.web.rate_limit_scripts import (
+    LEASE_SCRIPT,
+    SCRIPTS,
+    RateLimitAlgorithm,
+    Verdict,
+)
+
+Connection = ASGIConnection[Any, Any, Any, Any]
+UserIdentifier = Callable[[Connection], Coroutine[Any, Any, str]]
 HttpCallback = Callable[
-    [Request[Any, Any, Any], int],
+    [Connection, int],
     Coroutine[Any, Any, None],
 ]
 
 logger = logging.getLogger(__name__)
 
 
-async def default_identifier(request: Request[Any, Any, Any]) -> str:
+async def default_identifier(request: Connection) -> str:
     """
-    Generates a unique identifier for a request based on the client's IP address and the request path.
+    Generates an identifier for a request based on the client's IP address.
 
     The function first checks for the "X-Forwarded-For" header to get the client's IP address. If this header is not present,
-    it falls back to the IP address from the request's client information. The IP address is then concatenated with the request path.
+    it falls back to the IP address from the request's client information. The route is not part of the identifier,
+    the limiter adds the route handler to the key itself, so paths with parameters share a single key.
 
     Args:
-        request (Request[Any, Any, Any]): The incoming request object.
+        request (Connection): The incoming request or WebSocket connection.
 
     Returns:
-        str: A string that combines the client's IP address and the request path.
+        str: The client's IP address.
     """
     forwarded = request.headers.get("X-Forwarded-For")
-    ip = (
+    return (
         forwarded.split(",")[0]
         if forwarded
         else (request.client and request.client.host) or ""
     )
-    identifier = f"{ip}:{request.scope['path']}"
-    logger.info("Rate limit identifier: %s", identifier)
-    return identifier
 
 
-async def default_callback(request: Request[Any, Any, Any], pexpire: int) -> None:  # noqa: ARG001
+async def default_callback(request: Connection, pexpire: int) -> None:
     """
     Handles the default HTTP callback for rate limiting.
 
@@ -49,115 +70,399 @@ async def default_callback(request: Request[Any, Any, Any], pexpire: int) -> Non
     TooManyRequestsException with a message indicating that the rate limit
     has been exceeded and includes a 'Retry-After' header specifying the
     time (in seconds) after which the client can retry the request.
+    WebSocket connection attempts are closed with a policy violation instead.
 
     Args:
-        request (Request[Any, Any, Any]): The incoming HTTP request.
+        request (Connection): The incoming HTTP request or WebSocket connection.
         pexpire (int): The time in milliseconds after which the rate limit
                        will expire.
 
     Raises:
         TooManyRequestsException: Indicates that the rate limit has been
                                   exceeded.
+        WebSocketException: Indicates that the rate limit of WebSocket
+                            connections has been exceeded.
     """
     expire = ceil(pexpire / 1000)
+    if request.scope["type"] == ScopeType.WEBSOCKET:
+        raise WebSocketException(
+            detail=f"Rate limit exceeded, retry after {expire}s.",
+            code=WS_1008_POLICY_VIOLATION,
+        )
     raise TooManyRequestsException(
         detail="Rate limit exceeded.",
         headers={"Retry-After": str(expire)},
     )
 
 
-class RateLimiter:
-    lua_script = """local key = KEYS[1]
-local limit = tonumber(ARGV[1])
-local expire_time = ARGV[2]
-
-local current = tonumber(redis.call('get', key) or "0")
-if current > 0 then
- if current + 1 > limit then
- return redis.call("PTTL",key)
- else
-        redis.call("INCR", key)
- return 0
- end
-else
-    redis.call("SET", key, 1,"px",expire_time)
- return 0
-end"""
-
-    def __init__(
+@dataclass
+class RateLimitRule:
+    times: int = 1
+    milliseconds: int = 0
+    seconds: int = 0
+    minutes: int = 0
+    hours: int = 0
+    identifier: UserIdentifier | None = None
+    bucket: str | None = None
+    """Name of a bucket shared by every route using it, e.g. a tenant quota.
+
+    Routes count their hits in the same bucket even with different limits,
+    each enforcing its own limit, as long as they use the same window. By
+    default each route handler counts its own hits.
+    """
+
+    @property
+    def total_ms(self) -> int:
+        return (
+            self.milliseconds
+            + 1000 * self.seconds
+            + 60000 * self.minutes  # noqa: WPS432
+            + 3600000 * self.hours  # noqa: WPS432
+        )
+
+
+@dataclass
+class MessageRateLimit:
+    """Per-session rate of WebSocket messages, checked in process."""
+
+    rate: float
+    """Messages per second."""
+    burst: int = 1
+    """Messages allowed at once."""
+    max_delay: float = 1
+    """Seconds the messages of a client staying over the rate may be delayed in
+    total before the socket is closed."""
+
+
+@dataclass
+class RateLimit(RateLimitRule):
+    callback: HttpCallback | None = None
+    algorithm: RateLimitAlgorithm | None = None
+    """Overrides the algorithm the limiter was set up with."""
+    rules: Sequence[RateLimitRule] = ()
+    """Additional rules checked atomically with this one, e.g. an hourly quota."""
+    messages: MessageRateLimit | None = None
+    """Rate of messages received in a WebSocket session.
+
+    The connection attempts are limited by the rules.
+    """
+
+
+class RateLimiter:  # noqa: WPS214, WPS230 one entry point, internals split by tier
+    def __init__(  # noqa: PLR0913, PLR0917, WPS211 components of the optional tiers
         self,
         redis: Redis,
         prefix: str,
-        lua_sha: str,
+        scripts: Mapping[RateLimitAlgorithm, AsyncScript],
         identifier: UserIdentifier,
         callback: HttpCallback,
+        algorithm: RateLimitAlgorithm = RateLimitAlgorithm.FIXED_WINDOW,
+        lease_script: AsyncScript | None = None,
+        local_quota: LocalQuota | None = None,
+        auto_pipeline: AutoPipeline | None = None,
+        timeout: float | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        heavy_hitters: HeavyHitters | None = None,
     ) -> None:
         self.redis = redis
         self.prefix = prefix
-        self.lua_sha = lua_sha
+        self.scripts = scripts
         self.identifier = identifier
         self.callback = callback
+        self.algorithm = algorithm
+        self.lease_script = lease_script
+        self.local_quota = local_quota
+        self.auto_pipeline = auto_pipeline
+        self.timeout = timeout
+        self.circuit_breaker = circuit_breaker
+        self.heavy_hitters = heavy_hitters
+        self.fallback = LocalLimiter()
+        self._refills: dict[str, asyncio.Future[Verdict]] = {}
+        self._recording: set[asyncio.Task[None]] = set()
 
-    async def __call__(  # noqa: WPS210 Ok here
-        self,
-        request: Request[Any, Any, Any],
-        times: int,
-        milliseconds: int,
-        identifier: UserIdentifier | None = None,
-        callback: HttpCallback | None = None,
-    ) -> None:
-        identifier = identifier or self.identifier
-        callback = callback or self.callback
-        rate_key = await identifier(request)
-        view_id = request.route_handler.handler_id
-        key = f"{self.prefix}:{rate_key}:{view_id}"
-        pexpire = await self._check(key, times, milliseconds)
+    async def __call__(self, request: Connection, limit: RateLimit) -> None:  # noqa: WPS210 Ok here
+        """Count a hit of the request, calling the callback if any rule is exceeded.
+
+        The main rule of `limit` and its additional `rules` are checked
+        atomically in the same script call. Keys are built from the route
+        handler, never from the concrete path.
+        """
+        algorithm = limit.algorithm or self.algorithm
+        kind = algorithm if self.local_quota is None else "lease"
+        route = request.route_handler.handler_id
+        identifier = limit.identifier or self.identifier
+        rules = (limit, *limit.rules)
+        identities = await _identities(request, identifier, rules)
+        keys = [
+            self._key(kind, identities[rule.identifier or identifier], route, rule)
+            for rule in rules
+        ]
+        args = [str(arg) for rule in rules for arg in (rule.times, rule.total_ms)]
+
+        pexpire, exceeded = await self._guarded_check(
+            algorithm,
+            keys,
+            args,
+            min(rule.times for rule in rules),
+        )
         if pexpire != 0:
-            await callback(request, pexpire)
+            rule = rules[exceeded]
+            self._record_throttled(identities[rule.identifier or identifier], route)
+            await (limit.callback or self.callback)(request, pexpire)
 
     @classmethod
-    async def setup(
+    async def setup(  # noqa: PLR0913, PLR0917, WPS211 mirrors the settings
         cls,
         redis: Redis,
         prefix: str,
         identifier: UserIdentifier | None = None,
         callback: HttpCallback | None = None,
+        algorithm: RateLimitAlgorithm = RateLimitAlgorithm.FIXED_WINDOW,
+        local_lease_ratio: float | None = None,
+        auto_pipeline_delay: float | None = None,
+        check_timeout: float | None = None,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 5,
+        heavy_hitters: HeavyHitters | None = None,
     ) -> "RateLimiter":
-        lua_sha = await redis.script_load(cls.lua_script)
-        return cls(
+        """Load the scripts and create a limiter.
+
+        The scripts are loaded again if Redis loses them, after a restart,
+        a failover or a ``SCRIPT FLUSH``.
+
+        Args:
+            redis: Redis client storing the counters.
+            prefix: Prefix of the rate limiter keys.
+            identifier: Default client identifier.
+            callback: Default callback invoked when the limit is exceeded.
+            algorithm: Default algorithm.
+            local_lease_ratio: Enables the local tier, see `LocalQuota`. The
+                local tier only supports the fixed window algorithm.
+            auto_pipeline_delay: Enables auto pipelining, checks issued within
+                this many seconds are sent as one pipeline, see `AutoPipeline`.
+            check_timeout: Latency budget of a check in seconds. Enables a circuit
+                breaker switching to an in-process `LocalLimiter` while Redis
+                is slow or down.
+            failure_threshold: Consecutive failed checks opening the circuit.
+            recovery_timeout: Seconds before an open circuit probes Redis again.
+            heavy_hitters: Tracks the top throttled identifiers and routes.
+
+        Returns:
+            RateLimiter: Configured rate limiter.
+
+        Raises:
+            ValueError: The local tier is enabled with another algorithm than
+                the fixed window.
+        """
+        await asyncio.gather(
+            *map(redis.script_load, (*SCRIPTS.values(), LEASE_SCRIPT)),
+        )
+        local_quota = LocalQuota(local_lease_ratio) if local_lease_ratio else None
+        auto_pipeline = (
+            None
+            if auto_pipeline_delay is None
+            else AutoPipeline(redis, max_delay=auto_pipeline_delay)
+        )
+        limiter = cls(
             redis,
             prefix,
-            lua_sha,
+            {
+                algorithm: redis.register_script(script)
+                for algorithm, script in SCRIPTS.items()
+            },
             identifier or default_identifier,
             callback or default_callback,
+            algorithm,
+            lease_script=redis.register_script(LEASE_SCRIPT),
+            local_quota=local_quota,
+            auto_pipeline=auto_pipeline,
+            timeout=check_timeout,
+            circuit_breaker=(
+                CircuitBreaker(
+                    failure_threshold,
+                    recovery_timeout,
+                    on_state_change=record_rate_limiter_circuit_state,
+                )
+                if check_timeout
+                else None
+            ),
+            heavy_hitters=heavy_hitters,
         )
+        limiter.check_algorithm()
+        return limiter
 
-    async def _check(self, key: str, times: int, millisecods: int) -> int:
-        pexpire = await self.redis.evalsha(
-            self.lua_sha,
-            1,
-            key,
-            str(times),
-            str(millisecods),
-        )  # type: ignore  # noqa: PGH003
-        return int(pexpire)
+    def check_algorithm(self, algorithm: RateLimitAlgorithm | None = None) -> None:
+        """Reject an algorithm the limiter cannot enforce.
 
+        The local tier leases hits from fixed windows whatever the algorithm,
+        so a sliding window or GCRA limit would allow fixed window bursts.
 
-@dataclass
-class RateLimit:
-    times: int = 1
-    milliseconds: int = 0
-    seconds: int = 0
-    minutes: int = 0
-    hours: int = 0
-    identifier: UserIdentifier | None = None
-    callback: HttpCallback | None = None
+        Args:
+            algorithm: Algorithm of a route, the default one if `None`.
 
-    @property
-    def total_ms(self) -> int:
-        return (
-            self.milliseconds
-            + 1000 * self.seconds
-            + 60000 * self.minutes  # noqa: WPS432
-            + 3600000 * self.hours  # noqa: WPS432
+        Raises:
+            ValueError: The local tier is enabled and the algorithm is not a
+                fixed window.
+        """
+        algorithm = algorithm or self.algorithm
+        if self.local_quota is None or algorithm == RateLimitAlgorithm.FIXED_WINDOW:
+            return
+        msg = f"The local lease tier only counts fixed windows, not {algorithm}"
+        raise ValueError(msg)
+
+    def _key(
+        self,
+        kind: str,
+        identity: str,
+        route: str,
+        rule: RateLimitRule,
+    ) -> str:
+        # Routes sharing a bucket share its counter whatever their limits, the
+        # window is part of the key as counters of other windows are unrelated.
+        scope = (
+            (rule.bucket, rule.total_ms)
+            if rule.bucket
+            else (route, rule.times, rule.total_ms)
+        )
+        return KEY_SEPARATOR.join(map(str, (self.prefix, kind, identity, *scope)))
+
+    def _record_throttled(self, identity: str, route: str) -> None:
+        # Recorded in the background, throttled clients are answered at once.
+        if self.heavy_hitters is None or (
+            self.circuit_breaker is not None
+            and self.circuit_breaker.state != CircuitState.CLOSED
+        ):
+            return
+        record = asyncio.wait_for(
+            self.heavy_hitters.record(identity, route), self.timeout
+        )
+        task = asyncio.create_task(record)
+        self._recording.add(task)
+        task.add_done_callback(self._recorded)
+
+    def _recorded(self, task: asyncio.Task[None]) -> None:
+        self._recording.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(
+                "Failed to record a throttled hit", exc_info=task.exception()
+            )
+
+    async def _guarded_check(
+        self,
+        algorithm: RateLimitAlgorithm,
+        keys: Sequence[str],
+        args: Sequence[str],
+        times: int,
+    ) -> Verdict:
+        if self.circuit_breaker is None:
+            return await self._redis_check(algorithm, keys, args, times)
+        if not self.circuit_breaker.allow_request():
+            rate_limiter_fallback_checks.inc()
+            return self.fallback(keys, args)
+
+        try:
+            async with asyncio.timeout(self.timeout):
+                verdict = await self._redis_check(algorithm, keys, args, times)
+        except (TimeoutError, RedisError, OSError):
+            self.circuit_breaker.record_failure()
+            rate_limiter_fallback_checks.inc()
+            return self.fallback(keys, args)
+        self.circuit_breaker.record_success()
+        return verdict
+
+    async def _redis_check(
+        self,
+        algorithm: RateLimitAlgorithm,
+        keys: Sequence[str],
+        args: Sequence[str],
+        times: int,
+    ) -> Verdict:
+        if self.local_quota is None:
+            return await self._check(algorithm, keys, args)
+        return await self._check_local(keys, args, times)
+
+    async def _check(
+        self,
+        algorithm: RateLimitAlgorithm,
+        keys: Sequence[str],
+        args: Sequence[str],
+    ) -> Verdict:
+        pexpire, exceeded = await self._run(self.scripts[algorithm], keys, args)
+        return int(pexpire), int(exceeded)
+
+    async def _run(
+        self,
+        script: AsyncScript,
+        keys: Sequence[str],
+        args: Sequence[str],
+    ) -> Any:
+        if self.auto_pipeline is not None:
+            return await self.auto_pipeline.run(script, keys, args)
+        return await script(keys=keys, args=args)
+
+    async def _check_local(
+        self,
+        keys: Sequence[str],
+        args: Sequence[str],
+        times: int,
+    ) -> Verdict:
+        local_quota = cast("LocalQuota", self.local_quota)
+        lease_key = "|".join(keys)
+        while not local_quota.take(lease_key):
+            verdict = await self._refill(lease_key, keys, args, times)
+            if verdict[0] != 0:
+                return verdict
+        return 0, 0
+
+    async def _refill(
+        self,
+        lease_key: str,
+        keys: Sequence[str],
+        args: Sequence[str],
+        times: int,
+    ) -> Verdict:
+        # Concurrent requests for the same key share a single lease call.
+        refill = self._refills.get(lease_key)
+        if refill is None:
+            refill = asyncio.ensure_future(self._lease(lease_key, keys, args, times))
+            self._refills[lease_key] = refill
+            refill.add_done_callback(lambda _: self._refills.pop(lease_key, None))
+        return await asyncio.shield(refill)
+
+    async def _lease(
+        self,
+        lease_key: str,
+        keys: Sequence[str],
+        args: Sequence[str],
+        times: int,
+    ) -> Verdict:
+        local_quota = cast("LocalQuota", self.local_quota)
+        refunds = map(str, local_quota.release(lease_key))
+        started = time.monotonic()
+        granted, *pttls = map(
+            int,
+            await self._run(
+                cast("AsyncScript", self.lease_script),
+                keys,
+                (*args, str(local_quota.lease_size(times)), *refunds),
+            ),
         )
+        if granted == 0:
+            return max(pttls[0], 1), pttls[1]
+        local_quota.grant(lease_key, granted, pttls, started)
+        return 0, 0
+
+
+async def _identities(
+    request: Connection,
+    identifier: UserIdentifier,
+    rules: Sequence[RateLimitRule],
+) -> dict[UserIdentifier, str]:
+    """Identity of the client for every identifier of the rules."""
+    identities: dict[UserIdentifier, str] = {}
+    for rule in rules:
+        rule_identifier = rule.identifier or identifier
+        if rule_identifier not in identities:
+            # Rules rarely have their own identifier, awaited once.
+            identities[rule_identifier] = await rule_identifier(request)  # noqa: WPS476
+    return identities
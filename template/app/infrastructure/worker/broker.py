@@ -1,5 +1,78 @@
+import json
+from collections.abc import Awaitable, Callable, Mapping
+from typing import Any
+
+import msgpack
+from faststream.message import StreamMessage, gen_cor_id
 from faststream.redis import RedisBroker
+from faststream.redis.message import RedisBatchStreamMessage, bDATA_KEY
+from faststream.redis.parser import BinaryMessageFormatV1
+
+from app.infrastructure.adapters.codec import (
+    CONTENT_TYPE,
+    MessageFormat,
+    decode_message,
+)
+
+type Parser = Callable[[Mapping[str, Any]], Awaitable[StreamMessage[Any]]]
+type Entry = tuple[bytes, dict[str, Any]]
+"""Body and headers of a stream entry."""
 
 
 def get_broker(url: str, db: int = 1) -> RedisBroker:
-    return RedisBroker(url, db=db)
+    return RedisBroker(url, db=db, parser=parse_message, decoder=decode_message)
+
+
+async def parse_message(
+    message: Mapping[str, Any],
+    original_parser: Parser,
+) -> StreamMessage[Any]:
+    """Parse batches with msgpack entries, leaving other messages to FastStream.
+
+    FastStream reads the entries of a batch as JSON. A batch with msgpack
+    entries gets a msgpack array body instead, built from the entry bodies
+    without decoding them.
+    """
+    if message.get("type") != "bstream":
+        return await original_parser(message)
+    entries = [
+        BinaryMessageFormatV1.parse(entry.get(bDATA_KEY, b""))
+        for entry in message["data"]
+    ]
+    if not any(_is_msgpack(headers) for _, headers in entries):
+        return await original_parser(message)
+    return _msgpack_batch(message, entries)
+
+
+def _msgpack_batch(
+    message: Mapping[str, Any],
+    entries: list[Entry],
+) -> RedisBatchStreamMessage:
+    packer = msgpack.Packer()
+    body = packer.pack_array_header(len(entries)) + b"".join(
+        _msgpack_body(packer, entry) for entry in entries
+    )
+    batch_headers = [headers for _, headers in entries]
+    headers = {**batch_headers[0], CONTENT_TYPE: MessageFormat.MSGPACK.value}
+    message_id = gen_cor_id()
+    return RedisBatchStreamMessage(
+        raw_message=message,  # type: ignore[arg-type]
+        body=body,
+        headers=headers,
+        batch_headers=batch_headers,
+        reply_to=headers.get("reply_to", ""),
+        content_type=headers[CONTENT_TYPE],
+        message_id=headers.get("message_id", message_id),
+        correlation_id=headers.get("correlation_id", message_id),
+    )
+
+
+def _msgpack_body(packer: msgpack.Packer, entry: Entry) -> bytes:
+    payload, headers = entry
+    if _is_msgpack(headers):
+        return payload
+    return bytes(packer.pack(json.loads(payload)))
+
+
+def _is_msgpack(headers: Mapping[str, Any]) -> bool:
+    return bool(headers.get(CONTENT_TYPE) == MessageFormat.MSGPACK)
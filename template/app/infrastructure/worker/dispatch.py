@@ -0,0 +1,131 @@
+"""Routing of the events of a stream to their handlers by event type."""
+
+import logging
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from dishka import AsyncContainer
+from pydantic import TypeAdapter
+
+from app.application.common.event import BatchEventHandler, Event, EventHandler
+from app.infrastructure.adapters.codec import Message, type_name
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class _Route:
+    adapter: TypeAdapter[Message[Any]]
+    handler_type: type[EventHandler[Any, Any]]
+
+
+@dataclass(frozen=True, slots=True)
+class _BatchRoute:
+    adapter: TypeAdapter[Message[Any]]
+    handler_type: type[BatchEventHandler[Any, Any]]
+
+
+class EventDispatcher:
+    """Handle the messages of a stream with the handler of their event type.
+
+    The `type` of a message selects its route in a table built once the
+    handlers are registered, and the message is validated against the event
+    class of that route only. Messages of types without a handler are skipped,
+    so several event types share one stream and one subscriber.
+
+    Example:
+        ```python
+        dispatcher = EventDispatcher()
+        dispatcher.register(SampleNumberRequestedEvent, SampleNumberEventHandler)
+
+
+        @group_subscriber(router, "sample")
+        async def sample_events(
+            body: dict[str, Any],
+            container: Depends[AsyncContainer],
+        ) -> None:
+            await dispatcher.dispatch(body, container)
+        ```
+
+    Batches read with `batch_stream` are passed to `dispatch_batch`, the
+    events of a type registered with `register_batch` reaching its handler as
+    one list.
+    """
+
+    def __init__(self) -> None:
+        self._routes: dict[str, _Route] = {}
+        self._batch_routes: dict[str, _BatchRoute] = {}
+
+    def register[Req: Event](
+        self,
+        event_type: type[Req],
+        handler_type: type[EventHandler[Req, Any]],
+    ) -> None:
+        """Handle the events of `event_type` with `handler_type` from the container."""
+        self._routes[type_name(event_type)] = _Route(
+            adapter=TypeAdapter(Message[event_type]),  # type: ignore[valid-type]
+            handler_type=handler_type,
+        )
+
+    def register_batch[Req: Event](
+        self,
+        event_type: type[Req],
+        handler_type: type[BatchEventHandler[Req, Any]],
+    ) -> None:
+        """Handle the batches of `event_type` with `handler_type` from the container."""
+        self._batch_routes[type_name(event_type)] = _BatchRoute(
+            adapter=TypeAdapter(Message[event_type]),  # type: ignore[valid-type]
+            handler_type=handler_type,
+        )
+
+    @property
+    def event_types(self) -> list[str]:
+        return list({**self._routes, **self._batch_routes})
+
+    async def dispatch(
+        self, body: Mapping[str, Any], container: AsyncContainer
+    ) -> None:
+        """Validate a decoded message and pass its event to the handler of its type."""
+        route = self._routes.get(body.get("type", ""))
+        if route is None:
+            logger.debug("No handler of %s events, skipped", body.get("type"))
+            return
+        message = route.adapter.validate_python(body)
+        event_handler = await container.get(route.handler_type)
+        await event_handler(message.data)
+
+    async def dispatch_batch(
+        self, bodies: Sequence[Mapping[str, Any]], container: AsyncContainer
+    ) -> None:
+        """Pass the events of a batch to the handlers of their types.
+
+        The events of a type with a batch handler are passed to it at once, in
+        stream order, once the other events went to their handlers one by one.
+
+        Example:
+            ```python
+            @router.subscriber(stream=batch_stream("sample", max_size=500))
+            async def sample_events(
+                bodies: list[dict[str, Any]],
+                container: Depends[AsyncContainer],
+            ) -> None:
+                await dispatcher.dispatch_batch(bodies, container)
+            ```
+        """
+        batches: dict[_BatchRoute, list[Event]] = {}
+        for body in bodies:
+            route = self._batch_routes.get(body.get("type", ""))
+            if route is None:
+                await self.dispatch(body, container)  # noqa: WPS476 in stream order
+                continue
+            message = route.adapter.validate_python(body)
+            batches.setdefault(route, []).append(message.data)
+        for route, events in batches.items():
+            await self._handle_batch(route, events, container)  # noqa: WPS476 in stream order
+
+    async def _handle_batch(
+        self, route: _BatchRoute, events: list[Event], container: AsyncContainer
+    ) -> None:
+        event_handler = await container.get(route.handler_type)
+        await event_handler(events)
@@ -1,15 +1,48 @@
+import asyncio
 import logging.config  # noqa: WPS301
+from typing import Any
 
-from dishka import make_async_container
+from dishka import AsyncContainer, make_async_container
 from dishka.integrations.faststream import setup_dishka
 from faststream import FastStream
+from faststream.redis import RedisBroker
 
 from app.config.base import Settings, get_settings
+from app.infrastructure.adapters.claim_check import ClaimCheck
+from app.infrastructure.adapters.dedup import MessageDeduplicator
+from app.infrastructure.adapters.outbox import OutboxRelay
+from app.infrastructure.adapters.retention import StreamTrimmer
+from app.infrastructure.adapters.scheduler import DelayedDelivery
+from app.infrastructure.adapters.stream_monitor import StreamMonitor
 from app.infrastructure.di.registry import get_providers
 from app.infrastructure.observability.log.config import get_logging_config
 from app.infrastructure.observability.sentry import configure_sentry
 from app.infrastructure.worker.broker import get_broker
-from app.presentation.workers.router import router
+from app.infrastructure.worker.middlewares import (
+    ClaimCheckMiddleware,
+    DeduplicationMiddleware,
+    MetricsMiddleware,
+)
+from app.infrastructure.worker.partitions import PartitionedConsumers
+from app.infrastructure.worker.priorities import PriorityMiddleware
+from app.presentation.workers.router import partitioned_router, router
+
+
+class _BackgroundServices:
+    """Services resolved from the container, running until the worker stops."""
+
+    def __init__(self, container: AsyncContainer, services: list[type[Any]]) -> None:
+        self.container = container
+        self.services = services
+        self._tasks: list[asyncio.Task[None]] = []
+
+    async def start(self) -> None:
+        runners = await asyncio.gather(*map(self.container.get, self.services))
+        self._tasks = [asyncio.create_task(runner.run()) for runner in runners]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
 
 
 def create_app() -> FastStream:
@@ -32,6 +65,61 @@ def create_app() -> FastStream:
 
     broker = get_broker(settings.redis.url, db=settings.redis.broker_db)
     broker.include_router(router)
+    _add_middlewares(broker, container, settings)
     app = FastStream(broker)
     setup_dishka(container, app, auto_inject=True)
+    _run_background_tasks(app, container, settings)
+    _run_partitioned_consumers(app, container, broker, settings)
     return app
+
+
+def run_worker() -> None:
+    """Run the worker application in this process until stopped."""
+    asyncio.run(create_app().run())
+
+
+def _add_middlewares(
+    broker: RedisBroker,
+    container: AsyncContainer,
+    settings: Settings,
+) -> None:
+    broker.add_middleware(PriorityMiddleware)
+    broker.add_middleware(MetricsMiddleware)
+    broker.add_middleware(ClaimCheckMiddleware(container))
+    if settings.streams.dedup:
+        broker.add_middleware(DeduplicationMiddleware(container))
+
+
+def _run_background_tasks(
+    app: FastStream,
+    container: AsyncContainer,
+    settings: Settings,
+) -> None:
+    services: list[type[Any]] = [
+        StreamTrimmer,
+        DelayedDelivery,
+        ClaimCheck,
+        StreamMonitor,
+        OutboxRelay,
+    ]
+    if settings.streams.dedup:
+        services.append(MessageDeduplicator)
+    background = _BackgroundServices(container, services)
+    app.after_startup(background.start)
+    app.on_shutdown(background.stop)
+
+
+def _run_partitioned_consumers(
+    app: FastStream,
+    container: AsyncContainer,
+    broker: RedisBroker,
+    settings: Settings,
+) -> None:
+    consumers = PartitionedConsumers(
+        broker,
+        container,
+        partitioned_router,
+        interval=settings.streams.rebalance_interval,
+    )
+    app.after_startup(consumers.start)
+    app.on_shutdown(consumers.close)
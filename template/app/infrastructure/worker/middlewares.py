@@ -0,0 +1,195 @@
+"""Broker middlewares of the worker."""
+
+import asyncio
+import time
+from collections.abc import Mapping
+from itertools import compress
+from typing import Any
+
+import msgpack
+from dishka import AsyncContainer
+from faststream import BaseMiddleware
+from faststream.exceptions import NackMessage
+from faststream.message import StreamMessage
+from faststream.types import AsyncFuncAny
+
+from app.infrastructure.adapters.claim_check import (
+    REFERENCE_KEY,
+    ClaimCheck,
+    is_reference,
+)
+from app.infrastructure.adapters.codec import MessageFormat
+from app.infrastructure.adapters.dedup import Claim, MessageDeduplicator
+from app.infrastructure.observability.metrics import (
+    stream_handled_messages,
+    stream_handler_seconds,
+)
+
+
+class MetricsMiddleware(BaseMiddleware):
+    """Count the handled messages and time their handlers, by stream and group."""
+
+    async def consume_scope(
+        self, call_next: AsyncFuncAny, msg: StreamMessage[Any]
+    ) -> Any:
+        labels = (
+            str(msg.raw_message["channel"]),
+            subscriber_group(self.context.get_local("handler_"), msg),
+        )
+        started = time.perf_counter()
+        try:
+            response = await call_next(msg)
+        except Exception:
+            _observe(labels, started, "error")
+            raise
+        _observe(labels, started, "success")
+        return response
+
+
+class ClaimCheckMiddleware:
+    """Load the payloads of claim check references before the handler runs.
+
+    Blobs are fetched only for messages carrying a reference. The entries of a
+    batch are loaded concurrently and the batch gets a msgpack body.
+    """
+
+    def __init__(self, container: AsyncContainer) -> None:
+        self.container = container
+
+    def __call__(self, *args: Any, **kwargs: Any) -> "_ClaimCheckMiddleware":
+        return _ClaimCheckMiddleware(self.container, *args, **kwargs)
+
+
+class _ClaimCheckMiddleware(BaseMiddleware):
+    def __init__(self, container: AsyncContainer, *args: Any, **kwargs: Any) -> None:
+        self.container = container
+        super().__init__(*args, **kwargs)
+
+    async def consume_scope(
+        self, call_next: AsyncFuncAny, msg: StreamMessage[Any]
+    ) -> Any:
+        body = await msg.decode()
+        if is_reference(body):
+            claim_check = await self.container.get(ClaimCheck)
+            msg.body = await claim_check.store.get(body[REFERENCE_KEY])
+            msg.clear_cache()
+        elif isinstance(body, list) and any(is_reference(entry) for entry in body):
+            await self._load_batch(msg, body)
+        return await call_next(msg)
+
+    async def _load_batch(self, msg: StreamMessage[Any], body: list[Any]) -> None:
+        claim_check = await self.container.get(ClaimCheck)
+        headers = getattr(msg, "batch_headers", None) or [msg.headers for _ in body]
+        entries = await asyncio.gather(
+            *(
+                claim_check.load(entry, entry_headers.get("content-type"))
+                for entry, entry_headers in zip(body, headers, strict=True)
+            ),
+        )
+        msg.body = msgpack.packb(entries)
+        msg.content_type = MessageFormat.MSGPACK.value
+        msg.clear_cache()
+
+
+class DeduplicationMiddleware:
+    """Skip messages whose `Message.id` was already handled by the consumer group.
+
+    A message claimed by another consumer is left pending, to be handled
+    again once its claim expires if that consumer did not complete it. The
+    duplicates of a batch are removed from it, and the whole batch is left
+    pending when one of its messages is claimed by another consumer. Messages
+    without an id are handled as they are.
+    """
+
+    def __init__(self, container: AsyncContainer) -> None:
+        self.container = container
+
+    def __call__(self, *args: Any, **kwargs: Any) -> "_DeduplicationMiddleware":
+        return _DeduplicationMiddleware(self.container, *args, **kwargs)
+
+
+class _DeduplicationMiddleware(BaseMiddleware):
+    def __init__(self, container: AsyncContainer, *args: Any, **kwargs: Any) -> None:
+        self.container = container
+        super().__init__(*args, **kwargs)
+
+    async def consume_scope(
+        self, call_next: AsyncFuncAny, msg: StreamMessage[Any]
+    ) -> Any:
+        body = await msg.decode()
+        if isinstance(body, list):
+            return await self._consume_batch(call_next, msg, body)
+        message_id = self._message_id(body)
+        if message_id is None:
+            return await call_next(msg)
+
+        group = subscriber_group(self.context.get_local("handler_"), msg)
+        deduplicator = await self.container.get(MessageDeduplicator)
+        async with deduplicator.handling(group, message_id) as claim:
+            if claim == Claim.DUPLICATE:
+                return None
+            if claim == Claim.IN_FLIGHT:
+                raise NackMessage
+            return await call_next(msg)
+
+    async def _consume_batch(
+        self, call_next: AsyncFuncAny, msg: StreamMessage[Any], body: list[Any]
+    ) -> Any:
+        message_ids = [self._message_id(entry) for entry in body]
+        if not any(message_ids):
+            return await call_next(msg)
+
+        group = subscriber_group(self.context.get_local("handler_"), msg)
+        deduplicator = await self.container.get(MessageDeduplicator)
+        async with deduplicator.handling_batch(
+            group, filter(None, message_ids)
+        ) as claims:
+            if Claim.IN_FLIGHT in claims.values():
+                raise NackMessage
+            keep = self._kept(message_ids, claims)
+            if not any(keep):
+                return None
+            if not all(keep):
+                self._filter_batch(msg, body, keep)
+            return await call_next(msg)
+
+    def _message_id(self, body: Any) -> str | None:
+        if isinstance(body, Mapping) and body.get("id"):
+            return str(body["id"])
+        return None
+
+    def _kept(
+        self, message_ids: list[str | None], claims: Mapping[str, Claim]
+    ) -> list[bool]:
+        """Entries that are neither handled already nor repeated in the batch."""
+        seen: set[str] = set()
+        keep = []
+        for message_id in message_ids:
+            if message_id is None:
+                keep.append(True)
+                continue
+            keep.append(claims[message_id] == Claim.NEW and message_id not in seen)
+            seen.add(message_id)
+        return keep
+
+    def _filter_batch(
+        self, msg: StreamMessage[Any], body: list[Any], keep: list[bool]
+    ) -> None:
+        """Keep the entries of a batch, and their headers, selected by `keep`."""
+        batch_headers = getattr(msg, "batch_headers", None)
+        if batch_headers:
+            msg.batch_headers = list(compress(batch_headers, keep))
+        msg.body = msgpack.packb(list(compress(body, keep)))
+        msg.content_type = MessageFormat.MSGPACK.value
+        msg.clear_cache()
+
+
+def subscriber_group(subscriber: object, msg: StreamMessage[Any]) -> str:
+    """Consumer group of the subscriber handling `msg`, its stream without a group."""
+    stream_sub = getattr(subscriber, "stream_sub", None)
+    return getattr(stream_sub, "group", None) or str(msg.raw_message["channel"])
+
+
+def _observe(labels: tuple[str, str], started: float, outcome: str) -> None:
+    stream_handler_seconds.labels(*labels).observe(time.perf_counter() - started)
+    stream_handled_messages.labels(*labels, outcome).inc()
@@ -0,0 +1,303 @@
+"""Assignment of stream partitions to worker processes."""
+
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from dishka import AsyncContainer
+from faststream.redis import RedisBroker
+from faststream.redis.subscriber.usecases import LogicSubscriber
+from redis.asyncio import Redis
+from redis.asyncio.lock import Lock
+from redis.exceptions import LockError
+
+from app.infrastructure.adapters.partitions import StreamPartitions
+from app.infrastructure.worker.streams import (
+    consumer_name,
+    group_stream,
+    reclaim_stream,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class PartitionedSubscription:
+    namespace: str
+    func: Callable[..., Any]
+    group: str
+    reclaim_after: float | None
+
+    def subscribe(self, broker: RedisBroker, stream: str) -> list[LogicSubscriber]:
+        """Subscribers of a partition, started and stopped with the partition."""
+        # Entries are read one at a time, so a released partition has no
+        # entries read but not handled, which its next process would skip.
+        streams = [group_stream(stream, self.group, max_size=1)]
+        if self.reclaim_after is not None:
+            streams.append(
+                reclaim_stream(stream, self.group, min_idle_time=self.reclaim_after),
+            )
+        subscribers: list[LogicSubscriber] = []
+        for stream_sub in streams:
+            subscriber = broker.subscriber(stream=stream_sub, persistent=False)
+            subscriber(self.func)
+            subscribers.append(subscriber)
+        return subscribers
+
+
+class PartitionedRouter:
+    """Handlers of partitioned namespaces.
+
+    Unlike the subscribers of a `RedisRouter`, the subscribers of a partition
+    are started by `PartitionedConsumer` once the partition is assigned to the
+    process.
+
+    Example:
+        ```python
+        @partitioned_router.subscriber("orders")
+        async def order_event(message: Message[OrderEvent]) -> None:
+            logger.info("Order event received: %s", message)
+        ```
+    """
+
+    def __init__(self) -> None:
+        self.subscriptions: list[PartitionedSubscription] = []
+
+    def subscriber[Func: Callable[..., Any]](
+        self,
+        namespace: str,
+        *,
+        group: str | None = None,
+        reclaim_after: float | None = 300,
+    ) -> Callable[[Func], Func]:
+        """Subscribe a handler to the partitions of `namespace`.
+
+        Args:
+            namespace: Partitioned namespace.
+            group: Consumer group, the namespace by default.
+            reclaim_after: Seconds an entry is pending before it is claimed,
+                `None` to leave pending entries, see `reclaim_stream`.
+        """
+
+        def decorator(func: Func) -> Func:
+            self.subscriptions.append(
+                PartitionedSubscription(
+                    namespace=namespace,
+                    func=func,
+                    group=group or namespace,
+                    reclaim_after=reclaim_after,
+                ),
+            )
+            return func
+
+        return decorator
+
+    def include_router(self, router: "PartitionedRouter") -> None:
+        self.subscriptions.extend(router.subscriptions)
+
+
+class PartitionAssigner:
+    """Share the partitions of a namespace among the live worker processes.
+
+    Processes register in the ``{namespace}:consumers`` sorted set, scored
+    with the time their registration expires. Every process derives the same
+    assignment from the sorted live members: partition ``i`` goes to member
+    ``i % len(members)``.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        namespace: str,
+        partitions: int,
+        consumer: str,
+        ttl: float,
+    ) -> None:
+        self.redis = redis
+        self.key = f"{namespace}:consumers"
+        self.partitions = partitions
+        self.consumer = consumer
+        self.ttl = ttl
+
+    async def assign(self) -> set[int]:
+        """Renew the registration of the process and return its partitions."""
+        now = time.time()
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zadd(self.key, {self.consumer: now + self.ttl})
+            pipe.zremrangebyscore(self.key, "-inf", now)
+            pipe.zrange(self.key, 0, -1)
+            pipe.expire(self.key, int(self.ttl) + 1)
+            *_, members, _ = await pipe.execute()
+        consumers = sorted(_decode(member) for member in members)
+        index = consumers.index(self.consumer)
+        return {
+            partition
+            for partition in range(self.partitions)
+            if partition % len(consumers) == index
+        }
+
+    async def leave(self) -> None:
+        await self.redis.zrem(self.key, self.consumer)
+
+
+class PartitionedConsumer:  # noqa: WPS214 one method per partition step
+    """Run the subscribers of the partitions of a namespace assigned to the process.
+
+    A partition is read by a single process, holding a lock renewed on every
+    rebalance, and its entries are handled one at a time, so events with the
+    same key are handled in the order they were published. Entries handled
+    again after a failure are the exception. When processes start or stop,
+    partitions are released once their handlers finish and taken by their
+    new process on its next rebalance.
+    """
+
+    def __init__(
+        self,
+        broker: RedisBroker,
+        redis: Redis,
+        subscription: PartitionedSubscription,
+        partitions: StreamPartitions,
+        interval: float = 5,
+    ) -> None:
+        """Initialize PartitionedConsumer.
+
+        Args:
+            broker: Broker of the worker, running the subscribers.
+            redis: Redis client of the broker.
+            subscription: Handler of the namespace.
+            partitions: Partitions of the namespaces.
+            interval: Seconds between rebalances. Partitions of a stopped
+                process are taken after three intervals.
+        """
+        self.broker = broker
+        self.redis = redis
+        self.subscription = subscription
+        self.interval = interval
+        self.streams = partitions.streams(subscription.namespace)
+        self._assigner = PartitionAssigner(
+            redis,
+            subscription.namespace,
+            len(self.streams),
+            consumer_name(),
+            ttl=interval * 3,
+        )
+        self._locks: dict[int, Lock] = {}
+        self._subscribers: dict[int, list[LogicSubscriber]] = {}
+        self._running: set[int] = set()
+
+    async def run(self) -> None:
+        """Rebalance every `interval` seconds until cancelled."""
+        while True:
+            try:
+                await self.rebalance()
+            except Exception:
+                logger.exception(
+                    "Failed to rebalance partitions of %s",
+                    self.subscription.namespace,
+                )
+            await asyncio.sleep(self.interval)
+
+    async def rebalance(self) -> None:
+        assigned = await self._assigner.assign()
+        await asyncio.gather(*map(self._release, self._running - assigned))
+        await asyncio.gather(*map(self._acquire, sorted(assigned)))
+
+    async def close(self) -> None:
+        """Stop the subscribers and release the partitions."""
+        await asyncio.gather(*map(self._release, list(self._running)))
+        await self._assigner.leave()
+
+    async def _acquire(self, partition: int) -> None:
+        """Start consuming a free partition, renew the lock of a consumed one."""
+        lock = self._locks.setdefault(
+            partition,
+            self.redis.lock(
+                f"{self.streams[partition]}:owner",
+                timeout=self._assigner.ttl,
+                thread_local=False,
+            ),
+        )
+        if partition not in self._running:
+            if await lock.acquire(blocking=False):
+                await self._start(partition)
+            return
+        try:
+            await lock.reacquire()
+        except LockError:
+            logger.warning("Lost the partition %s", self.streams[partition])
+            await self._stop(partition)
+
+    async def _start(self, partition: int) -> None:
+        subscribers = self._subscribers.get(partition)
+        if subscribers is None:
+            subscribers = self.subscription.subscribe(
+                self.broker,
+                self.streams[partition],
+            )
+            self._subscribers[partition] = subscribers
+        await asyncio.gather(*(subscriber.start() for subscriber in subscribers))
+        self._running.add(partition)
+        logger.info("Consuming the partition %s", self.streams[partition])
+
+    async def _stop(self, partition: int) -> None:
+        self._running.discard(partition)
+        await asyncio.gather(
+            *(subscriber.stop() for subscriber in self._subscribers[partition]),
+        )
+
+    async def _release(self, partition: int) -> None:
+        await self._stop(partition)
+        try:
+            await self._locks[partition].release()
+        except LockError:
+            logger.warning(
+                "Partition %s expired before release", self.streams[partition]
+            )
+        logger.info("Released the partition %s", self.streams[partition])
+
+
+class PartitionedConsumers:
+    """Run a `PartitionedConsumer` for every subscription of a router."""
+
+    def __init__(
+        self,
+        broker: RedisBroker,
+        container: AsyncContainer,
+        router: PartitionedRouter,
+        interval: float = 5,
+    ) -> None:
+        self.broker = broker
+        self.container = container
+        self.router = router
+        self.interval = interval
+        self._consumers: list[PartitionedConsumer] = []
+        self._tasks: list[asyncio.Task[None]] = []
+
+    async def start(self) -> None:
+        partitions = await self.container.get(StreamPartitions)
+        redis = await self.broker.connect()
+        self._consumers = [
+            PartitionedConsumer(
+                self.broker,
+                redis,
+                subscription,
+                partitions,
+                interval=self.interval,
+            )
+            for subscription in self.router.subscriptions
+        ]
+        self._tasks = [
+            asyncio.create_task(consumer.run()) for consumer in self._consumers
+        ]
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*(consumer.close() for consumer in self._consumers))
+
+
+def _decode(raw: object) -> str:
+    return raw.decode() if isinstance(raw, bytes) else str(raw)
@@ -0,0 +1,177 @@
+"""Weighted sharing of the worker capacity between the priorities of a namespace."""
+
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator, Callable, Mapping
+from contextlib import asynccontextmanager
+from types import MappingProxyType
+from typing import Any
+
+from faststream import BaseMiddleware
+from faststream.message import StreamMessage
+from faststream.redis import RedisRouter
+from faststream.types import AsyncFuncAny
+
+from app.application.common.interfaces import Priority
+from app.infrastructure.adapters.partitions import priority_of, priority_stream
+from app.infrastructure.worker.streams import group_subscriber
+
+DEFAULT_WEIGHTS: Mapping[Priority, int] = MappingProxyType(
+    {Priority.HIGH: 8, Priority.NORMAL: 2, Priority.LOW: 1},
+)
+
+type Waiters = deque[asyncio.Future[None]]
+
+
+class WeightedSlots:
+    """Handling slots of a process, granted to the priorities by weight.
+
+    Free slots are taken at once. When all slots are busy, a released slot
+    goes to a waiting priority by smooth weighted round-robin: with weights
+    8:2:1 and waiters of every priority, 8 of 11 slots go to high priority
+    ones. A priority without waiters leaves its share to the others, so low
+    priority backlogs drain at full capacity when nothing else is queued.
+    """
+
+    def __init__(
+        self,
+        weights: Mapping[Priority, int] = DEFAULT_WEIGHTS,
+        capacity: int = 10,
+    ) -> None:
+        self.weights = dict(weights)
+        self.capacity = capacity
+        self._free = capacity
+        self._waiters: dict[Priority, Waiters] = {
+            priority: deque() for priority in self.weights
+        }
+        self._current = dict.fromkeys(self.weights, 0)
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority) -> AsyncIterator[None]:
+        """Hold a slot while handling a message of `priority`."""
+        if self._free and not any(self._waiters.values()):
+            self._free -= 1
+        else:
+            await self._wait(priority)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _wait(self, priority: Priority) -> None:
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[priority].append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            else:
+                self._waiters[priority].remove(waiter)
+            raise
+
+    def _release(self) -> None:
+        for queue in self._waiters.values():
+            while queue and queue[0].done():
+                queue.popleft()
+        ready = [priority for priority, waiters in self._waiters.items() if waiters]
+        if not ready:
+            self._free += 1
+            return
+        self._waiters[self._choose(ready)].popleft().set_result(None)
+
+    def _choose(self, ready: list[Priority]) -> Priority:
+        for priority in ready:
+            self._current[priority] += self.weights[priority]
+        chosen = max(ready, key=self._current.__getitem__)
+        self._current[chosen] -= sum(self.weights[waiting] for waiting in ready)
+        return chosen
+
+
+class PrioritySlots:
+    """`WeightedSlots` of the priority streams, by stream name."""
+
+    def __init__(self) -> None:
+        self._slots: dict[str, WeightedSlots] = {}
+
+    def add(self, namespace: str, slots: WeightedSlots) -> None:
+        """Share `slots` between the priority streams of `namespace`."""
+        for priority in slots.weights:
+            self._slots[priority_stream(namespace, priority)] = slots
+
+    def get(self, stream: str) -> WeightedSlots | None:
+        return self._slots.get(stream)
+
+
+priority_slots = PrioritySlots()
+
+
+class PriorityMiddleware(BaseMiddleware):
+    """Handle the messages of priority streams in the slots of their namespace.
+
+    Messages of other streams are handled at once. Added to the broker before
+    `DeduplicationMiddleware`, so a message waits for its slot before its id
+    is claimed and the claim lease only covers its handling.
+    """
+
+    async def consume_scope(
+        self, call_next: AsyncFuncAny, msg: StreamMessage[Any]
+    ) -> Any:
+        stream = str(msg.raw_message["channel"])
+        slots = priority_slots.get(stream)
+        if slots is None:
+            return await call_next(msg)
+        async with slots.slot(priority_of(stream)):
+            return await call_next(msg)
+
+
+def priority_subscriber[Func: Callable[..., object]](
+    router: RedisRouter,
+    namespace: str,
+    *,
+    slots: WeightedSlots | None = None,
+    group: str | None = None,
+    reclaim_after: float | None = 300,
+) -> Callable[[Func], Func]:
+    """Subscribe a handler to the priority streams of `namespace`.
+
+    Each priority stream is read through its consumer group, see
+    `group_subscriber`, and a process handles up to `slots.capacity` entries
+    of the namespace at once, shared by the priorities with `slots.weights`.
+    Urgent events then wait for at most a slot while a bulk backlog drains.
+    The slots are held by `PriorityMiddleware`, added to the worker broker.
+
+    Example:
+        ```python
+        @priority_subscriber(router, "sample", slots=WeightedSlots(capacity=10))
+        async def sample_event(message: Message[SampleNumberRequestedEvent]) -> None:
+            logger.info("Sample event received: %s", message)
+        ```
+
+    Args:
+        router: Router the subscribers are added to.
+        namespace: Namespace of the priority streams, not partitioned.
+        slots: Handling slots of the namespace, 10 shared with
+            `DEFAULT_WEIGHTS` by default. Priorities without a weight are
+            not read.
+        group: Consumer group of every priority stream, the stream name by
+            default.
+        reclaim_after: Seconds an entry is pending before it is claimed,
+            `None` to leave pending entries.
+    """
+    namespace_slots = slots or WeightedSlots()
+    priority_slots.add(namespace, namespace_slots)
+
+    def decorator(func: Func) -> Func:
+        subscribed: Any = func
+        for priority in namespace_slots.weights:
+            subscribed = group_subscriber(
+                router,
+                priority_stream(namespace, priority),
+                group=group,
+                max_workers=namespace_slots.capacity,
+                reclaim_after=reclaim_after,
+            )(subscribed)
+        return subscribed  # type: ignore[no-any-return]
+
+    return decorator
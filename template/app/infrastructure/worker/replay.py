@@ -0,0 +1,225 @@
+"""Replay of stored stream entries through an event handler."""
+
+import asyncio
+import json
+import logging
+import time
+import types
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any, cast, get_args, get_origin
+
+import msgpack
+from dishka import AsyncContainer
+from faststream.redis.message import bDATA_KEY
+from faststream.redis.parser import BinaryMessageFormatV1
+from redis.asyncio import Redis
+
+from app.application.common.event import EventHandler
+from app.infrastructure.adapters.claim_check import ClaimCheck
+from app.infrastructure.adapters.codec import MessageFormat
+from app.infrastructure.worker.dispatch import EventDispatcher
+
+logger = logging.getLogger(__name__)
+
+type Entry = tuple[bytes, dict[bytes, bytes]]
+
+MAX_SEQUENCE = 18446744073709551615
+"""Highest sequence number of an entry id within its millisecond, 2**64 - 1."""
+CONCURRENCY = 16
+"""Number of entries handled at once by default."""
+
+
+@dataclass(slots=True)
+class ReplayProgress:
+    stream: str
+    last_id: str | None = None
+    """Id of the last entry of the replayed pages, where a resumed replay starts."""
+    read: int = 0
+    handled: int = 0
+    """Entries of the handler event type handled, the others are skipped."""
+    failed: int = 0
+    started: float = 0
+
+    @property
+    def rate(self) -> float:
+        """Entries read per second."""
+        elapsed = time.perf_counter() - self.started
+        return self.read / elapsed if elapsed > 0 else 0
+
+
+def handled_event_type(handler_class: type[EventHandler[Any, Any]]) -> type[Any]:
+    """Event class of an `EventHandler` subclass, from its generic base."""
+    for klass in handler_class.__mro__:
+        for base in types.get_original_bases(klass):
+            if get_origin(base) is EventHandler:
+                return cast("type[Any]", get_args(base)[0])
+    msg = f"{handler_class.__qualname__} does not subclass EventHandler[Event, ...]"
+    raise TypeError(msg)
+
+
+def stream_id(moment: datetime, *, end: bool = False) -> str:
+    """Bound of an entry id range at a point in time, ids embed milliseconds.
+
+    Naive times are in UTC, like the clock of the entry ids.
+    """
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=UTC)
+    millis = int(moment.timestamp() * 1000)
+    return f"{millis}-{MAX_SEQUENCE}" if end else f"{millis}-0"
+
+
+class StreamReplayer:
+    """Run stored entries of a stream through one event handler.
+
+    Entries are read with ``XRANGE`` in pages of `page_size`, the next page
+    being read while the current one is handled by up to `concurrency`
+    handlers at once. Reading does not involve consumer groups, so the live
+    consumers are not affected. The id of the last entry of every handled page
+    is saved under the checkpoint key, and a replay with the same checkpoint
+    resumes after it. Failed entries are logged with their id and skipped.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        container: AsyncContainer,
+        handler_class: type[EventHandler[Any, Any]],
+        page_size: int = 1000,
+        concurrency: int = CONCURRENCY,
+    ) -> None:
+        """Initialize StreamReplayer.
+
+        Args:
+            redis: Redis client of the streams.
+            container: Container the handler and the claim check are resolved
+                from, the handler in request scope.
+            handler_class: Handler of the replayed events, entries of other
+                event types are skipped.
+            page_size: Number of entries read at once.
+            concurrency: Number of entries handled at once.
+        """
+        self.redis = redis
+        self.container = container
+        self.page_size = page_size
+        self.concurrency = concurrency
+        self.dispatcher = EventDispatcher()
+        self.dispatcher.register(handled_event_type(handler_class), handler_class)
+        self.event_type = self.dispatcher.event_types[0]
+
+    async def replay(
+        self,
+        stream: str,
+        start: str = "-",
+        end: str = "+",
+        checkpoint: str | None = None,
+        on_progress: Callable[[ReplayProgress], None] | None = None,
+    ) -> ReplayProgress:
+        """Replay the entries of `stream` with ids from `start` to `end`, inclusive.
+
+        Args:
+            stream: Stream name.
+            start: First entry id, or `-` for the oldest entry.
+            end: Last entry id, or `+` for the newest entry.
+            checkpoint: Name of the replay, resumed from its last page if it
+                ran before. `None` does not save progress.
+            on_progress: Called after every handled page.
+        """
+        checkpoint_key = f"replay:{checkpoint}:{stream}" if checkpoint else None
+        if checkpoint_key is not None:
+            saved = await self.redis.get(checkpoint_key)
+            start = f"({_decode(saved)}" if saved else start
+        progress = ReplayProgress(stream=stream, started=time.perf_counter())
+        page = await self._read(stream, start, end)
+        while page:
+            page, _ = await asyncio.gather(
+                self._read_after(stream, page, end),
+                self._replay_page(page, progress, checkpoint_key),
+            )
+            if on_progress is not None:
+                on_progress(progress)
+        return progress
+
+    async def reset(self, stream: str, checkpoint: str) -> None:
+        """Forget the progress of a replay, the next one starts from `start`."""
+        await self.redis.delete(f"replay:{checkpoint}:{stream}")
+
+    async def _read(self, stream: str, start: str, end: str) -> list[Entry]:
+        entries: list[Entry] = await self.redis.xrange(
+            stream,
+            start,
+            end,
+            count=self.page_size,
+        )
+        return entries
+
+    async def _read_after(
+        self, stream: str, page: list[Entry], end: str
+    ) -> list[Entry]:
+        """Page following `page`, empty when `page` is the last one."""
+        if len(page) < self.page_size:
+            return []
+        last_id = _decode(page[-1][0])
+        return await self._read(stream, f"({last_id}", end)
+
+    async def _replay_page(
+        self,
+        page: list[Entry],
+        progress: ReplayProgress,
+        checkpoint_key: str | None,
+    ) -> None:
+        """Dispatch the entries of a page, then save the checkpoint."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        outcomes = await asyncio.gather(
+            *(self._dispatch(fields, semaphore) for _, fields in page),
+            return_exceptions=True,
+        )
+        last_id = _decode(page[-1][0])
+        progress.read += len(page)
+        progress.handled += outcomes.count(True)
+        progress.failed += _log_failures(page, outcomes)
+        progress.last_id = last_id
+        if checkpoint_key is not None:
+            await self.redis.set(checkpoint_key, last_id)
+
+    async def _dispatch(
+        self,
+        fields: dict[bytes, bytes],
+        semaphore: asyncio.Semaphore,
+    ) -> bool:
+        """Dispatch the event of an entry, `False` when it is of another type."""
+        async with semaphore:
+            body, content_type = _decode_fields(fields)
+            claim_check = await self.container.get(ClaimCheck)
+            event = await claim_check.load(body, content_type)
+            if event.get("type") != self.event_type:
+                return False
+            async with self.container() as request_container:
+                await self.dispatcher.dispatch(event, request_container)
+            return True
+
+
+def _decode_fields(fields: dict[bytes, bytes]) -> tuple[Any, str | None]:
+    """Body of the message of an entry and its content type."""
+    payload, headers = BinaryMessageFormatV1.parse(fields[bDATA_KEY])
+    content_type = headers.get("content-type")
+    if content_type == MessageFormat.MSGPACK:
+        return msgpack.unpackb(payload), content_type
+    return json.loads(payload), content_type
+
+
+def _log_failures(page: list[Entry], outcomes: list[bool | BaseException]) -> int:
+    """Log the entries of a page that failed, return their number."""
+    failures = [
+        (entry_id, outcome)
+        for (entry_id, _), outcome in zip(page, outcomes, strict=True)
+        if isinstance(outcome, Exception)
+    ]
+    for entry_id, error in failures:
+        logger.error("Failed to replay the entry %s", _decode(entry_id), exc_info=error)
+    return len(failures)
+
+
+def _decode(raw: bytes | str) -> str:
+    return raw.decode() if isinstance(raw, bytes) else raw
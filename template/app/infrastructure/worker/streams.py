@@ -0,0 +1,149 @@
+"""Subscriptions of the worker to the event streams."""
+
+import os
+import socket
+from collections.abc import Callable
+
+from faststream.redis import RedisRouter, StreamSub
+
+
+def consumer_name() -> str:
+    """Name of this process in consumer groups, unique per host and process."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def group_stream(
+    stream: str,
+    group: str | None = None,
+    max_wait: float = 1,
+    max_size: int | None = None,
+) -> StreamSub:
+    """Read new entries of `stream` through a consumer group.
+
+    Every entry goes to one consumer of the group, so worker processes share
+    the stream. An entry is acknowledged once handled and stays pending if the
+    handler fails or the process stops.
+
+    Args:
+        stream: Stream name.
+        group: Consumer group, the stream name by default.
+        max_wait: Seconds to wait for entries before polling again.
+        max_size: Maximum number of entries read at once, all available
+            entries by default.
+    """
+    return StreamSub(
+        stream,
+        group=group or stream,
+        consumer=consumer_name(),
+        polling_interval=int(max_wait * 1000),
+        max_records=max_size,
+    )
+
+
+def reclaim_stream(
+    stream: str,
+    group: str | None = None,
+    min_idle_time: float = 300,
+    interval: float = 5,
+) -> StreamSub:
+    """Claim entries pending in a consumer group for `min_idle_time` seconds.
+
+    Entries left pending by failed handlers or by stopped processes are taken
+    over with ``XAUTOCLAIM`` and handled again. `min_idle_time` must exceed
+    the longest handling time, or entries still being handled are claimed.
+
+    Args:
+        stream: Stream name.
+        group: Consumer group, the stream name by default.
+        min_idle_time: Seconds an entry is pending before it is claimed.
+        interval: Seconds to wait once no entry is left to claim.
+    """
+    return StreamSub(
+        stream,
+        group=group or stream,
+        consumer=consumer_name(),
+        polling_interval=int(interval * 1000),
+        min_idle_time=int(min_idle_time * 1000),
+    )
+
+
+def group_subscriber[Func: Callable[..., object]](
+    router: RedisRouter,
+    stream: str,
+    *,
+    group: str | None = None,
+    max_workers: int = 1,
+    reclaim_after: float | None = 300,
+) -> Callable[[Func], Func]:
+    """Subscribe a handler to `stream` through a consumer group.
+
+    Worker processes, and replicas, share the entries of the stream, each
+    process handling up to `max_workers` entries at once. Entries pending for
+    `reclaim_after` seconds are claimed and handled again, see
+    `reclaim_stream`.
+
+    Example:
+        ```python
+        @group_subscriber(router, "sample", max_workers=10)
+        async def sample_event(message: Message[SampleNumberRequestedEvent]) -> None:
+            logger.info("Sample event received: %s", message)
+        ```
+
+    Args:
+        router: Router the subscribers are added to.
+        stream: Stream name.
+        group: Consumer group, the stream name by default.
+        max_workers: Number of entries handled concurrently by a process.
+        reclaim_after: Seconds an entry is pending before it is claimed,
+            `None` to leave pending entries.
+    """
+
+    def decorator(func: Func) -> Func:
+        subscribed = router.subscriber(
+            stream=group_stream(stream, group),
+            max_workers=max_workers,
+        )(func)
+        if reclaim_after is not None:
+            subscribed = router.subscriber(
+                stream=reclaim_stream(stream, group, min_idle_time=reclaim_after),
+            )(subscribed)
+        return subscribed  # type: ignore[return-value]
+
+    return decorator
+
+
+def batch_stream(
+    stream: str,
+    group: str | None = None,
+    max_size: int = 100,
+    max_wait: float = 1,
+) -> StreamSub:
+    """Read `stream` in batches through a consumer group.
+
+    Each ``XREADGROUP`` returns up to `max_size` entries as soon as any are
+    available, waiting at most `max_wait` seconds for the first one. A batch
+    is acknowledged with a single ``XACK`` once the handler returns.
+
+    Example:
+        ```python
+        @router.subscriber(stream=batch_stream("sample", max_size=500))
+        async def sample_events(
+            messages: list[Message[SampleNumberRequestedEvent]],
+        ) -> None:
+            logger.info("Received %d sample events", len(messages))
+        ```
+
+    Args:
+        stream: Stream name.
+        group: Consumer group, the stream name by default.
+        max_size: Maximum number of entries in a batch.
+        max_wait: Seconds to wait for entries before polling again.
+    """
+    return StreamSub(
+        stream,
+        group=group or stream,
+        consumer=consumer_name(),
+        batch=True,
+        max_records=max_size,
+        polling_interval=int(max_wait * 1000),
+    )
@@ -0,0 +1,162 @@
+"""Supervision of a pool of worker processes."""
+
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from collections.abc import Callable
+from contextlib import closing
+from dataclasses import dataclass
+from multiprocessing.process import BaseProcess
+from pathlib import Path
+from types import FrameType
+
+from prometheus_client import CollectorRegistry, start_http_server
+from prometheus_client.multiprocess import MultiProcessCollector, mark_process_dead
+
+logger = logging.getLogger(__name__)
+
+SHUTDOWN_TIMEOUT = 30
+"""Seconds the processes have to stop by default."""
+MAX_RESTART_DELAY = 60
+"""Seconds a process waits at most before being restarted."""
+STABLE_AFTER = 60
+"""Seconds a process runs before its restart delay is reset."""
+
+
+@dataclass(slots=True)
+class _Worker:
+    delay: float
+    """Seconds before restarting the process once it exits."""
+    process: BaseProcess | None = None
+    started_at: float = 0
+    restart_at: float = 0
+
+
+class WorkerSupervisor:
+    """Run worker processes, restart the ones that exit and stop them on signals.
+
+    Processes are spawned rather than forked, so each one creates its own
+    broker connection and dishka container. SIGINT and SIGTERM stop the
+    supervisor, which sends SIGTERM to the processes and kills the ones still
+    running after `shutdown_timeout`.
+
+    With a `metrics_port`, the supervisor serves the metrics of all the
+    processes, written to ``PROMETHEUS_MULTIPROC_DIR``. The directory is
+    created, or emptied of the metrics of a previous run, before the
+    processes start, and the live gauges of a process are dropped once it
+    exits.
+    """
+
+    def __init__(
+        self,
+        target: Callable[[], None],
+        processes: int,
+        shutdown_timeout: float = SHUTDOWN_TIMEOUT,
+        restart_delay: float = 1,
+        metrics_port: int | None = None,
+    ) -> None:
+        """Initialize WorkerSupervisor.
+
+        Args:
+            target: Function run by every process, importable by the spawned ones.
+            processes: Number of processes.
+            shutdown_timeout: Seconds the processes have to stop.
+            restart_delay: Seconds before restarting an exited process, doubled
+                while it keeps exiting within `STABLE_AFTER` seconds, up to
+                `MAX_RESTART_DELAY`.
+            metrics_port: Port of the Prometheus endpoint, `None` does not
+                serve one.
+        """
+        self.target = target
+        self.processes = processes
+        self.shutdown_timeout = shutdown_timeout
+        self.restart_delay = restart_delay
+        self.metrics_port = metrics_port
+        self._context = multiprocessing.get_context("spawn")
+        self._workers = [_Worker(restart_delay) for _ in range(processes)]
+        self._stopping = threading.Event()
+
+    def run(self) -> None:
+        """Run the processes until SIGINT or SIGTERM."""
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, self._handle_signal)
+        if self.metrics_port is not None:
+            _serve_metrics(self.metrics_port)
+        logger.info("Starting %d worker processes", self.processes)
+        with closing(self):
+            while not self._stopping.is_set():
+                self.supervise(time.monotonic())
+                self._stopping.wait(0.5)
+
+    def supervise(self, now: float) -> None:
+        """Start the processes due to (re)start, schedule the restart of exited ones."""
+        for index, worker in enumerate(self._workers):
+            process = worker.process
+            if process is not None and process.is_alive():
+                continue
+            if process is not None:
+                self._exited(worker, process, now)
+            if now >= worker.restart_at:
+                self._start(index, now)
+
+    def close(self) -> None:
+        """Stop the processes, killing the ones still running after the timeout."""
+        processes = [
+            worker.process for worker in self._workers if worker.process is not None
+        ]
+        logger.info("Stopping %d worker processes", len(processes))
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + self.shutdown_timeout
+        for process in processes:
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                logger.warning("Killing worker process %s", process.pid)
+                process.kill()
+                process.join()
+
+    def _exited(self, worker: _Worker, process: BaseProcess, now: float) -> None:
+        logger.error(
+            "Worker process %s exited with code %s",
+            process.pid,
+            process.exitcode,
+        )
+        worker.process = None
+        if self.metrics_port is not None and process.pid is not None:
+            mark_process_dead(process.pid)  # type: ignore[no-untyped-call]
+        if now - worker.started_at < STABLE_AFTER:
+            worker.delay = min(worker.delay * 2, MAX_RESTART_DELAY)
+        else:
+            worker.delay = self.restart_delay
+        worker.restart_at = now + worker.delay
+
+    def _start(self, index: int, now: float) -> None:
+        process = self._context.Process(target=self.target, name=f"worker-{index}")
+        process.start()
+        worker = self._workers[index]
+        worker.process = process
+        worker.started_at = now
+        logger.info("Started worker process %s", process.pid)
+
+    def _handle_signal(self, _signum: int, _frame: FrameType | None) -> None:
+        self._stopping.set()
+
+
+def _serve_metrics(port: int) -> None:
+    """Serve the metrics of every process writing to ``PROMETHEUS_MULTIPROC_DIR``."""
+    _empty_metrics_dir()
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry)  # type: ignore[no-untyped-call]
+    start_http_server(port, registry=registry)
+    logger.info("Serving the worker metrics on port %d", port)
+
+
+def _empty_metrics_dir() -> None:
+    directory = Path(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+    directory.mkdir(parents=True, exist_ok=True)
+    for path in directory.glob("*.db"):
+        path.unlink()
@@ -0,0 +1,37 @@
+import asyncio
+
+import click
+from dishka import make_async_container
+
+from app.config.base import Settings, get_settings
+from app.infrastructure.adapters.outbox import OutboxRelay
+from app.infrastructure.di.registry import get_providers
+
+
+@click.group(name="outbox", help="Manage the transactional outbox.")
+def outbox_group() -> None:
+    """Manage the transactional outbox."""
+
+
+@outbox_group.command(
+    name="relay",
+    help="Move outbox events to Redis Streams until interrupted.",
+)
+@click.option("--once", is_flag=True, help="Relay a single batch and exit.")
+def relay_cmd(*, once: bool) -> None:
+    """Move outbox events to Redis Streams until interrupted."""
+    asyncio.run(_relay(once=once))
+
+
+async def _relay(*, once: bool) -> None:
+    settings = get_settings()
+    async with make_async_container(
+        *get_providers(),
+        context={Settings: settings},
+    ) as container:
+        relay = await container.get(OutboxRelay)
+        if once:
+            relayed = await relay.relay_batch()
+            click.echo(f"Relayed {relayed} events")
+        else:
+            await relay.run()
@@ -0,0 +1,42 @@
+import asyncio
+
+import click
+from dishka import make_async_container
+
+from app.config.base import Settings, get_settings
+from app.infrastructure.di.registry import get_providers
+from app.infrastructure.web.heavy_hitters import HeavyHitters, HeavyHittersReport
+
+
+@click.group(name="rate-limit", help="Inspect rate limited traffic.")
+def rate_limit_group() -> None:
+    """Inspect rate limited traffic."""
+
+
+@rate_limit_group.command(
+    name="top",
+    help="Show the identifiers and routes throttled the most.",
+)
+@click.option("--limit", default=10, show_default=True, help="Number of rows.")
+def top_cmd(limit: int) -> None:
+    """Show the identifiers and routes throttled the most."""
+    report = asyncio.run(_get_report(limit))
+
+    click.echo(f"Distinct throttled identifiers: ~{report.distinct_identifiers}")
+    for title, rows in (
+        ("Identifiers", report.identifiers),
+        ("Routes", report.routes),
+    ):
+        click.echo(f"\n{title}:")
+        for member, hits in rows:
+            click.echo(f"{hits:>10}  {member}")
+
+
+async def _get_report(limit: int) -> HeavyHittersReport:
+    settings = get_settings()
+    async with make_async_container(
+        *get_providers(),
+        context={Settings: settings},
+    ) as container:
+        heavy_hitters = await container.get(HeavyHitters)
+        return await heavy_hitters.report(limit)
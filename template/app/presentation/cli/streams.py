@@ -0,0 +1,286 @@
+import asyncio
+import importlib
+from datetime import datetime
+from typing import Any, cast
+
+import click
+from dishka import make_async_container
+from faststream.redis import RedisBroker
+
+from app.application.common.event import EventHandler
+from app.config.base import Settings, get_settings
+from app.infrastructure.adapters.partitions import StreamPartitions
+from app.infrastructure.adapters.retention import StreamStats, StreamTrimmer
+from app.infrastructure.adapters.stream_monitor import GroupStats, StreamMonitor
+from app.infrastructure.di.registry import get_providers
+from app.infrastructure.worker.replay import (
+    CONCURRENCY,
+    ReplayProgress,
+    StreamReplayer,
+    stream_id,
+)
+
+REPORT_ROW = "{:<32} {:>10} {:>12} {:>6}"
+LAG_ROW = "{:<32} {:<24} {:>9} {:>10} {:>10} {:>10.1f} {:>10}"
+LAG_HEADER = "{:<32} {:<24} {:>9} {:>10} {:>10} {:>10} {:>10}"
+
+type GroupRates = dict[tuple[str, str], float]
+"""Entries read per second by stream and consumer group."""
+REPLAY_PROGRESS = "{0.stream}: {0.read:>10} read {0.rate:>10.0f} events/s  last id {1}"
+REPLAY_SUMMARY = (
+    "{0.stream}: {0.read} read, {0.handled} handled, {0.failed} failed, last id {1}"
+)
+
+
+@click.group(name="streams", help="Inspect and maintain the event streams.")
+def streams_group() -> None:
+    """Inspect and maintain the event streams."""
+
+
+@streams_group.command(name="report", help="Show the length and memory of streams.")
+def report_cmd() -> None:
+    """Show the length and memory of streams."""
+    report = asyncio.run(_report())
+
+    click.echo(REPORT_ROW.format("Stream", "Length", "Memory", "Groups"))
+    for stats in report:
+        click.echo(
+            REPORT_ROW.format(stats.name, stats.length, stats.memory, stats.groups),
+        )
+    length = sum(stream.length for stream in report)
+    memory = sum(stream.memory for stream in report)
+    click.echo(REPORT_ROW.format("Total", length, memory, ""))
+
+
+@streams_group.command(name="lag", help="Show how far the consumer groups are behind.")
+@click.option(
+    "--sample",
+    type=click.FloatRange(min=0),
+    default=0,
+    help="Seconds to measure the rate of the groups over, `0` skips it.",
+)
+def lag_cmd(*, sample: float) -> None:
+    """Show how far the consumer groups are behind."""
+    groups, rates = asyncio.run(_lag(sample))
+
+    click.echo(
+        LAG_HEADER.format(
+            "Stream",
+            "Group",
+            "Consumers",
+            "Lag",
+            "Pending",
+            "Oldest (s)",
+            "Rate (/s)",
+        ),
+    )
+    for stats in groups:
+        rate = rates.get((stats.stream, stats.group))
+        click.echo(
+            LAG_ROW.format(
+                stats.stream,
+                stats.group,
+                stats.consumers,
+                "?" if stats.lag is None else stats.lag,
+                stats.pending,
+                stats.oldest_pending,
+                "-" if rate is None else round(rate, 1),
+            ),
+        )
+
+
+@streams_group.command(name="trim", help="Drop stream entries past their retention.")
+def trim_cmd() -> None:
+    """Drop stream entries past their retention."""
+    trimmed = asyncio.run(_trim())
+
+    for stream, removed in trimmed.items():
+        click.echo(f"{removed:>10}  {stream}")
+
+
+def _import_handler(
+    ctx: click.Context,
+    option: click.Parameter,
+    path: str,
+) -> type[EventHandler[Any, Any]]:
+    module_name, _, class_name = path.rpartition(".")
+    try:
+        handler_class = getattr(importlib.import_module(module_name), class_name)
+    except (ImportError, AttributeError, ValueError) as exc:
+        raise click.BadParameter(str(exc), ctx, option) from exc
+    return cast("type[EventHandler[Any, Any]]", handler_class)
+
+
+@streams_group.command(
+    name="replay",
+    help=(
+        "Run stored events of a stream through a handler, without touching the"
+        " consumer groups. Partitioned namespaces replay every partition, others"
+        " every priority stream."
+    ),
+)
+@click.argument("namespace")
+@click.option(
+    "--handler",
+    "handler_class",
+    required=True,
+    callback=_import_handler,
+    help="Dotted path of the EventHandler class, other event types are skipped.",
+)
+@click.option(
+    "--since",
+    type=click.DateTime(),
+    help="Replay events stored from then, in UTC.",
+)
+@click.option(
+    "--until",
+    type=click.DateTime(),
+    help="Replay events stored until then, in UTC.",
+)
+@click.option("--start-id", default="-", show_default=True, help="First entry id.")
+@click.option("--end-id", default="+", show_default=True, help="Last entry id.")
+@click.option(
+    "--page-size",
+    type=click.IntRange(min=1),
+    default=1000,
+    show_default=True,
+    help="Number of entries read at once.",
+)
+@click.option(
+    "--concurrency",
+    type=click.IntRange(min=1),
+    default=CONCURRENCY,
+    show_default=True,
+    help="Number of events handled at once.",
+)
+@click.option(
+    "--checkpoint",
+    help="Name of the replay, saving its progress. Resumes a replay of that name.",
+)
+@click.option("--reset", is_flag=True, help="Start the checkpoint over.")
+def replay_cmd(  # noqa: PLR0913, WPS211, WPS216 one argument per option
+    namespace: str,
+    *,
+    handler_class: type[EventHandler[Any, Any]],
+    since: datetime | None,
+    until: datetime | None,
+    start_id: str,
+    end_id: str,
+    page_size: int,
+    concurrency: int,
+    checkpoint: str | None,
+    reset: bool,
+) -> None:
+    """Run stored events of a stream through a handler."""
+    if reset and not checkpoint:
+        msg = "--reset requires --checkpoint"
+        raise click.UsageError(msg)
+
+    replayed = asyncio.run(
+        _replay(
+            namespace,
+            handler_class,
+            start=stream_id(since) if since else start_id,
+            end=stream_id(until, end=True) if until else end_id,
+            page_size=page_size,
+            concurrency=concurrency,
+            checkpoint=checkpoint,
+            reset=reset,
+        ),
+    )
+    for progress in replayed:
+        click.echo(REPLAY_SUMMARY.format(progress, progress.last_id or "-"))
+
+
+async def _report() -> list[StreamStats]:
+    settings = get_settings()
+    async with make_async_container(
+        *get_providers(),
+        context={Settings: settings},
+    ) as container:
+        trimmer = await container.get(StreamTrimmer)
+        return await trimmer.report()
+
+
+async def _lag(sample: float) -> tuple[list[GroupStats], GroupRates]:
+    async with make_async_container(
+        *get_providers(),
+        context={Settings: get_settings()},
+    ) as container:
+        monitor = await container.get(StreamMonitor)
+        before = await monitor.collect()
+        if not sample:
+            return before, {}
+        await asyncio.sleep(sample)
+        after = await monitor.collect()
+    return after, _rates(before, after, sample)
+
+
+def _rates(
+    before: list[GroupStats],
+    after: list[GroupStats],
+    sample: float,
+) -> GroupRates:
+    """Entries read per second by the groups between two collections."""
+    read = {(stats.stream, stats.group): stats.entries_read for stats in before}
+    rates = {}
+    for stats in after:
+        previous = read.get((stats.stream, stats.group))
+        if previous is not None and stats.entries_read is not None:
+            rates[stats.stream, stats.group] = (stats.entries_read - previous) / sample
+    return rates
+
+
+async def _trim() -> dict[str, int]:
+    settings = get_settings()
+    async with make_async_container(
+        *get_providers(),
+        context={Settings: settings},
+    ) as container:
+        trimmer = await container.get(StreamTrimmer)
+        return await trimmer.trim_all()
+
+
+async def _replay(  # noqa: PLR0913, WPS211 one argument per option
+    namespace: str,
+    handler_class: type[EventHandler[Any, Any]],
+    *,
+    start: str,
+    end: str,
+    page_size: int,
+    concurrency: int,
+    checkpoint: str | None,
+    reset: bool,
+) -> list[ReplayProgress]:
+    async with make_async_container(
+        *get_providers(),
+        context={Settings: get_settings()},
+    ) as container:
+        broker = await container.get(RedisBroker)
+        replayer = StreamReplayer(
+            await broker.connect(),
+            container,
+            handler_class,
+            page_size=page_size,
+            concurrency=concurrency,
+        )
+        streams = (await container.get(StreamPartitions)).stored_streams(namespace)
+        if reset and checkpoint:
+            await asyncio.gather(
+                *(replayer.reset(stream, checkpoint) for stream in streams),
+            )
+        # Streams are replayed one after the other, each with `concurrency`.
+        return [
+            await replayer.replay(  # noqa: WPS476
+                stream,
+                start,
+                end,
+                checkpoint=checkpoint,
+                on_progress=_echo_progress,
+            )
+            for stream in streams
+        ]
+
+
+def _echo_progress(progress: ReplayProgress) -> None:
+    click.echo(REPLAY_PROGRESS.format(progress, progress.last_id), err=True)
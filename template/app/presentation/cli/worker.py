@@ -0,0 +1,55 @@
+import os
+
+import click
+
+from app.infrastructure.worker.factory import run_worker
+from app.infrastructure.worker.supervisor import SHUTDOWN_TIMEOUT, WorkerSupervisor
+
+
+@click.group(name="worker", help="Run the event stream worker.")
+def worker_group() -> None:
+    """Run the event stream worker."""
+
+
+@worker_group.command(
+    name="run",
+    help="Run worker processes, restarting the ones that exit, until interrupted.",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=lambda: os.process_cpu_count() or 1,
+    show_default="number of CPUs",
+    help="Number of worker processes.",
+)
+@click.option(
+    "--shutdown-timeout",
+    type=click.FloatRange(min=0),
+    default=SHUTDOWN_TIMEOUT,
+    show_default=True,
+    help="Seconds the processes have to finish their events on shutdown.",
+)
+@click.option(
+    "--metrics-port",
+    type=click.IntRange(min=1),
+    help=(
+        "Port serving the Prometheus metrics of all the processes, requires"
+        " PROMETHEUS_MULTIPROC_DIR, emptied on start. Not served by default."
+    ),
+)
+def run_cmd(
+    *,
+    workers: int,
+    shutdown_timeout: float,
+    metrics_port: int | None,
+) -> None:
+    """Run worker processes, restarting the ones that exit, until interrupted."""
+    if metrics_port is not None and not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        msg = "--metrics-port requires PROMETHEUS_MULTIPROC_DIR"
+        raise click.UsageError(msg)
+    WorkerSupervisor(
+        run_worker,
+        workers,
+        shutdown_timeout=shutdown_timeout,
+        metrics_port=metrics_port,
+    ).run()
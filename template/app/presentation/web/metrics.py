@@ -0,0 +1,33 @@
+"""Prometheus endpoint of the web application."""
+
+import hmac
+from typing import Any
+
+from litestar.connection import ASGIConnection
+from litestar.exceptions import NotAuthorizedException
+from litestar.handlers import BaseRouteHandler
+from litestar.plugins.prometheus import PrometheusController
+
+from app.config.base import Settings
+
+
+async def metrics_token_guard(
+    connection: ASGIConnection[Any, Any, Any, Any],
+    _: BaseRouteHandler,
+) -> None:
+    """Allow requests with the `AppSettings.metrics_token` bearer token."""
+    settings = await connection.app.state.dishka_container.get(Settings)
+    token = settings.app.metrics_token
+    authorization = connection.headers.get("Authorization", "")
+    if not token or not hmac.compare_digest(
+        authorization.encode(),
+        f"Bearer {token}".encode(),
+    ):
+        raise NotAuthorizedException(detail="Invalid metrics token")
+
+
+class MetricsController(PrometheusController):
+    """Metrics of every server process, for the holders of the metrics token."""
+
+    guards = [metrics_token_guard]  # noqa: RUF012 litestar controller option
+    include_in_schema = False
@@ -1,7 +1,9 @@
 from litestar.types import ControllerRouterHandler
 
 from app.presentation.web.api.router import api_router
+from app.presentation.web.metrics import MetricsController
 
 route_handlers: list[ControllerRouterHandler] = [
     api_router,
+    MetricsController,
 ]
@@ -1,20 +1,26 @@
 import logging
+from typing import Any
 
+from dishka import AsyncContainer
 from faststream.redis import RedisRouter
 
 from app.application.sample.handlers import SampleNumberEventHandler
 from app.domain.sample.events import SampleNumberRequestedEvent
-from app.infrastructure.adapters.publisher import Message
+from app.infrastructure.worker.dispatch import EventDispatcher
+from app.infrastructure.worker.streams import group_subscriber
 from app.presentation.workers.di import Depends
 
 router = RedisRouter()
 logger = logging.getLogger(__name__)
 
+dispatcher = EventDispatcher()
+dispatcher.register(SampleNumberRequestedEvent, SampleNumberEventHandler)
 
-@router.subscriber(stream="sample")
-async def sample_event(
-    message: Message[SampleNumberRequestedEvent],
-    interactor: Depends[SampleNumberEventHandler],
+
+@group_subscriber(router, "sample", max_workers=10)
+async def sample_events(
+    body: dict[str, Any],
+    container: Depends[AsyncContainer],
 ) -> None:
-    logger.info("Sample event received: %s", message)
-    await interactor(event=message.data)
+    logger.info("Sample event received: %s", body.get("type"))
+    await dispatcher.dispatch(body, container)
@@ -1,6 +1,9 @@
 from faststream.redis import RedisRouter
 
+from app.infrastructure.worker.partitions import PartitionedRouter
 from app.presentation.workers.events.sample import router as sample_router
 
 router = RedisRouter()
 router.include_router(sample_router)
+
+partitioned_router = PartitionedRouter()
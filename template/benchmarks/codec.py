@@ -0,0 +1,120 @@
+"""Benchmark of the event envelope codec against the previous encoding.
+
+Measures CPU time to encode and decode an event and its size on the wire::
+
+    python -m benchmarks.codec
+"""
+
+import inspect
+import json
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+import msgpack
+
+from app.application.common.event import Event
+from app.infrastructure.adapters.codec import EnvelopeCodec, Message, MessageFormat
+from app.infrastructure.adapters.publisher import caller_path
+
+EVENTS = 50000
+
+
+@dataclass(frozen=True, kw_only=True)
+class BenchmarkEvent(Event):
+    user_id: int
+    email: str
+    amount: float
+    created_at: datetime
+    tags: list[str]
+
+
+EVENT = BenchmarkEvent(
+    user_id=42,
+    email="user@example.com",
+    amount=99.5,
+    created_at=datetime.now(UTC),
+    tags=["benchmark", "codec"],
+)
+
+
+def legacy_caller_path() -> str:
+    """Caller path as resolved before, by inspecting the locals of every frame."""
+    frame = inspect.currentframe()
+    frame = frame.f_back.f_back if frame and frame.f_back else None
+    if not frame:
+        return ""
+    parts = frame.f_globals.get("__name__", "").split(".")
+    self_obj = frame.f_locals.get("self")
+    if self_obj is not None:
+        parts.append(self_obj.__class__.__name__)
+    parts.append(frame.f_code.co_name)
+    return ".".join(parts)
+
+
+class Publisher:
+    """Stand-in for a command handler publishing events."""
+
+    def __init__(self, codec: EnvelopeCodec) -> None:
+        self.codec = codec
+
+    def legacy(self) -> bytes:
+        message: Message[Event] = Message(
+            type=f"{type(EVENT).__module__}.{type(EVENT).__qualname__}",
+            source=legacy_caller_path(),
+            data=EVENT,
+        )
+        return message.model_dump_json().encode()
+
+    def encode(self) -> bytes:
+        return self.codec.encode(EVENT, caller_path())
+
+
+def measure(
+    encode: Callable[[], bytes],
+    decode: Callable[[bytes], object],
+) -> tuple[float, float, int]:
+    payload = encode()
+    started = time.perf_counter()
+    for _ in range(EVENTS):
+        encode()
+    encode_us = (time.perf_counter() - started) / EVENTS * 1e6
+
+    started = time.perf_counter()
+    for _ in range(EVENTS):
+        decode(payload)
+    decode_us = (time.perf_counter() - started) / EVENTS * 1e6
+    return encode_us, decode_us, len(payload)
+
+
+def main() -> None:
+    model = Message[BenchmarkEvent]
+    json_publisher = Publisher(EnvelopeCodec(MessageFormat.JSON))
+    msgpack_publisher = Publisher(EnvelopeCodec(MessageFormat.MSGPACK))
+    for label, encode, decode in (
+        (
+            "legacy json",
+            json_publisher.legacy,
+            lambda body: model.model_validate(json.loads(body)),
+        ),
+        (
+            "codec json",
+            json_publisher.encode,
+            lambda body: model.model_validate(json.loads(body)),
+        ),
+        (
+            "codec msgpack",
+            msgpack_publisher.encode,
+            lambda body: model.model_validate(msgpack.unpackb(body)),
+        ),
+    ):
+        encode_us, decode_us, size = measure(encode, decode)
+        print(
+            f"{label:<16} encode {encode_us:>6.2f} us/event"
+            f"  decode {decode_us:>6.2f} us/event  {size:>4} bytes/event",
+        )
+
+
+if __name__ == "__main__":
+    main()
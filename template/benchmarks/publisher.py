@@ -0,0 +1,102 @@
+"""Benchmark of single against batched event publishing.
+
+Requires a running Redis (``BENCHMARK_REDIS_URL``, ``redis://localhost:6379`` by
+default)::
+
+    python -m benchmarks.publisher
+"""
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from faststream.redis import RedisBroker
+
+from app.application.common.event import Event
+from app.application.common.interfaces import PublisherFactory
+from app.infrastructure.adapters.claim_check import ClaimCheck, FileBlobStore
+from app.infrastructure.adapters.codec import EnvelopeCodec
+from app.infrastructure.adapters.partitions import StreamPartitions
+from app.infrastructure.adapters.publisher import (
+    BatchedEventPublisherFactory,
+    EventPublisherFactory,
+    PublishBatcher,
+)
+from app.infrastructure.adapters.retention import StreamRetention
+from app.infrastructure.adapters.scheduler import DelayedDelivery
+from app.infrastructure.adapters.streams import StreamWriter
+
+EVENTS = 20000
+CONCURRENCY = 100
+STREAM = "benchmark_publisher"
+
+
+@dataclass(frozen=True, kw_only=True)
+class BenchmarkEvent(Event):
+    number: int
+
+
+async def run(
+    broker: RedisBroker,
+    label: str,
+    publisher_factory: PublisherFactory,
+    concurrency: int,
+) -> None:
+    redis = await broker.connect()
+    await redis.delete(STREAM)
+
+    async def worker(offset: int) -> None:
+        for number in range(offset, EVENTS, concurrency):
+            async with publisher_factory() as publisher:
+                await publisher.publish(BenchmarkEvent(number=number), STREAM)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(offset) for offset in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    assert await redis.xlen(STREAM) == EVENTS  # noqa: S101
+    await redis.delete(STREAM)
+    print(
+        f"{label:<32} {EVENTS / elapsed:>10.0f} events/s"
+        f" {elapsed / EVENTS * 1e6:>8.1f} us/event",
+    )
+
+
+async def main() -> None:
+    broker = RedisBroker(os.getenv("BENCHMARK_REDIS_URL", "redis://localhost:6379"))
+    async with broker:
+        codec = EnvelopeCodec()
+        retention = StreamRetention()
+        partitions = StreamPartitions()
+        writer = StreamWriter(broker, retention)
+        scheduler = DelayedDelivery(broker, retention)
+        claim_check = ClaimCheck(FileBlobStore(Path("data/claim_check")), codec)
+        single = EventPublisherFactory(
+            writer,
+            codec,
+            partitions,
+            scheduler,
+            claim_check,
+        )
+        await run(broker, "single, sequential", single, concurrency=1)
+        await run(broker, "single, concurrent", single, concurrency=CONCURRENCY)
+        for max_delay in (0, 0.001, 0.005):
+            batcher = PublishBatcher(writer, codec, max_delay=max_delay)
+            await run(
+                broker,
+                f"batched {max_delay * 1000:g} ms, concurrent",
+                BatchedEventPublisherFactory(
+                    batcher,
+                    partitions,
+                    scheduler,
+                    claim_check,
+                ),
+                concurrency=CONCURRENCY,
+            )
+            await batcher.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,169 @@
+"""Microbenchmark of the per-request rate limiting middleware overhead.
+
+Compares the per-route `RateLimitMiddleware` with the previous global middleware,
+which ran for every route and built a second `Request` and request container for
+every rate limited request. Redis is replaced with a limiter that allows every
+hit, so only the middleware overhead is measured::
+
+    python -m benchmarks.rate_limit_middleware
+"""
+
+import asyncio
+import time
+from collections.abc import Sequence
+from typing import Any, cast
+
+from dishka import Provider, Scope, from_context, make_async_container, provide
+from dishka import Scope as DIScope
+from litestar import Litestar, Request, get
+from litestar.enums import ScopeType
+from litestar.middleware import AbstractMiddleware
+from litestar.types import HTTPRequestEvent, Message, Receive, Send
+from litestar.types import Scope as ASGIScope
+from redis.asyncio import Redis
+
+from app.infrastructure.application.middleware.rate_limit import (
+    rate_limit,
+    rate_limit_lifespan,
+)
+from app.infrastructure.di.setup import ContainerMiddleware, dishka_lifespan
+from app.infrastructure.web.rate_limit_scripts import RateLimitAlgorithm
+from app.infrastructure.web.rate_limiter import (
+    RateLimit,
+    RateLimiter,
+    default_callback,
+    default_identifier,
+)
+
+REQUESTS = 20000
+CONFIG = RateLimit(times=1, seconds=1)
+
+
+class AllowingRateLimiter(RateLimiter):
+    async def _check(
+        self,
+        algorithm: RateLimitAlgorithm,  # noqa: ARG002
+        keys: Sequence[str],  # noqa: ARG002
+        args: Sequence[str],  # noqa: ARG002
+    ) -> tuple[int, int]:
+        return 0, 0
+
+
+class BenchmarkProvider(Provider):
+    request = from_context(provides=Request, scope=Scope.REQUEST)
+
+    @provide(scope=Scope.APP)
+    def rate_limiter(self) -> RateLimiter:
+        return AllowingRateLimiter(
+            cast("Redis", None),
+            prefix="benchmark",
+            scripts={},
+            identifier=default_identifier,
+            callback=default_callback,
+        )
+
+
+class LegacyRateLimitMiddleware(AbstractMiddleware):
+    """The global middleware used before the per-route one."""
+
+    async def __call__(self, scope: ASGIScope, receive: Receive, send: Send) -> None:
+        app = scope["app"]
+        if scope["type"] != ScopeType.HTTP:
+            await app(scope, receive, send)
+            return
+
+        rate_limit_cfg: RateLimit | None = scope["route_handler"].opt.get("rate_limit")
+        if not isinstance(rate_limit_cfg, RateLimit):
+            await self.app(scope, receive, send)
+            return
+
+        request: Request[Any, Any, Any] = app.request_class(
+            scope,
+            receive=receive,
+            send=send,
+        )
+        async with app.state.dishka_container(
+            {Request: request},
+            scope=DIScope.REQUEST,
+        ) as container:
+            limiter = await container.get(RateLimiter)
+            await limiter(request, rate_limit_cfg)
+
+        await self.app(scope, receive, send)
+
+
+@get("/unlimited/", sync_to_thread=False)
+def unlimited() -> None:
+    return
+
+
+@get("/legacy/", opt={"rate_limit": CONFIG}, sync_to_thread=False)
+def legacy() -> None:
+    return
+
+
+@get("/limited/", middleware=[rate_limit(CONFIG)], sync_to_thread=False)
+def limited() -> None:
+    return
+
+
+def create_app(*, legacy_middleware: bool) -> Litestar:
+    app = Litestar(
+        route_handlers=[unlimited, legacy if legacy_middleware else limited],
+        middleware=[ContainerMiddleware]
+        + ([LegacyRateLimitMiddleware] if legacy_middleware else []),
+        lifespan=[dishka_lifespan]
+        + ([] if legacy_middleware else [rate_limit_lifespan]),
+    )
+    app.state.dishka_container = make_async_container(BenchmarkProvider())
+    return app
+
+
+async def receive() -> HTTPRequestEvent:
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message: Message) -> None:  # noqa: ARG001
+    return
+
+
+async def measure(app: Litestar, path: str) -> float:
+    started = time.perf_counter()
+    for _ in range(REQUESTS):
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0", "spec_version": "2.3"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": b"",
+            "headers": [(b"host", b"localhost")],
+            "client": ("127.0.0.1", 50000),
+            "server": ("127.0.0.1", 8000),
+            "state": {},
+        }
+        await app(cast("ASGIScope", scope), receive, send)
+    return (time.perf_counter() - started) / REQUESTS * 1e6
+
+
+async def main() -> None:
+    for label, legacy_middleware, limited_path in (
+        ("global middleware", True, "/legacy/"),
+        ("per-route middleware", False, "/limited/"),
+    ):
+        app = create_app(legacy_middleware=legacy_middleware)
+        async with app.lifespan():
+            unlimited_us = await measure(app, "/unlimited/")
+            limited_us = await measure(app, limited_path)
+        print(  # noqa: T201
+            f"{label:<22} unlimited {unlimited_us:>7.1f} us/request"
+            f"  limited {limited_us:>7.1f} us/request"
+            f"  overhead {limited_us - unlimited_us:>6.1f} us",
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
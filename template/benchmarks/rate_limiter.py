@@ -0,0 +1,80 @@
+"""Benchmark of the pure Redis rate limiter against auto pipelining and the local tier.
+
+Requires a running Redis (``BENCHMARK_REDIS_URL``, ``redis://localhost:6379`` by
+default)::
+
+    python -m benchmarks.rate_limiter
+"""
+
+import asyncio
+import os
+import time
+from types import SimpleNamespace
+from typing import cast
+
+from redis.asyncio import Redis
+
+from app.infrastructure.web.rate_limiter import Connection, RateLimit, RateLimiter
+
+REQUESTS = 20000
+CONCURRENCY = 100
+LIMIT = 1000
+WINDOW_MS = 100
+CONFIG = RateLimit(times=LIMIT, milliseconds=WINDOW_MS)
+
+
+async def constant_identifier(request: Connection) -> str:  # noqa: ARG001
+    return "benchmark"
+
+
+async def ignore_callback(request: Connection, pexpire: int) -> None:  # noqa: ARG001
+    return
+
+
+async def run(
+    redis: Redis,
+    label: str,
+    local_lease_ratio: float | None = None,
+    auto_pipeline_delay: float | None = None,
+) -> None:
+    limiter = await RateLimiter.setup(
+        redis,
+        prefix="benchmark",
+        identifier=constant_identifier,
+        callback=ignore_callback,
+        local_lease_ratio=local_lease_ratio,
+        auto_pipeline_delay=auto_pipeline_delay,
+    )
+    request = cast(
+        "Connection",
+        SimpleNamespace(route_handler=SimpleNamespace(handler_id=label)),
+    )
+
+    async def worker() -> None:
+        for _ in range(REQUESTS // CONCURRENCY):
+            await limiter(request, CONFIG)
+
+    commands_before = (await redis.info("stats"))["total_commands_processed"]
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+    elapsed = time.perf_counter() - started
+    commands = (await redis.info("stats"))["total_commands_processed"] - commands_before
+
+    print(  # noqa: T201
+        f"{label:<24} {REQUESTS / elapsed:>10.0f} checks/s"
+        f" {elapsed / REQUESTS * 1e6:>8.1f} us/check"
+        f" {commands / REQUESTS:>6.3f} redis commands/check",
+    )
+
+
+async def main() -> None:
+    redis = Redis.from_url(os.getenv("BENCHMARK_REDIS_URL", "redis://localhost:6379"))
+    async with redis:
+        await run(redis, "redis")
+        await run(redis, "redis auto pipeline", auto_pipeline_delay=0)
+        await run(redis, "local lease 1%", local_lease_ratio=0.01)
+        await run(redis, "local lease 10%", local_lease_ratio=0.1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,4 +1,14 @@
 #!/bin/bash
 
+# Processes write their metrics to this directory, the metrics endpoints sum them.
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus}"
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
+if [ "$1" = "worker" ]; then
+    echo "Starting the worker!"
+    exec litestar worker run --metrics-port="${WORKER_METRICS_PORT:-9100}"
+fi
+
 echo "Starting Granian Server!"
 granian --interface=asgi --workers=8 --runtime-threads=2 --host=0.0.0.0 --port=8000 --factory app.asgi:create_app
@@ -0,0 +1,59 @@
+"""Tests for the sample handlers."""
+
+from collections.abc import AsyncIterator
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
+
+from app.application.common.interfaces import DBSession, SessionFactory
+from app.application.sample.commands import SampleCommand
+from app.application.sample.handlers import SampleCommandHandler
+from app.domain.sample.events import SampleNumberRequestedEvent
+from tests.doubles.application.publisher import InMemoryOutboxFactory
+
+
+class InMemorySession(DBSession):
+    def __init__(self) -> None:
+        self.committed = False
+
+    async def commit(self) -> None:
+        self.committed = True
+
+    async def rollback(self) -> None:
+        self.committed = False
+
+
+class InMemorySessionFactory(SessionFactory):
+    def __init__(self) -> None:
+        self.session = InMemorySession()
+
+    def __call__(
+        self,
+        *,
+        read_only: bool = False,  # noqa: ARG002
+    ) -> AbstractAsyncContextManager[DBSession]:
+        @asynccontextmanager
+        async def factory() -> AsyncIterator[DBSession]:
+            yield self.session
+
+        return factory()
+
+
+class SquareRepository:
+    def __init__(self, session: DBSession) -> None:
+        self.session = session
+
+    async def get_sample_number(self, number: int) -> int:
+        return number * number
+
+
+async def test_command_publishes_through_the_outbox() -> None:
+    """Test the event is added to the outbox of the committed session."""
+    sessions = InMemorySessionFactory()
+    outbox = InMemoryOutboxFactory()
+    handler = SampleCommandHandler(sessions, SquareRepository, outbox)
+
+    number, square = 3, 9
+    assert await handler(SampleCommand(number=number)) == square
+    assert outbox.publisher.get_events("sample") == [
+        SampleNumberRequestedEvent(input_number=number, result=square),
+    ]
+    assert sessions.session.committed
@@ -0,0 +1,14 @@
+"""Fixtures shared by the tests."""
+
+from collections.abc import AsyncIterator
+
+import pytest
+from fakeredis import FakeAsyncRedis, FakeServer
+
+
+@pytest.fixture
+async def redis() -> AsyncIterator[FakeAsyncRedis]:
+    """In-memory Redis with Lua scripting, empty for every test."""
+    client = FakeAsyncRedis(server=FakeServer())
+    yield client
+    await client.aclose()
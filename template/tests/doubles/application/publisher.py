@@ -3,9 +3,16 @@
 from collections import defaultdict
 from collections.abc import AsyncIterator
 from contextlib import AbstractAsyncContextManager, asynccontextmanager
+from datetime import UTC, datetime, timedelta
 
 from app.application.common.event import Event
-from app.application.common.interfaces import Publisher, PublisherFactory
+from app.application.common.interfaces import (
+    DBSession,
+    OutboxFactory,
+    Priority,
+    Publisher,
+    PublisherFactory,
+)
 
 
 class InMemoryPublisher(Publisher):
@@ -13,10 +20,26 @@ class InMemoryPublisher(Publisher):
 
     def __init__(self) -> None:
         self.published_events: dict[str, list[Event]] = defaultdict(list)
+        self.published_keys: dict[str, list[str | None]] = defaultdict(list)
+        self.delivery_times: dict[str, list[datetime | None]] = defaultdict(list)
+        self.priorities: dict[str, list[Priority]] = defaultdict(list)
 
-    async def publish(self, event: Event, namespace: str) -> None:
-        """Store the event in memory under the specified namespace."""
+    async def publish(
+        self,
+        event: Event,
+        namespace: str,
+        key: str | None = None,
+        *,
+        deliver_at: datetime | timedelta | None = None,
+        priority: Priority = Priority.NORMAL,
+    ) -> None:
+        """Store the event and its publishing options under the specified namespace."""
         self.published_events[namespace].append(event)
+        self.published_keys[namespace].append(key)
+        if isinstance(deliver_at, timedelta):
+            deliver_at = datetime.now(UTC) + deliver_at
+        self.delivery_times[namespace].append(deliver_at)
+        self.priorities[namespace].append(priority)
 
     def get_events(self, namespace: str) -> list[Event]:
         """Get all events published to the specified namespace."""
@@ -25,6 +48,9 @@ class InMemoryPublisher(Publisher):
     def clear(self) -> None:
         """Clear all stored events."""
         self.published_events.clear()
+        self.published_keys.clear()
+        self.delivery_times.clear()
+        self.priorities.clear()
 
 
 class InMemoryPublisherFactory(PublisherFactory):
@@ -39,3 +65,13 @@ class InMemoryPublisherFactory(PublisherFactory):
             yield self.publisher
 
         return factory()
+
+
+class InMemoryOutboxFactory(OutboxFactory):
+    """Factory that returns the same InMemoryPublisher for every session."""
+
+    def __init__(self) -> None:
+        self.publisher = InMemoryPublisher()
+
+    def __call__(self, session: DBSession) -> Publisher:  # noqa: ARG002
+        return self.publisher
@@ -0,0 +1,98 @@
+"""Tests for the background publisher and its spill file."""
+
+import asyncio
+import os
+from pathlib import Path
+
+import pytest
+
+from app.infrastructure.adapters.background_publisher import (
+    BackgroundPublisher,
+    QueuedMessage,
+    SpillFile,
+)
+from app.infrastructure.adapters.publisher import PublishBatcher
+
+
+class UnreadableSpill(SpillFile):
+    def claim(self) -> list[QueuedMessage]:
+        msg = "Spill directory unavailable"
+        raise OSError(msg)
+
+
+class SentBatcher(PublishBatcher):
+    """Batcher sending every message at once, without Redis."""
+
+    def __init__(self) -> None:
+        self.max_size = 10
+        self.sent: list[QueuedMessage] = []
+
+    def add(self, payload: bytes, stream: str) -> asyncio.Future[None]:
+        self.sent.append((payload, stream))
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(None)
+        return future
+
+
+def test_spill_round_trip(tmp_path: Path) -> None:
+    """Test spilled messages are claimed once, in order."""
+    spill = SpillFile(tmp_path)
+    spill.write([(b"\x00binary", "first"), (b'{"json": 1}', "second")])
+    spill.write([(b"third", "first")])
+    assert spill.claim() == [
+        (b"\x00binary", "first"),
+        (b'{"json": 1}', "second"),
+        (b"third", "first"),
+    ]
+    assert spill.claim() == []
+
+
+def test_claim_skips_running_processes(tmp_path: Path) -> None:
+    """Test files of running processes are left to them."""
+    (tmp_path / f"{os.getppid()}.spill").write_text("running\tcnVubmluZw==\n")
+    (tmp_path / "stopped.spill").write_text("stopped\tc3RvcHBlZA==\n")
+    assert SpillFile(tmp_path).claim() == [(b"stopped", "stopped")]
+
+
+def test_claim_skips_files_claimed_by_running_processes(tmp_path: Path) -> None:
+    """Test renamed files are claimed again only once their claimer stopped."""
+    running = f"stopped.{os.getppid()}.token.claimed"
+    (tmp_path / running).write_text("running\tcnVubmluZw==\n")
+    (tmp_path / "stopped.stopped.token.claimed").write_text("stopped\tc3RvcHBlZA==\n")
+    assert SpillFile(tmp_path).claim() == [(b"stopped", "stopped")]
+    assert [path.name for path in tmp_path.iterdir()] == [running]
+
+
+def test_claim_skips_files_claimed_concurrently(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test a file renamed by another process first is left to it."""
+    spill = SpillFile(tmp_path)
+    spill.write([(b"first", "stream")])
+
+    def rename(path: Path, _target: Path) -> Path:
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(Path, "rename", rename)
+    assert spill.claim() == []
+
+
+async def test_drain_survives_spill_errors(tmp_path: Path) -> None:
+    """Test a spill file failing to read is logged and the queue keeps draining."""
+    batcher = SentBatcher()
+    background = BackgroundPublisher(batcher, spill=UnreadableSpill(tmp_path))
+    for payload in (b"first", b"second"):
+        await background.put(payload, "stream")
+        await asyncio.wait_for(background.close(), timeout=1)
+    assert batcher.sent == [(b"first", "stream"), (b"second", "stream")]
+
+
+async def test_close_waits_for_the_task(tmp_path: Path) -> None:
+    """Test closing returns once the draining task is cancelled."""
+    background = BackgroundPublisher(SentBatcher(), spill=SpillFile(tmp_path))
+    await background.put(b"first", "stream")
+    task = background._task  # noqa: SLF001 the task is internal
+    await asyncio.wait_for(background.close(), timeout=1)
+    assert task is not None
+    assert task.cancelled()
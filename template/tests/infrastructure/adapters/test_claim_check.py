@@ -0,0 +1,35 @@
+"""Tests for the claim check of large event payloads."""
+
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import msgpack
+
+from app.application.common.event import Event
+from app.infrastructure.adapters.claim_check import ClaimCheck, FileBlobStore
+from app.infrastructure.adapters.codec import EnvelopeCodec, MessageFormat
+
+THRESHOLD = 500
+
+
+@dataclass(frozen=True, kw_only=True)
+class LargeEvent(Event):
+    text: str
+
+
+async def test_large_payload_offloaded(tmp_path: Path) -> None:
+    """Test a large payload is replaced by a reference loaded back as the event."""
+    codec = EnvelopeCodec(MessageFormat.MSGPACK)
+    claim_check = ClaimCheck(FileBlobStore(tmp_path), codec, threshold=THRESHOLD)
+    small = codec.encode(LargeEvent(text="x"), "test")
+    payload = codec.encode(LargeEvent(text="x" * 1000), "test")
+
+    assert await claim_check.offload(small) == small
+    reference = await claim_check.offload(payload)
+    assert len(reference) < THRESHOLD
+    body = await claim_check.load(msgpack.unpackb(reference), MessageFormat.MSGPACK)
+    assert body["data"] == {"text": "x" * 1000}
+
+    assert await claim_check.store.purge(time.time() - 60) == 0
+    assert await claim_check.store.purge(time.time() + 1) == 1
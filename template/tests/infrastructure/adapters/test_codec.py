@@ -0,0 +1,80 @@
+"""Tests for the event envelope codec."""
+
+import json
+from collections.abc import Callable
+from typing import Any
+
+import msgpack
+import pytest
+from faststream.redis.message import bDATA_KEY
+from faststream.redis.parser import BinaryMessageFormatV1
+
+from app.domain.sample.events import SampleNumberRequestedEvent
+from app.infrastructure.adapters.codec import (
+    SCHEMA_VERSION,
+    EnvelopeCodec,
+    Message,
+    MessageFormat,
+    decode_message,
+)
+from app.infrastructure.worker.broker import parse_message
+
+EVENT = SampleNumberRequestedEvent(input_number=3, result=9)
+
+
+@pytest.mark.parametrize(
+    ("message_format", "loads"),
+    [
+        (MessageFormat.JSON, json.loads),
+        (MessageFormat.MSGPACK, msgpack.unpackb),
+    ],
+)
+def test_encode_round_trip(
+    message_format: MessageFormat, loads: Callable[[bytes], Any]
+) -> None:
+    """Test an encoded event is decoded into the message envelope."""
+    codec = EnvelopeCodec(message_format)
+    payload = codec.encode(EVENT, source="tests")
+    message = Message[SampleNumberRequestedEvent].model_validate(loads(payload))
+    assert message.data == EVENT
+    assert message.type == "app.domain.sample.events.SampleNumberRequestedEvent"
+    assert message.source == "tests"
+    assert message.version == SCHEMA_VERSION
+    assert codec.headers == {"content-type": message_format.value}
+
+
+async def test_parse_mixed_batch() -> None:
+    """Test a batch of JSON and msgpack entries is decoded as a list of envelopes."""
+    entries = [
+        {
+            bDATA_KEY: BinaryMessageFormatV1.encode(
+                message=codec.encode(EVENT, source="tests"),
+                reply_to=None,
+                headers=codec.headers,
+                correlation_id="1",
+            ),
+        }
+        for codec in (
+            EnvelopeCodec(MessageFormat.JSON),
+            EnvelopeCodec(MessageFormat.MSGPACK),
+        )
+    ]
+
+    async def original_parser(message: Any) -> Any:
+        raise AssertionError(message)
+
+    async def original_decoder(message: Any) -> Any:
+        raise AssertionError(message)
+
+    parsed = await parse_message(
+        {"type": "bstream", "channel": b"s", "data": entries}, original_parser
+    )
+    decoded = await decode_message(parsed, original_decoder)
+    assert isinstance(decoded, list)
+    assert [
+        Message[SampleNumberRequestedEvent].model_validate(item).data
+        for item in decoded
+    ] == [
+        EVENT,
+        EVENT,
+    ]
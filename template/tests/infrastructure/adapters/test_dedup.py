@@ -0,0 +1,38 @@
+"""Tests for the de-duplication of delivered messages."""
+
+import asyncio
+
+import pytest
+from redis.asyncio import Redis
+
+from app.infrastructure.adapters.dedup import Claim, MessageDeduplicator
+
+
+async def test_claim_states(redis: Redis) -> None:
+    """Test an id is new once, in flight while handled, then a duplicate."""
+    deduplicator = MessageDeduplicator(redis)
+    async with deduplicator.handling("group", "id") as claim:
+        assert claim == Claim.NEW
+        assert await deduplicator.claim("group", "id") == Claim.IN_FLIGHT
+        assert await deduplicator.claim("other", "id") == Claim.NEW
+
+    assert await deduplicator.claim("group", "id") == Claim.DUPLICATE
+
+
+async def test_expired_lease_is_claimed_again(redis: Redis) -> None:
+    """Test a message claimed by a stopped consumer is handled after its lease."""
+    deduplicator = MessageDeduplicator(redis, lease=0.05)
+    assert await deduplicator.claim("group", "id") == Claim.NEW
+    assert await deduplicator.claim("group", "id") == Claim.IN_FLIGHT
+    await asyncio.sleep(0.06)
+    assert await deduplicator.claim("group", "id") == Claim.NEW
+
+
+async def test_failed_message_is_released(redis: Redis) -> None:
+    """Test a message whose handler failed is handled again when redelivered."""
+    deduplicator = MessageDeduplicator(redis)
+    with pytest.raises(RuntimeError):
+        async with deduplicator.handling("group", "id"):
+            raise RuntimeError
+
+    assert await deduplicator.claim("group", "id") == Claim.NEW
@@ -0,0 +1,47 @@
+"""Tests for the partitioning of stream namespaces."""
+
+from app.application.common.interfaces import Priority
+from app.infrastructure.adapters.partitions import (
+    StreamPartitions,
+    namespace_of,
+    priority_of,
+)
+from app.infrastructure.adapters.retention import RetentionPolicy, StreamRetention
+
+
+def test_same_key_same_partition() -> None:
+    """Test events with the same key go to the same partition stream."""
+    partitions = StreamPartitions({"sample": 4})
+    streams = {partitions.stream("sample", key=f"user-{index}") for index in range(100)}
+    assert streams == set(partitions.streams("sample"))
+    assert partitions.stream("sample", "user-1") == partitions.stream(
+        "sample", "user-1"
+    )
+    assert partitions.stream("other", "user-1") == "other"
+
+
+def test_partitions_share_namespace_policy() -> None:
+    """Test the retention policy of a namespace applies to its partitions."""
+    policy = RetentionPolicy(max_len=10)
+    retention = StreamRetention({"sample": policy})
+    assert namespace_of("sample:3") == "sample"
+    assert namespace_of("sample:x") == "sample:x"
+    assert retention.policy("sample:3") == policy
+
+
+def test_priority_streams() -> None:
+    """Test priorities have their own streams, sharing the namespace policy."""
+    partitions = StreamPartitions({"ordered": 2})
+    assert partitions.stream("sample", priority=Priority.NORMAL) == "sample"
+    assert partitions.stream("sample", priority=Priority.HIGH) == "sample:high"
+    ordered = partitions.stream("ordered", "key", Priority.HIGH)
+    assert ordered in partitions.streams("ordered")
+    assert partitions.stored_streams("ordered") == partitions.streams("ordered")
+    assert partitions.stored_streams("sample") == [
+        "sample:high",
+        "sample",
+        "sample:low",
+    ]
+    assert namespace_of("sample:low") == "sample"
+    assert priority_of("sample:low") == Priority.LOW
+    assert priority_of("sample") == Priority.NORMAL
@@ -0,0 +1,144 @@
+"""Tests for the batched publishing of events."""
+
+import asyncio
+import time
+from collections.abc import Mapping
+from pathlib import Path
+from typing import TYPE_CHECKING, cast
+
+from faststream.redis import RedisBroker
+from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.domain.sample.events import SampleNumberRequestedEvent
+from app.infrastructure.adapters.claim_check import ClaimCheck, FileBlobStore
+from app.infrastructure.adapters.codec import EnvelopeCodec
+from app.infrastructure.adapters.partitions import StreamPartitions
+from app.infrastructure.adapters.publisher import BatchedEventPublisher, PublishBatcher
+from app.infrastructure.adapters.retention import StreamRetention
+from app.infrastructure.adapters.scheduler import DelayedDelivery
+
+if TYPE_CHECKING:
+    from app.infrastructure.adapters.streams import StreamWriter
+
+BATCH_SIZE = 3
+EVENT = SampleNumberRequestedEvent(input_number=3, result=9)
+
+
+class ConnectedBroker:
+    """Broker connected to the in-memory Redis, or failing to connect."""
+
+    def __init__(self, redis: Redis, error: Exception | None = None) -> None:
+        self.redis = redis
+        self.error = error
+
+    async def connect(self) -> Redis:
+        if self.error is not None:
+            raise self.error
+        return self.redis
+
+
+class PipelinedWriter:
+    """Writer adding the messages in the pipeline, counting them by pipeline."""
+
+    def __init__(self, broker: ConnectedBroker) -> None:
+        self.broker = broker
+        self.sizes: list[int] = []
+        self._pipeline: Pipeline | None = None
+
+    async def add(
+        self,
+        payload: bytes,
+        stream: str,
+        headers: Mapping[str, str],  # noqa: ARG002
+        pipeline: Pipeline | None = None,
+    ) -> None:
+        if pipeline is not self._pipeline:
+            self._pipeline = pipeline
+            self.sizes.append(0)
+        self.sizes[-1] += 1
+        cast("Pipeline", pipeline).xadd(stream, {"payload": payload})
+
+
+def make_batcher(
+    redis: Redis,
+    *,
+    max_delay: float = 60,
+    error: Exception | None = None,
+) -> tuple[PublishBatcher, PipelinedWriter]:
+    writer = PipelinedWriter(ConnectedBroker(redis, error))
+    batcher = PublishBatcher(
+        cast("StreamWriter", writer),
+        EnvelopeCodec(),
+        max_size=BATCH_SIZE,
+        max_delay=max_delay,
+    )
+    return batcher, writer
+
+
+def make_publisher(batcher: PublishBatcher, tmp_path: Path) -> BatchedEventPublisher:
+    broker = cast("RedisBroker", ConnectedBroker(cast("Redis", None)))
+    return BatchedEventPublisher(
+        batcher,
+        StreamPartitions(),
+        DelayedDelivery(broker, StreamRetention()),
+        ClaimCheck(FileBlobStore(tmp_path), batcher.codec),
+    )
+
+
+async def test_full_batch_is_sent_at_once(redis: Redis) -> None:
+    """Test `max_size` queued messages are sent without waiting for `max_delay`."""
+    batcher, writer = make_batcher(redis)
+
+    sent = [batcher.add(b"payload", "events") for _ in range(BATCH_SIZE)]
+    await asyncio.wait_for(asyncio.gather(*sent), timeout=1)
+
+    assert writer.sizes == [BATCH_SIZE]
+    assert await redis.xlen("events") == BATCH_SIZE
+
+
+async def test_batch_is_sent_after_max_delay(redis: Redis) -> None:
+    """Test queued messages are sent together once `max_delay` passes."""
+    max_delay = 0.05
+    batcher, writer = make_batcher(redis, max_delay=max_delay)
+
+    started = time.monotonic()
+    sent = [batcher.add(b"payload", "events") for _ in range(BATCH_SIZE - 1)]
+    await asyncio.sleep(0)
+    assert not any(future.done() for future in sent)
+    await asyncio.wait_for(asyncio.gather(*sent), timeout=1)
+
+    assert time.monotonic() - started >= max_delay
+    assert writer.sizes == [BATCH_SIZE - 1]
+
+
+async def test_failed_batch_is_raised_to_every_publisher(
+    redis: Redis,
+    tmp_path: Path,
+) -> None:
+    """Test an error sending a batch is raised by the flush of each publisher."""
+    error = RedisConnectionError("down")
+    batcher, _ = make_batcher(redis, max_delay=0, error=error)
+    publishers = [make_publisher(batcher, tmp_path) for _ in range(2)]
+    for publisher in publishers:
+        await publisher.publish(EVENT, "events")
+
+    flushed = await asyncio.gather(
+        *(publisher.flush() for publisher in publishers),
+        return_exceptions=True,
+    )
+
+    assert flushed == [error, error]
+
+
+async def test_close_sends_the_queued_messages(redis: Redis) -> None:
+    """Test closing the batcher sends the messages waiting for `max_delay`."""
+    batcher, writer = make_batcher(redis)
+    sent = [batcher.add(b"payload", "events") for _ in range(BATCH_SIZE - 1)]
+
+    await batcher.close()
+
+    assert all(future.done() for future in sent)
+    assert writer.sizes == [BATCH_SIZE - 1]
+    assert await redis.xlen("events") == BATCH_SIZE - 1
@@ -0,0 +1,67 @@
+"""Tests for the delayed delivery of events."""
+
+import time
+from datetime import UTC, datetime, timedelta
+from typing import cast
+
+from faststream.redis import RedisBroker
+from redis.asyncio import Redis
+
+from app.infrastructure.adapters.retention import RetentionPolicy, StreamRetention
+from app.infrastructure.adapters.scheduler import DelayedDelivery, delivery_time
+
+TRIMMED = 3
+
+
+class ConnectedBroker:
+    """Broker connected to the in-memory Redis."""
+
+    def __init__(self, redis: Redis) -> None:
+        self.redis = redis
+
+    async def connect(self) -> Redis:
+        return self.redis
+
+
+def make_scheduler(redis: Redis, retention: StreamRetention) -> DelayedDelivery:
+    return DelayedDelivery(cast("RedisBroker", ConnectedBroker(redis)), retention)
+
+
+def test_delivery_time() -> None:
+    """Test a delivery time is kept, a delay counts from now and none is now."""
+    deliver_at = datetime(2030, 1, 1, tzinfo=UTC)
+    assert delivery_time() is None
+    assert delivery_time(deliver_at) == deliver_at.timestamp()
+    delayed = delivery_time(timedelta(minutes=1))
+    assert delayed is not None
+    assert abs(delayed - (time.time() + 60)) < 1
+
+
+async def test_promote_moves_due_events(redis: Redis) -> None:
+    """Test only the due events are moved to their streams, once."""
+    retention = StreamRetention({"trimmed": RetentionPolicy(max_len=1)})
+    scheduler = make_scheduler(redis, retention)
+    now = time.time()
+    await scheduler.schedule(b"due", "events", {}, now - 1)
+    await scheduler.schedule(b"later", "events", {}, now + 60)
+    for number in range(TRIMMED):
+        await scheduler.schedule(str(number).encode(), "trimmed", {}, now - 1)
+
+    assert await scheduler.promote() == TRIMMED + 1
+    assert await scheduler.promote() == 0
+    assert await redis.xlen("events") == 1
+    # Approximate trimming keeps whole nodes, a short stream is not trimmed.
+    assert await redis.xlen("trimmed") == TRIMMED
+    assert await redis.zcard(scheduler.key) == 1
+
+
+async def test_promote_drops_malformed_members(redis: Redis) -> None:
+    """Test a malformed member is removed without holding back due events."""
+    scheduler = make_scheduler(redis, StreamRetention())
+    now = time.time()
+    await redis.zadd(scheduler.key, {b"malformed": now - 2})
+    await scheduler.schedule(b"due", "events", {}, now - 1)
+
+    assert await scheduler.promote() == 1
+    assert await redis.xlen("events") == 1
+    assert await redis.zcard(scheduler.key) == 0
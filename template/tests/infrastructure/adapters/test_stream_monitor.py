@@ -0,0 +1,62 @@
+"""Tests for the consumer group lag metrics."""
+
+from prometheus_client import Gauge
+from redis.asyncio import Redis
+
+from app.infrastructure.adapters.stream_monitor import GroupStats, StreamMonitor
+from app.infrastructure.observability.metrics import (
+    stream_group_lag,
+    stream_group_pending,
+)
+
+PENDING = 2
+
+
+def _group(group: str, lag: int | None) -> GroupStats:
+    return GroupStats(
+        stream="monitored",
+        group=group,
+        consumers=1,
+        lag=lag,
+        pending=PENDING,
+        oldest_pending=1.5,
+        entries_read=10,
+    )
+
+
+def _sample(gauge: Gauge, group: str) -> float | None:
+    for metric in gauge.collect():
+        for sample in metric.samples:
+            if sample.labels == {"stream": "monitored", "group": group}:
+                return sample.value
+    return None
+
+
+def test_report_drops_deleted_groups() -> None:
+    """Test groups missing from a collection stop being reported."""
+    monitor = StreamMonitor(redis=None)  # type: ignore[arg-type]
+    monitor.report([_group("first", 1), _group("second", None)])
+    assert _sample(stream_group_lag, "first") == 1
+    assert _sample(stream_group_lag, "second") is None
+    assert _sample(stream_group_pending, "second") == PENDING
+
+    monitor.report([_group("second", 0)])
+    assert _sample(stream_group_pending, "first") is None
+    assert _sample(stream_group_lag, "second") == 0
+
+
+async def test_groups_report_pending_entries(redis: Redis) -> None:
+    """Test a group with entries read and not acknowledged reports their age."""
+    for _ in range(PENDING):
+        await redis.xadd("monitored", {"field": "value"})
+    await redis.xgroup_create("monitored", "idle", id="0")
+    await redis.xgroup_create("monitored", "reading", id="0")
+    await redis.xreadgroup("reading", "consumer", {"monitored": ">"})
+
+    groups = {
+        stats.group: stats for stats in await StreamMonitor(redis).groups("monitored")
+    }
+    assert groups["idle"].pending == 0
+    assert groups["idle"].oldest_pending == 0
+    assert groups["reading"].pending == PENDING
+    assert groups["reading"].oldest_pending >= 0
@@ -0,0 +1,91 @@
+"""Tests for the per-route rate limiting middleware."""
+
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from dishka import Provider, Scope, from_context, make_async_container, provide
+from litestar import Litestar, Request, get
+from litestar.handlers import HTTPRouteHandler
+from litestar.status_codes import HTTP_200_OK, HTTP_429_TOO_MANY_REQUESTS
+from litestar.testing import AsyncTestClient
+from redis.asyncio import Redis
+
+from app.infrastructure.application.middleware.rate_limit import (
+    rate_limit,
+    rate_limit_lifespan,
+)
+from app.infrastructure.di.setup import ContainerMiddleware, dishka_lifespan
+from app.infrastructure.web.rate_limiter import RateLimit, RateLimiter
+
+LIMIT = 2
+WINDOW = 10
+
+
+class LimiterProvider(Provider):
+    request = from_context(provides=Request, scope=Scope.REQUEST)
+
+    def __init__(self, redis: Redis | None) -> None:
+        super().__init__()
+        self.redis = redis
+
+    @provide(scope=Scope.APP)
+    async def rate_limiter(self) -> RateLimiter:
+        if self.redis is None:
+            msg = "Redis is not available"
+            raise ConnectionError(msg)
+        return await RateLimiter.setup(self.redis, "test")
+
+
+@get("/limited/", middleware=[rate_limit(RateLimit(times=LIMIT, seconds=WINDOW))])
+async def limited() -> None:
+    return
+
+
+@get("/exempt/")
+async def exempt() -> None:
+    return
+
+
+@asynccontextmanager
+async def client(
+    redis: Redis | None,
+    route_handlers: list[HTTPRouteHandler],
+) -> AsyncIterator[AsyncTestClient[Litestar]]:
+    app = Litestar(
+        route_handlers=route_handlers,
+        middleware=[ContainerMiddleware],
+        lifespan=[dishka_lifespan, rate_limit_lifespan],
+    )
+    app.state.dishka_container = make_async_container(LimiterProvider(redis))
+    async with AsyncTestClient(app) as test_client:
+        yield test_client
+
+
+async def test_limited_route_answers_too_many_requests(redis: Redis) -> None:
+    """Test a route over its limit answers 429 with the time to wait."""
+    async with client(redis, [limited, exempt]) as test_client:
+        for _ in range(LIMIT):
+            response = await test_client.get("/limited/")
+            assert response.status_code == HTTP_200_OK
+
+        response = await test_client.get("/limited/")
+        assert response.status_code == HTTP_429_TOO_MANY_REQUESTS
+        assert 0 < int(response.headers["Retry-After"]) <= WINDOW
+
+
+async def test_route_without_limit_is_exempt(redis: Redis) -> None:
+    """Test routes without `rate_limit` are neither limited nor counted."""
+    async with client(redis, [limited, exempt]) as test_client:
+        for _ in range(LIMIT + 1):
+            response = await test_client.get("/exempt/")
+            assert response.status_code == HTTP_200_OK
+        for _ in range(LIMIT):
+            response = await test_client.get("/limited/")
+            assert response.status_code == HTTP_200_OK
+
+
+async def test_app_without_limited_routes_starts_without_redis() -> None:
+    """Test the limiter is not resolved when no route is rate limited."""
+    async with client(None, [exempt]) as test_client:
+        response = await test_client.get("/exempt/")
+        assert response.status_code == HTTP_200_OK
@@ -0,0 +1,91 @@
+"""Tests for the routing of read-only sessions to replicas."""
+
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+from app.infrastructure.database.replicas import (
+    ReadOnlySessionFactory,
+    Replica,
+    ReplicaPool,
+    RoutingSessionFactory,
+)
+from app.infrastructure.database.session import get_async_session_maker, get_engine
+
+
+def _replica(host: str, *, lag: float = 0) -> Replica:
+    replica = Replica.from_engine(get_engine(f"postgresql+asyncpg://user@{host}/app"))
+    replica.healthy = True
+    replica.lag = lag
+    return replica
+
+
+def _healthy(replica: Replica) -> bool:
+    """Health of the replica, read again after a check changed it."""
+    return replica.healthy
+
+
+class FakeConnection:
+    def __init__(self, lag: float | None) -> None:
+        self.lag = lag
+
+    async def scalar(self, statement: Any) -> float | None:  # noqa: ARG002
+        return self.lag
+
+
+class FakeEngine:
+    def __init__(self, lag: float | None) -> None:
+        self.lag = lag
+
+    @asynccontextmanager
+    async def connect(self) -> AsyncIterator[FakeConnection]:
+        yield FakeConnection(self.lag)
+
+
+def test_replicas_take_turns_within_max_lag() -> None:
+    """Test eligible replicas are chosen in turn, lagging and unhealthy ones skipped."""
+    first, second, lagging, down = (
+        _replica("first"),
+        _replica("second"),
+        _replica("lagging", lag=30),
+        _replica("down"),
+    )
+    down.healthy = False
+    pool = ReplicaPool([first, lagging, second, down], max_lag=5)
+    chosen = [pool.choose() for _ in range(4)]
+    assert chosen == [first, second, first, second]
+
+    first.healthy = second.healthy = False
+    assert pool.choose() is None
+
+
+def test_read_only_sessions_fall_back_to_primary() -> None:
+    """Test read-only sessions use an eligible replica, or else the primary."""
+    primary = get_engine("postgresql+asyncpg://user@primary/app")
+    replica = _replica("replica")
+    sessions = RoutingSessionFactory(
+        get_async_session_maker(primary),
+        ReplicaPool([replica]),
+    )
+    reads = ReadOnlySessionFactory(sessions)
+
+    assert reads().bind is replica.engine
+    assert sessions().bind is primary
+    replica.lag = 60
+    assert reads().bind is primary
+
+
+async def test_replica_without_streaming_receiver_is_unhealthy() -> None:
+    """Test a replica is unhealthy while its WAL receiver is not streaming."""
+    replica = _replica("replica")
+    replica.engine = FakeEngine(lag=None)  # type: ignore[assignment]
+    pool = ReplicaPool([replica])
+
+    await pool.check()
+    assert not _healthy(replica)
+    assert pool.choose() is None
+
+    replica.engine = FakeEngine(lag=1)  # type: ignore[assignment]
+    await pool.check()
+    assert _healthy(replica)
+    assert replica.lag == 1
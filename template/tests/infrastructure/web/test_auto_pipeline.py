@@ -0,0 +1,126 @@
+"""Tests for the automatic pipelining of script calls."""
+
+import asyncio
+from typing import Any
+
+import pytest
+from fakeredis import FakeAsyncRedis, FakeServer
+from redis.asyncio.client import Pipeline
+from redis.commands.core import AsyncScript
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.infrastructure.web.auto_pipeline import AutoPipeline
+
+ECHO_SCRIPT = "return {KEYS[1], ARGV[1]}"
+FAILING_SCRIPT = "return redis.error_reply('failed')"
+
+
+class CountingRedis(FakeAsyncRedis):
+    """Fake Redis counting the pipelines."""
+
+    pipelines = 0
+
+    def pipeline(self, *args: Any, **kwargs: Any) -> Any:
+        self.pipelines += 1
+        return super().pipeline(*args, **kwargs)
+
+
+@pytest.fixture
+async def redis() -> CountingRedis:
+    return CountingRedis(server=FakeServer())
+
+
+@pytest.fixture
+async def echo(redis: CountingRedis) -> AsyncScript:
+    """Script returning its key and argument, loaded in Redis."""
+    await redis.script_load(ECHO_SCRIPT)
+    return redis.register_script(ECHO_SCRIPT)
+
+
+async def test_concurrent_calls_share_a_pipeline(
+    redis: CountingRedis, echo: AsyncScript
+) -> None:
+    """Test calls issued together are sent in one pipeline, each gets its reply."""
+    pipeline = AutoPipeline(redis)
+
+    replies = await asyncio.gather(
+        *(pipeline.run(echo, [f"key{index}"], [str(index)]) for index in range(10)),
+    )
+
+    assert replies == [
+        [f"key{index}".encode(), str(index).encode()] for index in range(10)
+    ]
+    assert redis.pipelines == 1
+
+
+async def test_script_error_is_raised_to_its_caller(
+    redis: CountingRedis, echo: AsyncScript
+) -> None:
+    """Test a failing call of a pipeline does not fail the other calls."""
+    pipeline = AutoPipeline(redis)
+
+    replies = await asyncio.gather(
+        pipeline.run(echo, ["key"], ["1"]),
+        pipeline.run(redis.register_script(FAILING_SCRIPT), ["key"], ["2"]),
+        return_exceptions=True,
+    )
+
+    assert replies[0] == [b"key", b"1"]
+    assert isinstance(replies[1], Exception)
+
+
+async def test_failed_pipeline_is_raised_to_every_caller(
+    redis: CountingRedis,
+    echo: AsyncScript,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test an error sending the pipeline is raised to all its callers."""
+    error = RedisConnectionError("down")
+
+    async def execute(*_: object, **__: object) -> None:
+        raise error
+
+    monkeypatch.setattr(Pipeline, "execute", execute)
+    pipeline = AutoPipeline(redis)
+
+    replies = await asyncio.gather(
+        *(pipeline.run(echo, ["key"], [str(index)]) for index in range(3)),
+        return_exceptions=True,
+    )
+
+    assert replies == [error] * 3
+
+
+async def test_cancelled_caller_does_not_affect_the_others(
+    redis: CountingRedis,
+    echo: AsyncScript,
+) -> None:
+    """Test a caller cancelled before the flush leaves the other replies intact."""
+    pipeline = AutoPipeline(redis, max_delay=0.01)
+
+    cancelled = asyncio.create_task(pipeline.run(echo, ["key"], ["1"]))
+    waiting = asyncio.create_task(pipeline.run(echo, ["key"], ["2"]))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+
+    assert await waiting == [b"key", b"2"]
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+    assert redis.pipelines == 1
+
+
+async def test_flushed_scripts_are_loaded_again(
+    redis: CountingRedis, echo: AsyncScript
+) -> None:
+    """Test calls of scripts Redis lost are sent again once the scripts are loaded."""
+    pipeline = AutoPipeline(redis)
+    assert await pipeline.run(echo, ["key"], ["1"]) == [b"key", b"1"]
+
+    await redis.script_flush()
+    sent = redis.pipelines
+
+    assert await pipeline.run(echo, ["key"], ["2"]) == [b"key", b"2"]
+    # The call of the lost script is sent again, once it is loaded.
+    assert redis.pipelines == sent + 2
+    assert await pipeline.run(echo, ["key"], ["3"]) == [b"key", b"3"]
+    assert redis.pipelines == sent + 3
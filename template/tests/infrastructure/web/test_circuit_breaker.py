@@ -0,0 +1,74 @@
+"""Tests for the circuit breaker."""
+
+import pytest
+
+from app.infrastructure.web.circuit_breaker import CircuitBreaker, CircuitState
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def state_of(breaker: CircuitBreaker) -> CircuitState:
+    """State of `breaker`, read again after every call that changes it."""
+    return breaker.state
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr("app.infrastructure.web.circuit_breaker.time.monotonic", clock)
+    return clock
+
+
+@pytest.mark.usefixtures("clock")
+def test_opens_after_consecutive_failures() -> None:
+    """Test the circuit opens after `failure_threshold` failures in a row."""
+    transitions: list[CircuitState] = []
+    breaker = CircuitBreaker(failure_threshold=2, on_state_change=transitions.append)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert state_of(breaker) == CircuitState.OPEN
+    assert not breaker.allow_request()
+    assert transitions == [CircuitState.OPEN]
+
+
+def test_probe_success_closes(clock: Clock) -> None:
+    """Test a successful probe after the recovery timeout closes the circuit."""
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=5)
+    breaker.record_failure()
+    clock.now += 5
+    assert breaker.allow_request()
+    assert state_of(breaker) == CircuitState.HALF_OPEN
+    assert not breaker.allow_request()
+    breaker.record_success()
+    assert state_of(breaker) == CircuitState.CLOSED
+    assert breaker.allow_request()
+
+
+def test_probe_failure_opens(clock: Clock) -> None:
+    """Test a failed probe opens the circuit for another recovery timeout."""
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=5)
+    breaker.record_failure()
+    clock.now += 5
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert state_of(breaker) == CircuitState.OPEN
+    clock.now += 4
+    assert not breaker.allow_request()
+
+
+@pytest.mark.usefixtures("clock")
+def test_success_while_open_is_ignored() -> None:
+    """Test successes of calls started before the circuit opened do not close it."""
+    breaker = CircuitBreaker(failure_threshold=1)
+    breaker.record_failure()
+    breaker.record_success()
+    assert state_of(breaker) == CircuitState.OPEN
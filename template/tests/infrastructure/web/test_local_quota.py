@@ -0,0 +1,84 @@
+"""Tests for the local rate limit quota."""
+
+import time
+
+import pytest
+
+from app.infrastructure.web.local_quota import (
+    LocalLimiter,
+    LocalQuota,
+    TokenBucket,
+)
+
+
+@pytest.mark.parametrize(
+    ("lease_ratio", "times", "expected"),
+    [
+        (0.1, 100, 10),
+        (0.1, 5, 1),
+        (0.01, 10, 1),
+        (1, 7, 7),
+    ],
+)
+def test_lease_size(lease_ratio: float, times: int, expected: int) -> None:
+    """Test lease size is a share of the limit, at least one hit."""
+    assert LocalQuota(lease_ratio).lease_size(times) == expected
+
+
+def test_take_without_lease() -> None:
+    """Test a key without a lease needs a refill."""
+    assert not LocalQuota(0.1).take("key")
+
+
+def test_take_spends_lease() -> None:
+    """Test hits are taken until the lease is exhausted."""
+    quota = LocalQuota(0.1)
+    quota.grant("key", tokens=2, pttls=[1000], since=time.monotonic())
+    assert quota.take("key")
+    assert quota.take("key")
+    assert not quota.take("key")
+
+
+def test_take_expired_lease() -> None:
+    """Test hits of an ended window are not spent."""
+    quota = LocalQuota(0.1)
+    quota.grant("key", tokens=2, pttls=[0], since=time.monotonic())
+    assert not quota.take("key")
+
+
+def test_grant_evicts_expired_leases() -> None:
+    """Test the number of kept leases is bounded."""
+    quota = LocalQuota(0.1, max_keys=2)
+    quota.grant("expired", tokens=1, pttls=[0], since=time.monotonic())
+    quota.grant("active", tokens=1, pttls=[1000], since=time.monotonic())
+    quota.grant("new", tokens=1, pttls=[1000], since=time.monotonic())
+    assert not quota.take("expired")
+    assert quota.take("active")
+    assert quota.take("new")
+
+
+def test_local_limiter_counts_all_rules() -> None:
+    """Test a hit is counted only if no rule is exceeded, reporting the longest."""
+    limiter = LocalLimiter()
+    second, hour = 1000, 3600000
+    keys = ("second", "hour")
+    args = ("2", str(second), "3", str(hour))
+    assert limiter(keys, args) == (0, 0)
+    assert limiter(keys, args) == (0, 0)
+    wait, exceeded = limiter(keys, args)
+    assert 0 < wait <= second
+    assert exceeded == 0
+    assert limiter(("hour",), ("3", str(hour))) == (0, 0)
+    wait, exceeded = limiter(keys, args)
+    assert wait > second
+    assert exceeded == 1
+
+
+def test_token_bucket_delays_over_burst() -> None:
+    """Test messages over the burst wait for their tokens in turn."""
+    rate = 10
+    bucket = TokenBucket(rate=rate, burst=2)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert 0 < bucket.reserve() <= 1 / rate
+    assert 1 / rate < bucket.reserve() <= 2 / rate
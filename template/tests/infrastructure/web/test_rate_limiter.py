@@ -0,0 +1,225 @@
+"""Tests for the rate limiter."""
+
+import asyncio
+from types import SimpleNamespace
+from typing import cast
+
+import pytest
+from litestar.exceptions import TooManyRequestsException
+from redis.asyncio import Redis
+
+from app.infrastructure.web.circuit_breaker import CircuitBreaker, CircuitState
+from app.infrastructure.web.heavy_hitters import HeavyHitters
+from app.infrastructure.web.local_quota import LocalQuota
+from app.infrastructure.web.rate_limit_scripts import RateLimitAlgorithm
+from app.infrastructure.web.rate_limiter import (
+    Connection,
+    RateLimit,
+    RateLimiter,
+    RateLimitRule,
+    default_callback,
+    default_identifier,
+)
+
+LIMIT = 3
+DENIED = 2
+WINDOW = 200
+
+
+async def client_identifier(request: Connection) -> str:  # noqa: ARG001
+    return "client"
+
+
+async def tenant_identifier(request: Connection) -> str:  # noqa: ARG001
+    return "tenant"
+
+
+def make_request(route: str) -> Connection:
+    return cast(
+        "Connection",
+        SimpleNamespace(
+            route_handler=SimpleNamespace(handler_id=route),
+            scope={"type": "http"},
+        ),
+    )
+
+
+async def sleep_into_window(redis: Redis) -> None:
+    """Sleep until 10ms into the next `WINDOW` of the Redis clock."""
+    seconds, microseconds = await redis.time()
+    now = seconds * 1000 + microseconds // 1000
+    await asyncio.sleep((WINDOW - now % WINDOW + 10) / 1000)
+
+
+def make_limiter(
+    algorithm: RateLimitAlgorithm,
+    local_quota: LocalQuota | None = None,
+) -> RateLimiter:
+    return RateLimiter(
+        Redis(),
+        "test",
+        {},
+        default_identifier,
+        default_callback,
+        algorithm,
+        local_quota=local_quota,
+    )
+
+
+@pytest.mark.parametrize(
+    "algorithm",
+    [RateLimitAlgorithm.SLIDING_WINDOW, RateLimitAlgorithm.GCRA],
+)
+def test_local_tier_rejects_other_algorithms(algorithm: RateLimitAlgorithm) -> None:
+    """Test the local tier only accepts fixed windows, as default or per route."""
+    make_limiter(algorithm).check_algorithm()
+    with pytest.raises(ValueError, match="fixed windows"):
+        make_limiter(algorithm, LocalQuota(0.1)).check_algorithm()
+
+    limiter = make_limiter(RateLimitAlgorithm.FIXED_WINDOW, LocalQuota(0.1))
+    limiter.check_algorithm()
+    with pytest.raises(ValueError, match="fixed windows"):
+        limiter.check_algorithm(algorithm)
+
+
+@pytest.mark.parametrize(
+    ("algorithm", "min_wait", "max_wait"),
+    [
+        # Waits for the end of the window.
+        (RateLimitAlgorithm.FIXED_WINDOW, 9000, 10000),
+        # Waits for the end of the window, no hit was counted in the previous one.
+        (RateLimitAlgorithm.SLIDING_WINDOW, 1, 10000),
+        # Waits for the emission interval of a single hit, 10s / 3.
+        (RateLimitAlgorithm.GCRA, 3200, 3334),
+    ],
+)
+async def test_algorithm_allows_the_limit(
+    redis: Redis,
+    algorithm: RateLimitAlgorithm,
+    min_wait: int,
+    max_wait: int,
+) -> None:
+    """Test each algorithm allows `LIMIT` hits, then denies with a retry-after."""
+    waits: list[int] = []
+
+    async def record_wait(request: Connection, pexpire: int) -> None:  # noqa: ARG001
+        waits.append(pexpire)
+
+    limiter = await RateLimiter.setup(
+        redis,
+        "test",
+        identifier=client_identifier,
+        callback=record_wait,
+        algorithm=algorithm,
+    )
+    for _ in range(LIMIT + DENIED):
+        await limiter(make_request("route"), RateLimit(times=LIMIT, seconds=10))
+
+    assert len(waits) == DENIED
+    assert all(min_wait <= wait <= max_wait for wait in waits)
+
+
+async def test_sliding_window_weighs_the_previous_window(redis: Redis) -> None:
+    """Test hits of the previous window count for the part it still overlaps."""
+    waits: list[int] = []
+
+    async def record_wait(request: Connection, pexpire: int) -> None:  # noqa: ARG001
+        waits.append(pexpire)
+
+    limiter = await RateLimiter.setup(
+        redis,
+        "test",
+        identifier=client_identifier,
+        callback=record_wait,
+        algorithm=RateLimitAlgorithm.SLIDING_WINDOW,
+    )
+    limit = RateLimit(times=LIMIT, milliseconds=WINDOW)
+    await sleep_into_window(redis)
+    for _ in range(LIMIT):
+        await limiter(make_request("route"), limit)
+    # Early in the next window, most of the previous one still counts.
+    await sleep_into_window(redis)
+    await limiter(make_request("route"), limit)
+
+    assert len(waits) == 1
+    assert 0 < waits[0] < WINDOW
+
+
+@pytest.mark.parametrize("auto_pipeline_delay", [None, 0])
+async def test_flushed_scripts_are_loaded_again(
+    redis: Redis,
+    auto_pipeline_delay: float | None,
+) -> None:
+    """Test the limiter keeps counting in Redis once Redis lost its scripts."""
+    limiter = await RateLimiter.setup(
+        redis,
+        "test",
+        identifier=client_identifier,
+        auto_pipeline_delay=auto_pipeline_delay,
+        check_timeout=1,
+        failure_threshold=1,
+    )
+    limit = RateLimit(times=LIMIT, seconds=10)
+    await limiter(make_request("route"), limit)
+    await redis.script_flush()
+    for _ in range(LIMIT - 1):
+        await limiter(make_request("route"), limit)
+
+    with pytest.raises(TooManyRequestsException):
+        await limiter(make_request("route"), limit)
+    assert cast("CircuitBreaker", limiter.circuit_breaker).state == CircuitState.CLOSED
+
+
+async def test_shared_bucket_counts_routes_with_other_limits(redis: Redis) -> None:
+    """Test routes sharing a bucket count hits together, each with its limit."""
+    limiter = await RateLimiter.setup(redis, "test", identifier=client_identifier)
+    for _ in range(3):
+        await limiter(
+            make_request("a"), RateLimit(times=100, seconds=10, bucket="tenant")
+        )
+    with pytest.raises(TooManyRequestsException):
+        await limiter(
+            make_request("b"), RateLimit(times=3, seconds=10, bucket="tenant")
+        )
+
+
+async def test_unused_lease_is_returned_to_longer_windows(redis: Redis) -> None:
+    """Test hits leased but not spent in a window do not count in the hour."""
+    limiter = await RateLimiter.setup(
+        redis,
+        "test",
+        identifier=client_identifier,
+        local_lease_ratio=0.5,
+    )
+    limit = RateLimit(
+        times=10, milliseconds=100, rules=[RateLimitRule(times=100, hours=1)]
+    )
+    windows = 3
+    for _ in range(windows):
+        await limiter(make_request("route"), limit)
+        await asyncio.sleep(0.11)
+
+    # One hit per window, only the lease of the last window is still held.
+    hits = await redis.get("test:lease:client:route:100:3600000")
+    assert int(cast("bytes", hits)) == windows - 1 + 5
+
+
+async def test_throttled_hit_is_recorded_for_the_exceeded_rule(redis: Redis) -> None:
+    """Test heavy hitters count the identity of the rule that was exceeded."""
+    heavy_hitters = await HeavyHitters.setup(redis, "test")
+    limiter = await RateLimiter.setup(
+        redis,
+        "test",
+        identifier=client_identifier,
+        heavy_hitters=heavy_hitters,
+    )
+    tenant_rule = RateLimitRule(times=1, seconds=10, identifier=tenant_identifier)
+    limit = RateLimit(times=10, seconds=10, rules=[tenant_rule])
+    await limiter(make_request("route"), limit)
+    with pytest.raises(TooManyRequestsException):
+        await limiter(make_request("route"), limit)
+    await asyncio.gather(*limiter._recording)  # noqa: SLF001
+
+    report = await heavy_hitters.report()
+    assert report.identifiers == [("tenant", 1)]
+    assert report.routes == [("route", 1)]
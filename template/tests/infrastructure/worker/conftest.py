@@ -0,0 +1,24 @@
+"""Fixtures of the worker tests."""
+
+from collections.abc import AsyncIterator
+from uuid import uuid4
+
+import pytest
+from fakeredis.aioredis import FakeAsyncRedisConnection
+from faststream.redis import RedisBroker
+
+from app.infrastructure.adapters.codec import decode_message
+from app.infrastructure.worker.broker import parse_message
+
+
+@pytest.fixture
+async def broker() -> AsyncIterator[RedisBroker]:
+    """Broker of an in-memory Redis with Lua scripting, empty for every test."""
+    broker = RedisBroker(
+        f"redis://{uuid4().hex}",
+        connection_class=FakeAsyncRedisConnection,
+        parser=parse_message,
+        decoder=decode_message,
+    )
+    yield broker
+    await broker.stop()
@@ -0,0 +1,37 @@
+"""Tests for the type-dispatched event routing."""
+
+import json
+
+from dishka import Provider, Scope, make_async_container
+
+from app.application.common.event import Event, EventHandler
+from app.domain.sample.events import SampleNumberRequestedEvent
+from app.infrastructure.adapters.codec import EnvelopeCodec
+from app.infrastructure.worker.dispatch import EventDispatcher
+
+
+class RecordingHandler(EventHandler[SampleNumberRequestedEvent, None]):
+    def __init__(self) -> None:
+        self.events: list[Event] = []
+
+    async def __call__(self, event: SampleNumberRequestedEvent) -> None:
+        self.events.append(event)
+
+
+async def test_dispatch_by_type() -> None:
+    """Test messages reach the handler of their type and other types are skipped."""
+    handler = RecordingHandler()
+    provider = Provider(scope=Scope.APP)
+    provider.provide(lambda: handler, provides=RecordingHandler)
+    container = make_async_container(provider)
+    dispatcher = EventDispatcher()
+    dispatcher.register(SampleNumberRequestedEvent, RecordingHandler)
+    event = SampleNumberRequestedEvent(input_number=3, result=9)
+
+    await dispatcher.dispatch(
+        json.loads(EnvelopeCodec().encode(event, "tests")), container
+    )
+    await dispatcher.dispatch({"type": "other.Event", "data": {}}, container)
+
+    assert handler.events == [event]
+    await container.close()
@@ -0,0 +1,67 @@
+"""Tests for the broker middlewares of the worker."""
+
+import asyncio
+from typing import Any
+
+from dishka import Provider, Scope, make_async_container
+from faststream.redis import RedisBroker, TestRedisBroker
+from redis.asyncio import Redis
+
+from app.infrastructure.adapters.dedup import Claim, MessageDeduplicator
+from app.infrastructure.worker.middlewares import DeduplicationMiddleware
+from app.infrastructure.worker.streams import batch_stream
+
+
+async def test_duplicate_message_is_skipped(redis: Redis) -> None:
+    """Test a message redelivered after it was handled skips the handler."""
+    provider = Provider(scope=Scope.APP)
+    provider.provide(lambda: MessageDeduplicator(redis), provides=MessageDeduplicator)
+    handled: list[Any] = []
+
+    async with make_async_container(provider) as container:
+        broker = RedisBroker(middlewares=[DeduplicationMiddleware(container)])
+
+        @broker.subscriber(stream="sample")
+        async def sample_events(body: dict[str, Any]) -> None:
+            handled.append(body)
+
+        async with TestRedisBroker(broker) as test_broker:
+            for number in (1, 1, 2):
+                await test_broker.publish({"id": str(number)}, stream="sample")
+
+    assert handled == [{"id": "1"}, {"id": "2"}]
+
+
+async def test_duplicates_are_removed_from_batches(
+    redis: Redis,
+    broker: RedisBroker,
+) -> None:
+    """Test handled and repeated messages are removed from a batch, others kept."""
+    deduplicator = MessageDeduplicator(redis)
+    async with deduplicator.handling("sample", "1"):
+        pass
+    provider = Provider(scope=Scope.APP)
+    provider.provide(lambda: deduplicator, provides=MessageDeduplicator)
+    handled: list[list[Any]] = []
+    done = asyncio.Event()
+
+    async with make_async_container(provider) as container:
+        broker.add_middleware(DeduplicationMiddleware(container))
+
+        async def sample_events(bodies: list[dict[str, Any]]) -> None:
+            handled.append(bodies)
+            done.set()
+
+        broker.subscriber(stream=batch_stream("sample", max_wait=0))(sample_events)
+
+        connection = await broker.connect()
+        await connection.xgroup_create("sample", "sample", id="0", mkstream=True)
+        for message_id in ("1", "2", "2", "3"):
+            await broker.publish({"id": message_id}, stream="sample")
+        await broker.publish({}, stream="sample")
+        await broker.start()
+        await asyncio.wait_for(done.wait(), timeout=1)
+        await broker.stop()
+
+    assert handled == [[{"id": "2"}, {"id": "3"}, {}]]
+    assert await deduplicator.claim("sample", "3") == Claim.DUPLICATE
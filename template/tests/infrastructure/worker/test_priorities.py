@@ -0,0 +1,81 @@
+"""Tests for the weighted sharing of handling slots between priorities."""
+
+import asyncio
+from collections import Counter
+
+from faststream.redis import RedisRouter
+
+from app.application.common.interfaces import Priority
+from app.infrastructure.worker.priorities import (
+    DEFAULT_WEIGHTS,
+    WeightedSlots,
+    priority_slots,
+    priority_subscriber,
+)
+
+CAPACITY = 3
+
+
+async def test_busy_slots_shared_by_weight() -> None:
+    """Test waiting priorities get released slots in proportion to their weight."""
+    slots = WeightedSlots(DEFAULT_WEIGHTS, capacity=1)
+    granted: list[Priority] = []
+
+    async def handle(priority: Priority) -> None:
+        async with slots.slot(priority):
+            granted.append(priority)
+            await asyncio.sleep(0)
+
+    blocker = asyncio.Event()
+
+    async def block() -> None:
+        async with slots.slot(Priority.LOW):
+            await blocker.wait()
+
+    holder = asyncio.create_task(block())
+    await asyncio.sleep(0)
+    tasks = [
+        asyncio.create_task(handle(priority))
+        for priority in DEFAULT_WEIGHTS
+        for _ in range(22)
+    ]
+    await asyncio.sleep(0)
+    blocker.set()
+    await asyncio.gather(holder, *tasks)
+
+    assert Counter(granted[:22]) == {
+        Priority.HIGH: 16,
+        Priority.NORMAL: 4,
+        Priority.LOW: 2,
+    }
+    assert Counter(granted) == dict.fromkeys(DEFAULT_WEIGHTS, 22)
+
+
+async def test_idle_priorities_leave_their_share() -> None:
+    """Test a single priority uses every slot when nothing else waits."""
+    slots = WeightedSlots(DEFAULT_WEIGHTS, capacity=CAPACITY)
+    running = 0
+    peak = 0
+
+    async def handle() -> None:
+        nonlocal running, peak
+        async with slots.slot(Priority.LOW):
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*(handle() for _ in range(9)))
+    assert peak == CAPACITY
+
+
+def test_priority_streams_share_the_namespace_slots() -> None:
+    """Test the priority streams of a namespace get the slots of the subscriber."""
+    slots = WeightedSlots({Priority.HIGH: 3, Priority.NORMAL: 1}, capacity=CAPACITY)
+
+    @priority_subscriber(RedisRouter(), "ranked", slots=slots)
+    async def handle(body: dict[str, object]) -> None: ...
+
+    assert priority_slots.get("ranked:high") is slots
+    assert priority_slots.get("ranked") is slots
+    assert priority_slots.get("ranked:low") is None
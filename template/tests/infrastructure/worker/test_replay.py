@@ -0,0 +1,26 @@
+"""Tests for the replay of stored stream entries."""
+
+from datetime import UTC, datetime
+
+from app.application.sample.handlers import SampleNumberEventHandler
+from app.domain.sample.events import SampleNumberRequestedEvent
+from app.infrastructure.worker.replay import handled_event_type, stream_id
+
+
+def test_handled_event_type() -> None:
+    """Test the event class of a handler comes from its generic base."""
+    assert handled_event_type(SampleNumberEventHandler) is SampleNumberRequestedEvent
+
+
+def test_stream_id_range() -> None:
+    """Test time bounds cover every entry id of their millisecond."""
+    moment = datetime(2030, 1, 1, tzinfo=UTC)
+    millis = int(moment.timestamp() * 1000)
+    assert stream_id(moment) == f"{millis}-0"
+    assert stream_id(moment, end=True) == f"{millis}-18446744073709551615"
+
+
+def test_naive_stream_id_is_utc() -> None:
+    """Test a time without an offset is read as UTC, like the entry ids."""
+    moment = datetime(2030, 1, 1, tzinfo=UTC)
+    assert stream_id(moment.replace(tzinfo=None)) == stream_id(moment)
@@ -0,0 +1,115 @@
+"""Tests for the subscriptions of the worker to the event streams."""
+
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Any
+
+import pytest
+from dishka import AsyncContainer, Provider, Scope, make_async_container
+from faststream.redis import RedisBroker, RedisRouter
+from redis.asyncio import Redis
+
+from app.application.common.event import BatchEventHandler
+from app.domain.sample.events import SampleNumberRequestedEvent
+from app.infrastructure.adapters.codec import EnvelopeCodec
+from app.infrastructure.worker.dispatch import EventDispatcher
+from app.infrastructure.worker.streams import batch_stream, group_subscriber
+
+MAX_SIZE = 3
+RECLAIM_AFTER = 0.05
+EVENTS = [SampleNumberRequestedEvent(input_number=n, result=n * n) for n in range(5)]
+
+
+class RecordingBatchHandler(BatchEventHandler[SampleNumberRequestedEvent, None]):
+    def __init__(self) -> None:
+        self.batches: list[list[SampleNumberRequestedEvent]] = []
+        self.done = asyncio.Event()
+
+    async def __call__(self, events: list[SampleNumberRequestedEvent]) -> None:
+        self.batches.append(events)
+        if sum(map(len, self.batches)) == len(EVENTS):
+            self.done.set()
+
+
+@pytest.fixture
+async def container() -> AsyncIterator[AsyncContainer]:
+    handler = RecordingBatchHandler()
+    provider = Provider(scope=Scope.APP)
+    provider.provide(lambda: handler, provides=RecordingBatchHandler)
+    container = make_async_container(provider)
+    yield container
+    await container.close()
+
+
+async def test_batch_is_handled_and_acknowledged_at_once(
+    broker: RedisBroker,
+    container: AsyncContainer,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test entries reach the batch handler in lists of at most `max_size`.
+
+    Each batch is acknowledged with a single ``XACK``.
+    """
+    dispatcher = EventDispatcher()
+    dispatcher.register_batch(SampleNumberRequestedEvent, RecordingBatchHandler)
+
+    async def sample_events(bodies: list[dict[str, Any]]) -> None:
+        await dispatcher.dispatch_batch(bodies, container)
+
+    broker.subscriber(
+        stream=batch_stream("sample", max_size=MAX_SIZE, max_wait=0),
+    )(sample_events)
+
+    acknowledged: list[int] = []
+    xack = Redis.xack
+
+    async def counting_xack(redis: Redis, name: str, group: str, *ids: Any) -> Any:
+        acknowledged.append(len(ids))
+        return await xack(redis, name, group, *ids)
+
+    monkeypatch.setattr(Redis, "xack", counting_xack)
+    redis = await broker.connect()
+    await redis.xgroup_create("sample", "sample", id="0", mkstream=True)
+    codec = EnvelopeCodec()
+    for event in EVENTS:
+        await broker.publish(
+            codec.encode(event, "tests"), stream="sample", headers=codec.headers
+        )
+
+    await broker.start()
+    handler = await container.get(RecordingBatchHandler)
+    await asyncio.wait_for(handler.done.wait(), timeout=1)
+    await broker.stop()
+
+    assert handler.batches == [EVENTS[:MAX_SIZE], EVENTS[MAX_SIZE:]]
+    assert acknowledged == [MAX_SIZE, len(EVENTS) - MAX_SIZE]
+    pending = await redis.xpending("sample", "sample")
+    assert pending["pending"] == 0
+
+
+async def test_entry_of_a_stopped_consumer_is_reclaimed(broker: RedisBroker) -> None:
+    """Test an entry left pending by a stopped consumer is claimed and handled."""
+    router = RedisRouter()
+    handled: list[dict[str, Any]] = []
+    done = asyncio.Event()
+
+    async def sample_event(body: dict[str, Any]) -> None:
+        handled.append(body)
+        done.set()
+
+    group_subscriber(router, "sample", reclaim_after=RECLAIM_AFTER)(sample_event)
+    broker.include_router(router)
+    redis = await broker.connect()
+    await redis.xgroup_create("sample", "sample", id="0", mkstream=True)
+    await broker.publish({"number": 1}, stream="sample")
+    # A consumer reads the entry and stops before acknowledging it.
+    await redis.xreadgroup("sample", "stopped", {"sample": ">"})
+    await asyncio.sleep(RECLAIM_AFTER)
+
+    await broker.start()
+    await asyncio.wait_for(done.wait(), timeout=1)
+    await broker.stop()
+
+    assert handled == [{"number": 1}]
+    pending = await redis.xpending("sample", "sample")
+    assert pending["pending"] == 0
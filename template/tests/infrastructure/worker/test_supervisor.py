@@ -0,0 +1,108 @@
+"""Tests for the restart of exited worker processes."""
+
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from app.infrastructure.worker import supervisor as supervisor_module
+from app.infrastructure.worker.supervisor import (
+    MAX_RESTART_DELAY,
+    STABLE_AFTER,
+    WorkerSupervisor,
+)
+
+
+class FakeProcess:
+    pid = 1
+    exitcode: int | None = None
+
+    def __init__(self) -> None:
+        self.alive = False
+
+    def start(self) -> None:
+        self.alive = True
+
+    def is_alive(self) -> bool:
+        return self.alive
+
+
+class FakeContext:
+    def __init__(self) -> None:
+        self.process = FakeProcess()
+
+    def Process(self, **kwargs: Any) -> FakeProcess:  # noqa: ARG002, N802
+        self.process = FakeProcess()
+        return self.process
+
+
+def restart_delays(lifetimes: list[float]) -> list[float]:
+    """Seconds each process waited to restart, after living for `lifetimes`."""
+    supervisor = WorkerSupervisor(lambda: None, processes=1, restart_delay=1)
+    context = FakeContext()
+    supervisor._context = context  # type: ignore[assignment]  # noqa: SLF001
+    now = 0.0
+    supervisor.supervise(now)
+    delays = []
+    for lifetime in lifetimes:
+        now += lifetime
+        context.process.alive = False
+        exited_at = now
+        exited = context.process
+        supervisor.supervise(now)
+        while context.process is exited:
+            now += 0.5
+            supervisor.supervise(now)
+        delays.append(now - exited_at)
+    return delays
+
+
+def test_crashing_process_restarts_with_backoff() -> None:
+    """Test the restart delay doubles while a process keeps exiting, up to a cap."""
+    assert restart_delays([0] * 7) == [
+        2,
+        4,
+        8,
+        16,
+        32,
+        MAX_RESTART_DELAY,
+        MAX_RESTART_DELAY,
+    ]
+
+
+def test_stable_process_restarts_after_the_initial_delay() -> None:
+    """Test a process exiting after running a while gets the initial delay back."""
+    assert restart_delays([0, 0, STABLE_AFTER, 0]) == [2, 4, 1, 2]
+
+
+def test_exited_process_metrics_are_marked_dead(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test the live gauges of an exited process are dropped with metrics served."""
+    dead: list[int] = []
+    monkeypatch.setattr(supervisor_module, "mark_process_dead", dead.append)
+    supervisor = WorkerSupervisor(lambda: None, processes=1, metrics_port=9100)
+    context = FakeContext()
+    supervisor._context = context  # type: ignore[assignment]  # noqa: SLF001
+    supervisor.supervise(0)
+    context.process.alive = False
+    supervisor.supervise(1)
+    assert dead == [FakeProcess.pid]
+
+
+def test_metrics_dir_is_emptied_before_serving(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    """Test the metrics of a previous run are removed and the directory created."""
+    directory = tmp_path / "metrics"
+    directory.mkdir()
+    (directory / "counter_1.db").write_bytes(b"stale")
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(directory))
+    monkeypatch.setattr(supervisor_module, "start_http_server", lambda *_, **__: None)
+    supervisor_module._serve_metrics(9100)  # noqa: SLF001
+    assert list(directory.iterdir()) == []
+
+    directory.rmdir()
+    supervisor_module._serve_metrics(9100)  # noqa: SLF001
+    assert directory.is_dir()
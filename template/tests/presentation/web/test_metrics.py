@@ -0,0 +1,58 @@
+"""Tests for the metrics endpoint."""
+
+from types import SimpleNamespace
+from typing import Any, cast
+
+import pytest
+from litestar.connection import ASGIConnection
+from litestar.exceptions import NotAuthorizedException
+from litestar.handlers import BaseRouteHandler
+
+from app.presentation.web.metrics import metrics_token_guard
+
+
+class Container:
+    def __init__(self, token: str | None) -> None:
+        self.settings = SimpleNamespace(app=SimpleNamespace(metrics_token=token))
+
+    async def get(self, _: type) -> SimpleNamespace:
+        return self.settings
+
+
+def make_connection(
+    token: str | None, authorization: str | None
+) -> ASGIConnection[Any, Any, Any, Any]:
+    headers = {} if authorization is None else {"Authorization": authorization}
+    return cast(
+        "ASGIConnection[Any, Any, Any, Any]",
+        SimpleNamespace(
+            app=SimpleNamespace(
+                state=SimpleNamespace(dishka_container=Container(token))
+            ),
+            headers=headers,
+        ),
+    )
+
+
+async def test_guard_accepts_the_token() -> None:
+    """Test requests with the bearer token read the metrics."""
+    handler = cast("BaseRouteHandler", None)
+    await metrics_token_guard(make_connection("secret", "Bearer secret"), handler)
+
+
+@pytest.mark.parametrize(
+    ("token", "authorization"),
+    [
+        ("secret", None),
+        ("secret", "Bearer other"),
+        (None, None),
+        (None, "Bearer "),
+    ],
+)
+async def test_guard_rejects_other_requests(
+    token: str | None, authorization: str | None
+) -> None:
+    """Test the endpoint is closed without the token, and without a configured one."""
+    handler = cast("BaseRouteHandler", None)
+    with pytest.raises(NotAuthorizedException):
+        await metrics_token_guard(make_connection(token, authorization), handler)